@@ -68,9 +68,11 @@ class ApiClient {
 
   /**
    * 全ドメインを取得
+   * options 例: { fields: ['id', 'name', 'emoji'], limit: 20, cursor: data.nextCursor }
+   * （limit / cursor 指定時はレスポンスの nextCursor で次のページを取得、最後のページでは null）
    */
-  static async getDomains() {
-    return this.request('/domains');
+  static async getDomains(options = {}) {
+    return this.request(this.withListParams('/domains', options));
   }
 
   /**
@@ -83,8 +85,26 @@ class ApiClient {
   /**
    * ドメインの書類一覧を取得
    */
-  static async getDomainDocuments(domainId) {
-    return this.request(`/domains/${domainId}/documents`);
+  static async getDomainDocuments(domainId, options = {}) {
+    return this.request(this.withListParams(`/domains/${domainId}/documents`, options));
+  }
+
+  /**
+   * 一覧APIのパスに fields / limit / cursor を付ける
+   */
+  static withListParams(endpoint, { fields, limit, cursor } = {}) {
+    const params = new URLSearchParams();
+    if (fields && fields.length) {
+      params.set('fields', fields.join(','));
+    }
+    if (limit) {
+      params.set('limit', limit);
+    }
+    if (cursor) {
+      params.set('cursor', cursor);
+    }
+    const query = params.toString();
+    return query ? `${endpoint}?${query}` : endpoint;
   }
 
   /**
@@ -114,6 +134,76 @@ class ApiClient {
   static async getStatisticsSummary() {
     return this.request('/statistics/summary');
   }
+
+  /**
+   * 書類・入力項目・タスク・痛み点を全文検索
+   * kinds 例: ['document', 'field']（title / body の一致箇所は <mark> で囲まれたHTML）
+   */
+  static async search(query, { kinds, limit, cursor } = {}) {
+    const params = new URLSearchParams({ q: query });
+    if (kinds && kinds.length) {
+      params.set('kind', kinds.join(','));
+    }
+    if (limit) {
+      params.set('limit', limit);
+    }
+    if (cursor) {
+      params.set('cursor', cursor);
+    }
+    return this.request(`/search?${params}`);
+  }
+
+  /**
+   * 選択した書類（documentIds）・ドメインの全書類（domainIds）の入力項目の和集合と、重複分の入力数を取得
+   */
+  static async getFieldUnion({ documentIds = [], domainIds = [] } = {}) {
+    const params = new URLSearchParams();
+    if (documentIds.length) {
+      params.set('documents', documentIds.join(','));
+    }
+    if (domainIds.length) {
+      params.set('domains', domainIds.join(','));
+    }
+    return this.request(`/fields/union?${params}`);
+  }
+
+  /**
+   * 入力項目を使う書類・ドメインを取得
+   */
+  static async getFieldDocuments(fieldId) {
+    return this.request(`/fields/${fieldId}/documents`);
+  }
+
+  /**
+   * デモ分析（what-if シナリオ）を計算
+   * overrides 例: { costPerHour: 4000, dailyVolume: { medical: 3000 }, reductionRate: { medical: 0.5 } }
+   */
+  static async getAnalysis(mode, overrides = {}) {
+    const params = new URLSearchParams();
+    if (mode) {
+      params.set('mode', mode);
+    }
+    for (const [key, value] of Object.entries(overrides)) {
+      if (value !== null && typeof value === 'object') {
+        for (const [domainId, domainValue] of Object.entries(value)) {
+          params.set(`${key}.${domainId}`, domainValue);
+        }
+      } else {
+        params.set(key, value);
+      }
+    }
+    const query = params.toString();
+    return this.request(query ? `/analysis?${query}` : '/analysis');
+  }
+
+  /**
+   * 予算内で削減効果が最大になるドメイン別モードの組み合わせを取得
+   * objective: 'cost' | 'time'、maintenanceYears: 予算に含める運用保守費の年数
+   */
+  static async optimizeModes(budget, { objective = 'cost', maintenanceYears = 0 } = {}) {
+    const params = new URLSearchParams({ budget, objective, maintenanceYears });
+    return this.request(`/analysis/optimize?${params}`);
+  }
 }
 
 // グローバルに公開
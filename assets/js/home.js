@@ -5,6 +5,9 @@ let experienceMode = 'game'; // URLパラメータから取得
 let domainModes = {}; // デモモード時の各分野のモード状態
 let isCustomMode = false; // カスタムプランモードかどうか
 
+// 分野一覧で使うドメインの項目（/api/domains?fields= で取得、backend/app.py の HOME_DOMAINS_PATH と合わせる）
+const HOME_DOMAIN_FIELDS = ['id', 'name', 'emoji', 'intro', 'description', 'demoMetrics'];
+
 // プラン定義
 const PLANS = {
   plain: {
@@ -51,12 +54,13 @@ document.addEventListener('DOMContentLoaded', async () => {
       }
     }
     
-    // domains.jsonとcharacters.jsonを読み込み（API経由）
-    const [data, charactersDataResponse, jsonData] = await Promise.all([
-      ApiClient.getDomains(),
-      ApiClient.getCharacters(),
-      fetch('assets/data/domains.json').then(r => r.json()).catch(() => ({ domains: [] }))
+    // domains.jsonとcharacters.jsonを読み込み（API経由、ドメインは一覧表示に使う項目のみ）
+    const [data, charactersDataResponse] = await Promise.all([
+      ApiClient.getDomains({ fields: HOME_DOMAIN_FIELDS }),
+      ApiClient.getCharacters()
     ]);
+    // /api/domains は domains.json の内容をそのまま返すため、JSON の値として扱う
+    const jsonData = data;
     
     // JSON ファイルからのドメインデータを ID でマップ化
     const jsonDomainsMap = {};
@@ -544,7 +548,7 @@ async function updateStatisticsAnalysis() {
   try {
     // データ未読み込みの場合は読み込み
     if (!domainsDataForStats) {
-      domainsDataForStats = await ApiClient.getDomains();
+      domainsDataForStats = await ApiClient.getDomains({ fields: HOME_DOMAIN_FIELDS });
       
       // demoMetricsをキャッシュ
       domainsDataForStats.domains.forEach(domain => {
@@ -5,30 +5,336 @@ DX-AIモデル REST API Server
 Flask + SQLite3によるRESTful API
 """
 
-from flask import Flask, jsonify, request, send_file
+from flask import Flask, jsonify, request, send_file, g
+from werkzeug.security import safe_join
 from flask_cors import CORS
 import sqlite3
 from pathlib import Path
 from functools import wraps
 import traceback
+import threading
+import os
+import json
+import html
+import re
+import hashlib
+import base64
+import gzip
+import mimetypes
+import sys
+from collections import OrderedDict
+from datetime import datetime, timezone
 from io import BytesIO
 
+# デモ分析の計算ロジックは tools/build_demo_analysis.py と共通
+sys.path.insert(0, str(Path(__file__).parent.parent / 'tools'))
+from build_demo_analysis import compute_metrics_for_mode
+from mode_optimizer import OBJECTIVES, optimize_modes
+
+try:
+    import brotli
+except ImportError:  # brotli は任意（未インストールなら gzip のみで圧縮）
+    brotli = None
+
 app = Flask(__name__, 
             static_folder='../assets',
             static_url_path='/assets')
 CORS(app)  # 全てのオリジンからのアクセスを許可（開発用）
 
+# APIレスポンスの Cache-Control max-age（秒）。0 の場合は毎回 ETag で再検証させる
+app.config.setdefault('API_CACHE_MAX_AGE', 0)
+
+# レスポンス圧縮: これより小さい本文は圧縮しない（バイト）
+app.config.setdefault('COMPRESS_MIN_SIZE', 1024)
+
+# HTMLページのキャッシュ: これより大きいファイルはメモリに載せず send_file で配信する（バイト）
+app.config.setdefault('PAGE_CACHE_MAX_FILE_SIZE', 1024 * 1024)
+
+# /api/analysis の計算結果を保持するLRUキャッシュの最大件数
+app.config.setdefault('ANALYSIS_CACHE_SIZE', 256)
+
+# 引数なしの読み取り系API（ドメイン別の書類一覧、ペルソナ詳細など）のレスポンスを保持するLRUキャッシュの最大件数
+app.config.setdefault('RESPONSE_CACHE_SIZE', 1024)
+
+# 一覧API（/api/domains, /api/domains/<id>/documents）の fields / limit / cursor 指定時
+# API_PAGE_SIZE: cursor のみ指定時の件数 / API_PAGE_SIZE_MAX: limit の上限
+# PROJECTION_CACHE_SIZE: 射影・ページごとのレスポンスを保持するLRUキャッシュの最大件数
+app.config.setdefault('API_PAGE_SIZE', 20)
+app.config.setdefault('API_PAGE_SIZE_MAX', 100)
+app.config.setdefault('PROJECTION_CACHE_SIZE', 256)
+
+# /api/fields/union で、重複する入力項目1つあたりに省けるキー入力数の見積もり
+app.config.setdefault('KEYSTROKES_PER_FIELD', 10)
+
+# 事前生成したAPIスナップショット（tools/build_api_snapshot.py）の配置先。存在すればDBより優先して配信する
+app.config.setdefault('API_SNAPSHOT_DIR', Path(__file__).parent / 'api_snapshot')
+
+# データベース接続プールの設定
+# DB_POOL_SIZE: プールに保持するアイドル接続の最大数
+# DB_OPEN_MODE: 'rw'（通常） / 'ro'（URIの mode=ro） / 'immutable'（mode=ro&immutable=1、DBファイルを書き換えない運用時のみ）
+#               / 'memory'（起動時にDB全体を共有キャッシュのインメモリDBへコピーして配信）
+# DB_MMAP_SIZE: PRAGMA mmap_size（バイト）。None の場合はDBファイルのサイズに合わせる
+# DB_CACHE_SIZE: PRAGMA cache_size（負値はKiB単位）
+# DB_JOURNAL_MODE: None の場合はDBファイルのジャーナルモードをそのまま使う（'rw' 時のみ 'WAL' 等を指定可能）
+# MEMORY_DB_WATCH_INTERVAL: 'memory' モードでDBファイルの変更を監視する間隔（秒）。0 で監視しない
+DB_OPEN_MODES = ('rw', 'ro', 'immutable', 'memory')
+app.config.setdefault('DB_POOL_SIZE', int(os.environ.get('DB_POOL_SIZE', 8)))
+app.config.setdefault('DB_OPEN_MODE', os.environ.get('DB_OPEN_MODE', 'rw'))
+app.config.setdefault('DB_MMAP_SIZE', None)
+app.config.setdefault('DB_CACHE_SIZE', -16000)
+app.config.setdefault('DB_JOURNAL_MODE', None)
+app.config.setdefault('MEMORY_DB_WATCH_INTERVAL', 2.0)
+
 # データベースパス
 DB_PATH = Path(__file__).parent / 'dx_ai_model.db'
 
+# ドメイン定義JSONのパス
+DOMAINS_JSON_PATH = Path(__file__).parent.parent / 'assets' / 'data' / 'domains.json'
+
 # ===== ユーティリティ関数 =====
 
-def get_db():
-    """データベース接続を取得"""
-    conn = sqlite3.connect(DB_PATH)
+# ----- インメモリDB -----
+
+# 'memory' モードで配信中のインメモリDB
+# uri: 共有キャッシュのURI / version: コピー元ファイルの (mtime_ns, size) / keeper: DBを保持し続けるための接続
+# 再読み込み時は新しい名前のインメモリDBを作ってから辞書ごと差し替える（アトミックな切り替え）
+_memory_db = None
+_memory_db_lock = threading.Lock()
+_memory_db_generation = 0
+
+def load_memory_db():
+    """DBファイルを sqlite3 のバックアップAPIで新しい共有インメモリDBにコピーし、配信対象を切り替える"""
+    global _memory_db, _memory_db_generation
+    
+    with _memory_db_lock:
+        _memory_db_generation += 1
+        generation = _memory_db_generation
+        uri = f'file:dx_ai_model_memory_{os.getpid()}_{generation}?mode=memory&cache=shared'
+        
+        # コピー前にバージョンを取得（コピー中に更新されても次回の監視で再読み込みされる）
+        version = file_signature(DB_PATH)
+        keeper = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        source = sqlite3.connect(f'{Path(DB_PATH).resolve().as_uri()}?mode=ro', uri=True)
+        try:
+            source.backup(keeper)
+        finally:
+            source.close()
+        
+        previous = _memory_db
+        _memory_db = {'uri': uri, 'version': version, 'keeper': keeper, 'generation': generation}
+    
+    # 旧DBは貸し出し中の接続が閉じられた時点で解放される
+    if previous is not None:
+        previous['keeper'].close()
+    return _memory_db
+
+def get_memory_db():
+    """配信中のインメモリDBを取得（未ロードなら読み込む）"""
+    memory_db = _memory_db
+    if memory_db is None:
+        memory_db = load_memory_db()
+    return memory_db
+
+def reload_memory_db_if_changed():
+    """DBファイルが更新されていればインメモリDBを再読み込み"""
+    if _memory_db is not None and _memory_db['version'] == file_signature(DB_PATH):
+        return False
+    load_memory_db()
+    return True
+
+# SIGHUP による再読み込みの要求（読み込みは監視スレッドで行う）
+_memory_db_reload_requested = threading.Event()
+
+def request_memory_db_reload(signum=None, frame=None):
+    """インメモリDBの再読み込みを監視スレッドに要求する（SIGHUP ハンドラ）
+    
+    シグナルハンドラはメインスレッドに割り込んで実行されるため、ここでは読み込まない
+    （メインスレッドが _memory_db_lock を保持している最中に割り込むとデッドロックする）
+    """
+    _memory_db_reload_requested.set()
+
+def wait_and_reload_memory_db(timeout):
+    """再読み込みの要求を最大 timeout 秒（None なら無期限）待ち、要求があれば再読み込み、
+    なければDBファイルが更新されている場合のみ再読み込みする"""
+    if _memory_db_reload_requested.wait(timeout):
+        _memory_db_reload_requested.clear()
+        load_memory_db()
+        return True
+    return reload_memory_db_if_changed()
+
+def start_memory_db_watcher(handle_sighup=True):
+    """DBファイルの変更と SIGHUP を監視して再読み込みするスレッドを開始（'memory' モード用）
+    
+    handle_sighup=False では SIGHUP ハンドラを登録しない（gunicorn のワーカーなど、SIGHUP を別の用途で使う場合）
+    """
+    import signal
+    
+    handle_sighup = (handle_sighup and hasattr(signal, 'SIGHUP')
+                     and threading.current_thread() is threading.main_thread())
+    if handle_sighup:
+        signal.signal(signal.SIGHUP, request_memory_db_reload)
+    
+    interval = app.config['MEMORY_DB_WATCH_INTERVAL']
+    if not interval and not handle_sighup:
+        return None
+    
+    def watch():
+        while True:
+            try:
+                # 監視しない設定（interval=0）では SIGHUP の要求だけを待つ
+                if wait_and_reload_memory_db(interval or None):
+                    print(f"🔄 インメモリDBを再読み込みしました: {DB_PATH}")
+            except Exception as e:
+                # マイグレーション中でファイルが一時的に存在しない場合など
+                print(f"Error in memory DB watcher: {e}")
+    
+    watcher = threading.Thread(target=watch, name='memory-db-watcher', daemon=True)
+    watcher.start()
+    return watcher
+
+# ----- 接続 -----
+
+def get_db_identity():
+    """接続先DBの識別子（変わった場合はプール内の接続を破棄する）"""
+    if app.config['DB_OPEN_MODE'] == 'memory':
+        return ('memory', get_memory_db()['generation'])
+    stat = os.stat(DB_PATH)
+    return (str(DB_PATH), stat.st_dev, stat.st_ino)
+
+def connect_db():
+    """新しいデータベース接続を作成（PRAGMA は接続ごとに1回だけ設定）"""
+    open_mode = app.config['DB_OPEN_MODE']
+    if open_mode not in DB_OPEN_MODES:
+        raise ValueError(f'Unknown DB_OPEN_MODE: {open_mode}')
+    
+    # プールされた接続は別スレッドで再利用されるため check_same_thread を無効化
+    if open_mode == 'rw':
+        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+    elif open_mode == 'memory':
+        conn = sqlite3.connect(get_memory_db()['uri'], uri=True, check_same_thread=False)
+    else:
+        uri = f'{Path(DB_PATH).resolve().as_uri()}?mode=ro'
+        if open_mode == 'immutable':
+            uri += '&immutable=1'
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
     conn.row_factory = sqlite3.Row  # 辞書形式でアクセス可能
+    
+    journal_mode = app.config['DB_JOURNAL_MODE']
+    if journal_mode and open_mode == 'rw':
+        conn.execute(f'PRAGMA journal_mode = {journal_mode}')
+    
+    # mmap_size 未指定時はファイル全体をマップできるサイズにする（インメモリDBでは不要）
+    if open_mode != 'memory':
+        mmap_size = app.config['DB_MMAP_SIZE']
+        if mmap_size is None:
+            mmap_size = os.stat(DB_PATH).st_size
+        conn.execute(f'PRAGMA mmap_size = {int(mmap_size)}')
+    conn.execute(f"PRAGMA cache_size = {int(app.config['DB_CACHE_SIZE'])}")
+    conn.execute('PRAGMA query_only = ON')  # APIは読み取り専用
     return conn
 
+def describe_db_mode():
+    """実際に有効になっているDBのオープンモードを返す（起動時の表示用）"""
+    conn = connect_db()
+    try:
+        # インメモリDBでは PRAGMA mmap_size は行を返さない
+        mmap_row = conn.execute('PRAGMA mmap_size').fetchone()
+        return {
+            'openMode': app.config['DB_OPEN_MODE'],
+            'journalMode': conn.execute('PRAGMA journal_mode').fetchone()[0],
+            'mmapSize': mmap_row[0] if mmap_row else 0,
+            'queryOnly': bool(conn.execute('PRAGMA query_only').fetchone()[0]),
+        }
+    finally:
+        conn.close()
+
+class ConnectionPool:
+    """SQLite接続プール
+    
+    アイドル接続を LIFO で保持し、リクエストごとに貸し出す。
+    接続先DBが差し替えられた場合（マイグレーションで再作成された、インメモリDBを再読み込みした等）は
+    古いDBへの接続を破棄する。
+    """
+    
+    def __init__(self, connect, identity):
+        self._connect = connect
+        self._identity = identity
+        self._lock = threading.Lock()
+        self._idle = []
+        self._current = None
+        self._owners = {}  # 接続 -> 作成時のDB識別子
+        self.hits = 0
+        self.misses = 0
+        self.discarded = 0
+    
+    def acquire(self):
+        """接続を取得（アイドル接続があれば再利用）"""
+        identity = self._identity()
+        with self._lock:
+            if identity != self._current:
+                self._discard_idle()
+                self._current = identity
+            if self._idle:
+                self.hits += 1
+                return self._idle.pop()
+            self.misses += 1
+        
+        conn = self._connect()
+        with self._lock:
+            self._owners[conn] = identity
+        return conn
+    
+    def release(self, conn):
+        """接続をプールに返却（上限を超える場合や古いDBへの接続は閉じる）"""
+        if conn.in_transaction:
+            conn.rollback()
+        identity = self._identity()
+        with self._lock:
+            if len(self._idle) < app.config['DB_POOL_SIZE'] and self._owners.get(conn) == identity:
+                self._idle.append(conn)
+                return
+            self._owners.pop(conn, None)
+            self.discarded += 1
+        conn.close()
+    
+    def close_idle(self):
+        """アイドル接続をすべて閉じる（fork 前に呼び、子プロセスへ接続を引き継がない）"""
+        with self._lock:
+            self._discard_idle()
+    
+    def _discard_idle(self):
+        for conn in self._idle:
+            self._owners.pop(conn, None)
+            conn.close()
+        self.discarded += len(self._idle)
+        self._idle = []
+    
+    def stats(self):
+        """プールの統計情報"""
+        with self._lock:
+            return {
+                'size': app.config['DB_POOL_SIZE'],
+                'idle': len(self._idle),
+                'hits': self.hits,
+                'misses': self.misses,
+                'discarded': self.discarded,
+            }
+
+db_pool = ConnectionPool(connect_db, get_db_identity)
+
+def get_db():
+    """データベース接続を取得（アプリケーションコンテキストごとにプールから1本借りる）"""
+    if 'db' not in g:
+        g.db = db_pool.acquire()
+    return g.db
+
+@app.teardown_appcontext
+def release_db(exception):
+    """リクエスト終了時に接続をプールへ返却"""
+    conn = g.pop('db', None)
+    if conn is not None:
+        db_pool.release(conn)
+
 def handle_errors(f):
     """エラーハンドリングデコレータ"""
     @wraps(f)
@@ -41,6 +347,668 @@ def handle_errors(f):
             return jsonify({'error': str(e)}), 500
     return decorated_function
 
+# ===== データキャッシュ =====
+
+# domains.json のキャッシュ（プロセス全体で共有）
+# key: (mtime_ns, size) / data: パース済みの辞書 / body: レスポンス用のUTF-8バイト列
+# 更新時は辞書ごと差し替えるため、読み取り側はロック不要
+_domains_cache = None
+_domains_cache_lock = threading.Lock()
+
+def file_signature(path):
+    """ファイルの (mtime_ns, size) を返す（キャッシュの無効化判定用）"""
+    stat = path.stat()
+    return (stat.st_mtime_ns, stat.st_size)
+
+def load_domains_data(json_path):
+    """domains.json を読み込み、デモ用メタ情報のデフォルト値をマージ"""
+    with open(json_path, 'r', encoding='utf-8') as f:
+        return parse_domains_data(f.read())
+
+def parse_domains_data(text):
+    """domains.json の内容をパースし、デモ用メタ情報のデフォルト値をマージ"""
+    json_data = json.loads(text)
+    
+    # メタ情報をマージ（既存の demoMetaInfo は保持、costPerHour のみ追加）
+    meta = json_data.setdefault('meta', {})
+    demo_meta_info = meta.setdefault('demoMetaInfo', {})
+    demo_meta_info.setdefault('costPerHour', 3000)
+    
+    return json_data
+
+def get_domains_cache():
+    """domains.json のキャッシュを取得（ファイルが変更された場合のみ再読み込み）"""
+    global _domains_cache
+    
+    key = file_signature(DOMAINS_JSON_PATH)
+    cache = _domains_cache
+    if cache is not None and cache['key'] == key:
+        return cache
+    
+    with _domains_cache_lock:
+        # 他スレッドが既に再読み込み済みなら何もしない
+        cache = _domains_cache
+        if cache is None or cache['key'] != key:
+            data = load_domains_data(DOMAINS_JSON_PATH)
+            body = app.json.dumps(data).encode('utf-8')
+            cache = {
+                'key': key,
+                'data': data,
+                'body': body,
+                'etag': make_etag(body),
+            }
+            _domains_cache = cache
+    return cache
+
+# APIレスポンスのLRUキャッシュ（エンドポイント + 引数ごと、最大 RESPONSE_CACHE_SIZE 件）
+# データのバージョンが変わるまで、シリアライズ済みのバイト列と ETag を再利用する
+_response_cache = OrderedDict()
+_response_cache_lock = threading.Lock()
+
+def get_db_version():
+    """データベースのバージョン（ファイルの (mtime_ns, size)）
+    
+    'memory' モードではファイルを参照せず、インメモリDBにコピーした時点のバージョンを返す
+    """
+    if app.config['DB_OPEN_MODE'] == 'memory':
+        return get_memory_db()['version']
+    return file_signature(DB_PATH)
+
+def make_etag(body):
+    """レスポンス本文のハッシュから ETag を生成"""
+    return hashlib.sha256(body).hexdigest()[:32]
+
+def conditional_json_response(body, etag, last_modified_ns, content_encoding=None, mimetype='application/json'):
+    """ETag / Last-Modified 付きのJSONレスポンスを生成（条件付きGETなら304を返す）
+    
+    content_encoding を指定した場合、body は圧縮済みとして扱う（ETag はエンコーディングごとに区別）
+    """
+    response = app.response_class(body, mimetype=mimetype)
+    if content_encoding:
+        response.headers['Content-Encoding'] = content_encoding
+        response.vary.add('Accept-Encoding')
+        etag = f'{etag}-{content_encoding}'
+    set_cache_headers(response, etag, last_modified_ns)
+    
+    # If-None-Match / If-Modified-Since に一致すれば 304 Not Modified に変換
+    return response.make_conditional(request)
+
+def set_cache_headers(response, etag, last_modified_ns):
+    """ETag / Last-Modified / Cache-Control を設定（非同期版の async_app.py と共通）"""
+    response.set_etag(etag)
+    response.last_modified = datetime.fromtimestamp(last_modified_ns / 1e9, tz=timezone.utc)
+    
+    max_age = app.config['API_CACHE_MAX_AGE']
+    if max_age > 0:
+        response.cache_control.public = True
+        response.cache_control.max_age = max_age
+    else:
+        response.cache_control.no_cache = True
+
+# ----- レスポンス圧縮 -----
+
+# サーバー側の優先順（クライアントの q 値が同じ場合）
+CONTENT_ENCODINGS = ('br', 'gzip') if brotli else ('gzip',)
+
+# 動的に圧縮する Content-Type
+COMPRESSIBLE_MIMETYPES = {'application/json', 'text/html', 'text/css', 'text/javascript', 'text/plain'}
+
+# 事前圧縮した静的ファイルの拡張子（tools/build_static_compressed.py が生成）
+PRECOMPRESSED_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+def compress_body(body, encoding, fast=False):
+    """本文を圧縮（fast=True は毎回圧縮する動的レスポンス向けの低い圧縮レベル）"""
+    if encoding == 'br':
+        return brotli.compress(body, quality=5 if fast else 11)
+    return gzip.compress(body, compresslevel=6 if fast else 9, mtime=0)
+
+def accepted_encodings():
+    """リクエストの Accept-Encoding で受け付けられる圧縮形式（q 値の高い順、同じならサーバーの優先順）"""
+    return negotiate_encodings(request.accept_encodings)
+
+def negotiate_encodings(accept_encodings):
+    """Accept-Encoding（werkzeug の Accept）から使える圧縮形式を優先順に返す"""
+    qualities = [(accept_encodings[encoding], -i, encoding) for i, encoding in enumerate(CONTENT_ENCODINGS)]
+    return [encoding for quality, _, encoding in sorted(qualities, reverse=True) if quality > 0]
+
+def negotiated_json_response(entry, last_modified_ns, mimetype='application/json'):
+    """キャッシュ済みのレスポンス（{'body', 'etag'}）を Accept-Encoding に応じて圧縮して返す
+    
+    圧縮結果は entry['encoded'] に保持するので、データのバージョンごとに1回だけ圧縮する
+    """
+    body = entry['body']
+    if len(body) < app.config['COMPRESS_MIN_SIZE']:
+        return conditional_json_response(body, entry['etag'], last_modified_ns, mimetype=mimetype)
+    
+    encodings = accepted_encodings()
+    if not encodings:
+        response = conditional_json_response(body, entry['etag'], last_modified_ns, mimetype=mimetype)
+        response.vary.add('Accept-Encoding')
+        return response
+    
+    encoding = encodings[0]
+    encoded = entry.setdefault('encoded', {})
+    compressed = encoded.get(encoding)
+    if compressed is None:
+        compressed = encoded[encoding] = compress_body(body, encoding)
+    return conditional_json_response(compressed, entry['etag'], last_modified_ns, encoding, mimetype)
+
+@app.after_request
+def compress_response(response):
+    """キャッシュしない動的レスポンス（HTML・エラー等）を Accept-Encoding に応じて圧縮"""
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers or 'Accept-Encoding' in response.vary
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+    
+    body = response.get_data()
+    if len(body) < app.config['COMPRESS_MIN_SIZE']:
+        return response
+    
+    response.vary.add('Accept-Encoding')
+    encodings = accepted_encodings()
+    if encodings:
+        response.set_data(compress_body(body, encodings[0], fast=True))
+        response.headers['Content-Encoding'] = encodings[0]
+    return response
+
+def serve_static_asset(filename):
+    """/assets 配下の静的ファイルを配信（受け付けられる事前圧縮版 .br / .gz があればそれを返す）"""
+    source = safe_join(app.static_folder, filename)
+    if source is not None:
+        try:
+            source_mtime_ns = os.stat(source).st_mtime_ns
+        except OSError:
+            source_mtime_ns = None
+        
+        for encoding in accepted_encodings() if source_mtime_ns is not None else ():
+            sibling = source + PRECOMPRESSED_SUFFIXES[encoding]
+            try:
+                # 元ファイルより古い圧縮版は使わない
+                if os.stat(sibling).st_mtime_ns < source_mtime_ns:
+                    continue
+            except OSError:
+                continue
+            response = send_file(
+                sibling,
+                mimetype=mimetypes.guess_type(source)[0] or 'application/octet-stream',
+                max_age=app.get_send_file_max_age(filename),
+            )
+            response.headers['Content-Encoding'] = encoding
+            response.vary.add('Accept-Encoding')
+            return response
+    
+    response = app.send_static_file(filename)
+    response.vary.add('Accept-Encoding')
+    return response
+
+app.view_functions['static'] = serve_static_asset
+
+def cached_response(version_func):
+    """読み取り専用エンドポイントのレスポンスをデータバージョンごとにキャッシュするデコレータ
+    
+    version_func() の戻り値 (mtime_ns, size) が変わるまで同じ本文と ETag を返す。
+    200 以外のレスポンス（404 等）はキャッシュしない。
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            version = version_func()
+            key = (f.__name__, args, tuple(sorted(kwargs.items())))
+            with _response_cache_lock:
+                entry = _response_cache.get(key)
+                if entry is not None:
+                    _response_cache.move_to_end(key)
+            
+            if entry is None or entry['version'] != version:
+                response = app.make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                body = response.get_data()
+                entry = {'version': version, 'body': body, 'etag': make_etag(body)}
+                with _response_cache_lock:
+                    _response_cache[key] = entry
+                    _response_cache.move_to_end(key)
+                    while len(_response_cache) > app.config['RESPONSE_CACHE_SIZE']:
+                        _response_cache.popitem(last=False)
+            
+            return negotiated_json_response(entry, entry['version'][0])
+        return decorated_function
+    return decorator
+
+# ----- APIスナップショット -----
+
+# tools/build_api_snapshot.py が出力した事前シリアライズ済みレスポンス
+# key: (manifest, DB, domains.json のバージョン) / entries: パス -> {body, etag, encoded} （ソース不一致時は None）
+_api_snapshot = None
+_api_snapshot_lock = threading.Lock()
+
+def sha256_file(path):
+    """ファイル内容の SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+# このファイル（クエリ・レスポンス生成コード）のハッシュ。スナップショット生成時と異なれば本文の形が変わっている可能性がある
+API_CODE_VERSION = sha256_file(Path(__file__))
+
+def load_api_snapshot(snapshot_dir):
+    """スナップショットを読み込む（生成元の DB / domains.json / app.py と内容が一致しない場合は None）"""
+    try:
+        with open(snapshot_dir / 'manifest.json', 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        
+        sources = manifest.get('sources', {})
+        if (sources.get('code') != API_CODE_VERSION
+                or sources.get('database') != sha256_file(DB_PATH)
+                or sources.get('domains') != sha256_file(DOMAINS_JSON_PATH)):
+            print(f"⚠️ APIスナップショットが古いため使用しません: {snapshot_dir}")
+            return None
+        
+        entries = {}
+        for path, entry in manifest['entries'].items():
+            entries[path] = {
+                'body': (snapshot_dir / entry['file']).read_bytes(),
+                'etag': entry['etag'],
+                # 事前圧縮版（brotli 未インストール時は br を読み込まない）
+                'encoded': {
+                    encoding: (snapshot_dir / entry[encoding]).read_bytes()
+                    for encoding in CONTENT_ENCODINGS
+                    if entry.get(encoding)
+                },
+            }
+        return entries
+    except (OSError, ValueError, KeyError) as e:
+        # 再生成中などで読み込めない場合はDBから配信する
+        print(f"Error loading API snapshot: {e}")
+        return None
+
+def get_api_snapshot():
+    """スナップショットを取得（存在しない・古い場合は None）"""
+    global _api_snapshot
+    
+    snapshot_dir = app.config['API_SNAPSHOT_DIR']
+    if not snapshot_dir:
+        return None
+    snapshot_dir = Path(snapshot_dir)
+    manifest_path = snapshot_dir / 'manifest.json'
+    if not manifest_path.exists():
+        return None
+    
+    key = (file_signature(manifest_path), get_db_version(), file_signature(DOMAINS_JSON_PATH))
+    snapshot = _api_snapshot
+    if snapshot is None or snapshot['key'] != key:
+        with _api_snapshot_lock:
+            snapshot = _api_snapshot
+            if snapshot is None or snapshot['key'] != key:
+                snapshot = {'key': key, 'entries': load_api_snapshot(snapshot_dir)}
+                _api_snapshot = snapshot
+    return snapshot if snapshot['entries'] is not None else None
+
+@app.before_request
+def serve_from_snapshot():
+    """スナップショットに含まれるGETリクエストは事前生成済みの本文をそのまま返す"""
+    if request.method != 'GET' or request.query_string or not request.path.startswith('/api/'):
+        return None
+    
+    snapshot = get_api_snapshot()
+    entry = snapshot['entries'].get(request.path) if snapshot else None
+    if entry is None:
+        return None
+    
+    # 事前圧縮版がない形式は初回に圧縮して entry に保持する
+    return negotiated_json_response(entry, snapshot['key'][0][0])
+
+# ===== クエリ =====
+# 各エンドポイントのDBアクセス部分（接続を受け取り、JSONにする前のデータを返す）
+# Flask 版のハンドラと非同期版（async_app.py）の両方から使う
+
+# 統計サマリーの項目と件数を数えるテーブル（stats テーブルの name 列 → テーブル名）
+STATISTICS_TABLES = {
+    'domains': 'domains',
+    'documents': 'documents',
+    'fields': 'input_fields',
+    'characters': 'characters',
+}
+STATISTICS_COUNT_SQL = 'SELECT ' + ', '.join(
+    f'(SELECT COUNT(*) FROM {table}) AS {name}' for name, table in STATISTICS_TABLES.items()
+)
+# COALESCE は先頭から評価するので、stats に値があればテーブルを数えない
+STATISTICS_SQL = 'SELECT ' + ', '.join(
+    f"COALESCE((SELECT value FROM stats WHERE name = '{name}'), (SELECT COUNT(*) FROM {table})) AS {name}"
+    for name, table in STATISTICS_TABLES.items()
+)
+
+def find_domain(data, domain_id):
+    """domains.json の特定のドメイン（存在しなければ None）
+    
+    /api/domains の要素と同じ形で返す（demoMetrics・documents・checklist などDBに移していない項目も含む）
+    """
+    return next((domain for domain in data.get('domains', []) if domain.get('id') == domain_id), None)
+
+def domain_exists(conn, domain_id):
+    """ドメインがDBにあるか"""
+    return conn.execute('SELECT 1 FROM domains WHERE id = ?', (domain_id,)).fetchone() is not None
+
+def query_existing_domain_documents(conn, domain_id, after=None, limit=None):
+    """query_domain_documents と同じ（ドメインがDBになければ NotFoundError）
+    
+    存在しないIDごとに空の一覧をキャッシュしないよう 404 にする。確認は結果が空のときだけ行う
+    """
+    documents = query_domain_documents(conn, domain_id, after, limit)
+    if not documents and not domain_exists(conn, domain_id):
+        raise NotFoundError('Domain not found')
+    return documents
+
+def query_domain_documents(conn, domain_id, after=None, limit=None):
+    """特定ドメインの書類一覧（カテゴリ・名前・ID順）
+    
+    入力項目は書類ごとに json_group_array で1つのJSON配列（field_order 順）に集約し、1回だけデコードする
+    after: 直前のページの最後の書類の (category, name, id)。これより後の書類を limit 件まで返す
+    """
+    where = 'd.domain_id = ?'
+    params = [domain_id]
+    if after is not None:
+        where += ' AND (COALESCE(d.category, \'\'), d.name, d.id) > (?, ?, ?)'
+        params.extend(after)
+    params.append(-1 if limit is None else limit)
+    
+    cursor = conn.execute('''
+        SELECT d.*,
+               (SELECT json_group_array(json_object(
+                           'id', f.field_id,
+                           'label', f.label,
+                           'source', f.source,
+                           'requiredIf', f.required_if
+                       ))
+                FROM (SELECT * FROM input_fields
+                      WHERE document_id = d.id ORDER BY field_order, id) f) AS input_fields_json
+        FROM documents d
+        WHERE {where}
+        ORDER BY COALESCE(d.category, ''), d.name, d.id
+        LIMIT ?
+    '''.format(where=where), params)
+    
+    documents = []
+    for row in cursor:
+        doc = dict(row)
+        doc['inputFields'] = json.loads(doc.pop('input_fields_json'))
+        documents.append(doc)
+    
+    return documents
+
+def query_characters(conn):
+    """全ペルソナ
+    
+    ペルソナ数に関わらず3クエリ（ペルソナ / 痛み点 / ドメイン関連+タスク）で取得し、
+    Python側でペルソナごとにグルーピングする
+    """
+    cursor = conn.cursor()
+    
+    # characters.json の順（差分マイグレーションでは rowid の順と一致しない）
+    cursor.execute('SELECT * FROM characters ORDER BY character_order, rowid')
+    characters = [dict(row) for row in cursor.fetchall()]
+    by_id = {}
+    for char in characters:
+        del char['character_order']
+        char['pain_points'] = []
+        char['domains'] = {}
+        by_id[char['id']] = char
+    
+    # 痛み点を一括取得
+    cursor.execute('''
+        SELECT character_id, pain_point FROM character_pain_points
+        ORDER BY character_id, point_order
+    ''')
+    for row in cursor.fetchall():
+        char = by_id.get(row['character_id'])
+        if char is not None:
+            char['pain_points'].append(row['pain_point'])
+    
+    # ドメイン関連とタスクを一括取得（タスクは task_order 順のJSON配列に集約）
+    cursor.execute('''
+        SELECT cd.character_id, cd.domain_id, cd.priority, cd.frequency,
+               cd.documents, cd.fields,
+               (SELECT json_group_array(task)
+                FROM (SELECT task FROM character_tasks
+                      WHERE character_domain_id = cd.id ORDER BY task_order, id)) AS tasks_json
+        FROM character_domains cd
+        ORDER BY cd.character_id, cd.id
+    ''')
+    for row in cursor.fetchall():
+        char = by_id.get(row['character_id'])
+        if char is not None:
+            char['domains'][row['domain_id']] = {
+                'priority': row['priority'],
+                'frequency': row['frequency'],
+                'documents': row['documents'],
+                'fields': row['fields'],
+                'tasks': json.loads(row['tasks_json'])
+            }
+    
+    return characters
+
+def query_character(conn, character_id):
+    """特定のペルソナ（存在しなければ None）
+    
+    get_characters() の各要素と同じ形（痛み点・ドメイン関連とタスク付き）を、
+    json_group_array / json_group_object で集約して1回のクエリで取得する
+    """
+    row = conn.execute('''
+        SELECT c.*,
+               (SELECT json_group_array(pain_point)
+                FROM (SELECT pain_point FROM character_pain_points
+                      WHERE character_id = c.id ORDER BY point_order)) AS pain_points_json,
+               (SELECT json_group_object(cd.domain_id, json_object(
+                           'priority', cd.priority,
+                           'frequency', cd.frequency,
+                           'documents', cd.documents,
+                           'fields', cd.fields,
+                           'tasks', json((SELECT json_group_array(task)
+                                          FROM (SELECT task FROM character_tasks
+                                                WHERE character_domain_id = cd.id ORDER BY task_order, id)))
+                       ))
+                FROM character_domains cd WHERE cd.character_id = c.id) AS domains_json
+        FROM characters c
+        WHERE c.id = ?
+    ''', (character_id,)).fetchone()
+    
+    if not row:
+        return None
+    
+    char = dict(row)
+    del char['character_order']
+    char['pain_points'] = json.loads(char.pop('pain_points_json'))
+    char['domains'] = json.loads(char.pop('domains_json'))
+    return char
+
+def query_flow_questions(conn):
+    """フロー質問
+    
+    質問と選択肢を1回のJOINで取得し、質問ごとに選択肢をまとめる
+    （question_order が同じ質問の行が交互に並ばないよう、質問IDでも並べて連続させる）
+    """
+    cursor = conn.cursor()
+    
+    cursor.execute('''
+        SELECT q.*, o.value AS option_value, o.label AS option_label
+        FROM flow_questions q
+        LEFT JOIN flow_question_options o ON q.id = o.question_id
+        ORDER BY q.question_order, q.id, o.option_order
+    ''')
+    
+    questions = []
+    question = None
+    for row in cursor.fetchall():
+        row = dict(row)
+        option_value = row.pop('option_value')
+        option_label = row.pop('option_label')
+        
+        # 新しい質問の行に切り替わった
+        if question is None or question['id'] != row['id']:
+            question = row
+            question['required'] = bool(question['required'])
+            questions.append(question)
+        
+        # 選択肢を追加（選択肢のない質問は options キーを持たない）
+        if option_value is not None:
+            question.setdefault('options', []).append({'value': option_value, 'label': option_label})
+    
+    return questions
+
+def query_statistics_summary(conn):
+    """統計サマリー（テーブルごとの件数）を1回のクエリで取得
+    
+    migrate_to_db.py が書き込む stats テーブルの集計値を優先し、ない項目だけ COUNT(*) で数える
+    """
+    try:
+        row = conn.execute(STATISTICS_SQL).fetchone()
+    except sqlite3.OperationalError:
+        # stats テーブルのない古いDB
+        row = conn.execute(STATISTICS_COUNT_SQL).fetchone()
+    return dict(row)
+
+# ===== 一覧の射影とページング =====
+# fields=id,name,emoji で要素のキーを絞り、limit / cursor でキーセット方式のページングを行う。
+# 射影・ページごとのレスポンスはシリアライズ済みのバイト列をLRUキャッシュに保持する
+
+# 書類一覧で指定できるフィールド
+DOCUMENT_FIELDS = frozenset({'id', 'domain_id', 'name', 'description', 'category', 'created_at', 'inputFields'})
+
+# home.html の一覧表示が使う射影（assets/js/home.js と合わせる。preload_caches で事前生成）
+HOME_DOMAINS_PATH = '/api/domains?fields=id,name,emoji,intro,description,demoMetrics'
+
+# key: (エンドポイント名, 引数, 正規化したパラメータ) / value: {'version', 'body', 'etag'}
+_projection_cache = OrderedDict()
+_projection_cache_lock = threading.Lock()
+
+class QueryParamError(ValueError):
+    """クエリパラメータが不正（400 を返す）"""
+
+class NotFoundError(LookupError):
+    """対象が存在しない（404 を返す）"""
+
+def parse_number(name, value, minimum=None, maximum=None):
+    """クエリパラメータを数値に変換し、範囲を検証"""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise QueryParamError(f'{name} must be a number')
+    if number != number or number in (float('inf'), float('-inf')):
+        raise QueryParamError(f'{name} must be a finite number')
+    if minimum is not None and number < minimum:
+        raise QueryParamError(f'{name} must be >= {minimum}')
+    if maximum is not None and number > maximum:
+        raise QueryParamError(f'{name} must be <= {maximum}')
+    return number
+
+def encode_cursor(values):
+    """ページの最後の要素のキーを不透明なカーソル文字列にする"""
+    raw = json.dumps(values, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor, length):
+    """カーソル文字列をキーのタプルに戻す（不正な場合は QueryParamError）"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw.decode('utf-8'))
+    except (ValueError, UnicodeDecodeError):
+        raise QueryParamError('Invalid cursor')
+    if not isinstance(values, list) or len(values) != length or not all(isinstance(v, str) for v in values):
+        raise QueryParamError('Invalid cursor')
+    return tuple(values)
+
+def parse_list_params(args, allowed_fields, cursor_length):
+    """fields / limit / cursor を正規化し、キャッシュキーとして使えるタプルにする
+    
+    fields=name,emoji&limit=10 → (('emoji', 'id', 'name'), None, 10)（id は常に含める）
+    limit / cursor のどちらもなければページングしない（limit は None）
+    """
+    unknown = set(args) - {'fields', 'limit', 'cursor'}
+    if unknown:
+        raise QueryParamError(f'Unknown parameter: {sorted(unknown)[0]}')
+    
+    fields = None
+    if 'fields' in args:
+        names = {name.strip() for name in args['fields'].split(',') if name.strip()}
+        unknown = names - allowed_fields
+        if unknown:
+            raise QueryParamError(f'Unknown field: {sorted(unknown)[0]}')
+        fields = tuple(sorted(names | {'id'}))
+    
+    limit = parse_limit(args) if 'limit' in args or 'cursor' in args else None
+    after = decode_cursor(args['cursor'], cursor_length) if 'cursor' in args else None
+    return fields, after, limit
+
+def parse_limit(args):
+    """limit パラメータ（未指定なら API_PAGE_SIZE）"""
+    limit = parse_number('limit', args.get('limit', app.config['API_PAGE_SIZE']),
+                         minimum=1, maximum=app.config['API_PAGE_SIZE_MAX'])
+    if limit != int(limit):
+        raise QueryParamError('limit must be an integer')
+    return int(limit)
+
+def project_items(items, fields):
+    """各要素を fields のキーだけに絞る（fields が None なら元の要素のまま）"""
+    if fields is None:
+        return items
+    return [{key: item[key] for key in fields if key in item} for item in items]
+
+def domains_page(data, fields, after, limit):
+    """domains.json の射影・ページ（ページング時は nextCursor を付ける）"""
+    domains = data.get('domains', [])
+    start = 0
+    if after is not None:
+        ids = [domain.get('id') for domain in domains]
+        if after[0] not in ids:
+            raise QueryParamError('Invalid cursor')
+        start = ids.index(after[0]) + 1
+    page = domains[start:] if limit is None else domains[start:start + limit]
+    
+    result = {key: value for key, value in data.items() if key != 'domains'}
+    result['domains'] = project_items(page, fields)
+    if limit is not None:
+        has_more = start + limit < len(domains)
+        result['nextCursor'] = encode_cursor([page[-1].get('id')]) if has_more and page else None
+    return result
+
+def documents_page(conn, domain_id, fields, after, limit):
+    """書類一覧の射影・ページ（ページング時は {'documents', 'nextCursor'}、それ以外は配列）"""
+    documents = query_existing_domain_documents(conn, domain_id, after, None if limit is None else limit + 1)
+    if limit is None:
+        return project_items(documents, fields)
+    
+    has_more = len(documents) > limit
+    documents = documents[:limit]
+    last = documents[-1] if has_more else None
+    return {
+        'documents': project_items(documents, fields),
+        'nextCursor': encode_cursor([last['category'] or '', last['name'], last['id']]) if last else None,
+    }
+
+def get_projection_entry(key, version, compute):
+    """射影・ページのレスポンスをLRUキャッシュから取得、なければ compute() で生成して追加
+    
+    エントリごとにデータのバージョンを持ち、バージョンが変わっていれば作り直す
+    """
+    with _projection_cache_lock:
+        entry = _projection_cache.get(key)
+        if entry is not None and entry['version'] == version:
+            _projection_cache.move_to_end(key)
+            return entry
+    
+    body = app.json.dumps(compute()).encode('utf-8')
+    entry = {'version': version, 'body': body, 'etag': make_etag(body)}
+    
+    with _projection_cache_lock:
+        _projection_cache[key] = entry
+        _projection_cache.move_to_end(key)
+        while len(_projection_cache) > app.config['PROJECTION_CACHE_SIZE']:
+            _projection_cache.popitem(last=False)
+    return entry
+
 # ===== API エンドポイント =====
 
 @app.route('/favicon.ico', methods=['GET'])
@@ -51,267 +1019,756 @@ def favicon():
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """ヘルスチェック"""
-    return jsonify({'status': 'ok', 'message': 'DX-AI Model API is running'})
+    return jsonify({
+        'status': 'ok',
+        'message': 'DX-AI Model API is running',
+        'dbPool': db_pool.stats()
+    })
 
 # ----- Domains API -----
 
 @app.route('/api/domains', methods=['GET'])
 @handle_errors
 def get_domains():
-    """全ドメインを取得 - JSONファイルを優先"""
-    import json
-    from pathlib import Path
-    
-    # JSONファイルから直接読み込み（最新のデータを常に返す）
-    json_path = Path(__file__).parent.parent / 'assets' / 'data' / 'domains.json'
-    with open(json_path, 'r', encoding='utf-8') as f:
-        json_data = json.load(f)
-    
-    # メタ情報をマージ（既存の demoMetaInfo は保持、costPerHour のみ追加）
-    if 'meta' not in json_data:
-        json_data['meta'] = {}
-    if 'demoMetaInfo' not in json_data['meta']:
-        json_data['meta']['demoMetaInfo'] = {}
+    """全ドメインを取得 - JSONファイルを優先
     
-    # costPerHour を追加（既存値は保持）
-    if 'costPerHour' not in json_data['meta']['demoMetaInfo']:
-        json_data['meta']['demoMetaInfo']['costPerHour'] = 3000
+    fields（要素のキー）/ limit / cursor を指定した場合は射影・ページングした結果を返す
+    """
+    # JSONファイルから読み込み（ファイル更新時のみ再パース、それ以外はキャッシュ済みバイト列を返す）
+    cache = get_domains_cache()
+    if not request.args:
+        return negotiated_json_response(cache, cache['key'][0])
     
-    return jsonify(json_data)
+    data = cache['data']
+    try:
+        allowed_fields = frozenset().union(*(domain.keys() for domain in data.get('domains', [])))
+        params = parse_list_params(request.args, allowed_fields, 1)
+        entry = get_projection_entry(('domains', (), params), cache['key'], lambda: domains_page(data, *params))
+    except QueryParamError as e:
+        return jsonify({'error': str(e)}), 400
+    return negotiated_json_response(entry, cache['key'][0])
 
 @app.route('/api/domains/<domain_id>', methods=['GET'])
 @handle_errors
 def get_domain(domain_id):
-    """特定のドメインを取得"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    cursor.execute('SELECT * FROM domains WHERE id = ?', (domain_id,))
-    row = cursor.fetchone()
-    
-    if not row:
-        conn.close()
+    """特定のドメインを取得 - /api/domains の要素と同じ（JSONファイルから）"""
+    cache = get_domains_cache()
+    domain = find_domain(cache['data'], domain_id)
+    if domain is None:
         return jsonify({'error': 'Domain not found'}), 404
-    
-    domain = dict(row)
-    
-    # デモメトリクスと依存関係を取得（get_domains()と同じロジック）
-    # ... (省略、必要に応じて実装)
-    
-    conn.close()
-    return jsonify(domain)
+    entry = get_projection_entry(('domain', (domain_id,), ()), cache['key'], lambda: domain)
+    return negotiated_json_response(entry, cache['key'][0])
 
 @app.route('/api/domains/<domain_id>/documents', methods=['GET'])
 @handle_errors
 def get_domain_documents(domain_id):
-    """特定ドメインの書類一覧を取得"""
-    conn = get_db()
-    cursor = conn.cursor()
+    """特定ドメインの書類一覧を取得
     
-    cursor.execute('''
-        SELECT d.*, 
-               GROUP_CONCAT(
-                   json_object(
-                       'id', f.field_id,
-                       'label', f.label,
-                       'source', f.source,
-                       'requiredIf', f.required_if
-                   ), '||'
-               ) as input_fields_json
-        FROM documents d
-        LEFT JOIN input_fields f ON d.id = f.document_id
-        WHERE d.domain_id = ?
-        GROUP BY d.id
-        ORDER BY d.category, d.name
-    ''', (domain_id,))
+    fields / limit / cursor を指定した場合は射影・ページングした結果を返す
+    """
+    if not request.args:
+        return get_all_domain_documents(domain_id)
     
-    documents = []
-    for row in cursor.fetchall():
-        doc = dict(row)
-        
-        # 入力項目をパース
-        if doc['input_fields_json']:
-            import json
-            fields_str = doc['input_fields_json']
-            doc['inputFields'] = [json.loads(f) for f in fields_str.split('||')]
-        else:
-            doc['inputFields'] = []
-        
-        del doc['input_fields_json']
-        documents.append(doc)
+    try:
+        params = parse_list_params(request.args, DOCUMENT_FIELDS, 3)
+    except QueryParamError as e:
+        return jsonify({'error': str(e)}), 400
     
-    conn.close()
-    return jsonify(documents)
+    version = get_db_version()
+    try:
+        entry = get_projection_entry(
+            ('documents', (domain_id,), params), version, lambda: documents_page(get_db(), domain_id, *params)
+        )
+    except NotFoundError as e:
+        return jsonify({'error': str(e)}), 404
+    return negotiated_json_response(entry, version[0])
+
+@cached_response(get_db_version)
+def get_all_domain_documents(domain_id):
+    """特定ドメインの書類一覧（パラメータなし、データバージョンごとにキャッシュ）"""
+    try:
+        return jsonify(query_existing_domain_documents(get_db(), domain_id))
+    except NotFoundError as e:
+        return jsonify({'error': str(e)}), 404
 
 # ----- Characters API -----
 
 @app.route('/api/characters', methods=['GET'])
 @handle_errors
+@cached_response(get_db_version)
 def get_characters():
     """全ペルソナを取得"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    cursor.execute('SELECT * FROM characters')
-    characters = [dict(row) for row in cursor.fetchall()]
-    
-    for char in characters:
-        char_id = char['id']
-        
-        # 痛み点を取得
-        cursor.execute('''
-            SELECT pain_point FROM character_pain_points
-            WHERE character_id = ?
-            ORDER BY point_order
-        ''', (char_id,))
-        char['pain_points'] = [row['pain_point'] for row in cursor.fetchall()]
-        
-        # ドメイン関連を取得
-        cursor.execute('''
-            SELECT cd.domain_id, cd.priority, cd.frequency, cd.documents, cd.fields,
-                   GROUP_CONCAT(ct.task, '||') as tasks
-            FROM character_domains cd
-            LEFT JOIN character_tasks ct ON cd.id = ct.character_domain_id
-            WHERE cd.character_id = ?
-            GROUP BY cd.id
-        ''', (char_id,))
-        
-        domains = {}
-        for row in cursor.fetchall():
-            domain_id = row['domain_id']
-            domains[domain_id] = {
-                'priority': row['priority'],
-                'frequency': row['frequency'],
-                'documents': row['documents'],
-                'fields': row['fields'],
-                'tasks': row['tasks'].split('||') if row['tasks'] else []
-            }
-        
-        char['domains'] = domains
-    
-    conn.close()
-    return jsonify({'characters': characters})
+    return jsonify({'characters': query_characters(get_db())})
 
 @app.route('/api/characters/<character_id>', methods=['GET'])
 @handle_errors
+@cached_response(get_db_version)
 def get_character(character_id):
     """特定のペルソナを取得"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    cursor.execute('SELECT * FROM characters WHERE id = ?', (character_id,))
-    row = cursor.fetchone()
-    
-    if not row:
-        conn.close()
+    char = query_character(get_db(), character_id)
+    if char is None:
         return jsonify({'error': 'Character not found'}), 404
-    
-    char = dict(row)
-    
-    # 痛み点とドメイン関連を取得（get_characters()と同じロジック）
-    # ... (省略)
-    
-    conn.close()
     return jsonify(char)
 
 # ----- Flows API -----
 
 @app.route('/api/flows/questions', methods=['GET'])
 @handle_errors
+@cached_response(get_db_version)
 def get_flow_questions():
     """フロー質問を取得"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        SELECT * FROM flow_questions
-        ORDER BY question_order
-    ''')
-    
-    questions = []
-    for row in cursor.fetchall():
-        question = dict(row)
-        question['required'] = bool(question['required'])
-        
-        # 選択肢を取得
-        cursor.execute('''
-            SELECT value, label FROM flow_question_options
-            WHERE question_id = ?
-            ORDER BY option_order
-        ''', (question['id'],))
-        
-        options = [{'value': r['value'], 'label': r['label']} for r in cursor.fetchall()]
-        if options:
-            question['options'] = options
-        
-        questions.append(question)
-    
-    conn.close()
-    return jsonify({'baseQuestions': questions})
+    return jsonify({'baseQuestions': query_flow_questions(get_db())})
 
 # ----- Statistics API -----
 
 @app.route('/api/statistics/summary', methods=['GET'])
 @handle_errors
+@cached_response(get_db_version)
 def get_statistics_summary():
     """統計サマリーを取得"""
-    conn = get_db()
-    cursor = conn.cursor()
+    return jsonify(query_statistics_summary(get_db()))
+
+# ----- Search API -----
+
+SEARCH_KINDS = ('document', 'field', 'task', 'painPoint')
+
+# 検索語の上限（文字数・語数）
+SEARCH_MAX_QUERY_LENGTH = 100
+SEARCH_MAX_TERMS = 8
+
+# trigram トークナイザで MATCH できる最短の語の長さ（これより短い語は LIKE で絞り込む）
+TRIGRAM_MIN_LENGTH = 3
+
+# bm25 の列ごとの重み（title, body）
+SEARCH_COLUMN_WEIGHTS = (10.0, 1.0)
+
+def parse_search_params(args):
+    """q / kind / limit / cursor を正規化し、キャッシュキーとして使えるタプルにする
     
-    # ドメイン数
-    cursor.execute('SELECT COUNT(*) as count FROM domains')
-    domain_count = cursor.fetchone()['count']
+    q=住所 マイナンバー&kind=field&limit=10 → (('住所', 'マイナンバー'), ('field',), 0, 10)
+    """
+    unknown = set(args) - {'q', 'kind', 'limit', 'cursor'}
+    if unknown:
+        raise QueryParamError(f'Unknown parameter: {sorted(unknown)[0]}')
     
-    # 書類数
-    cursor.execute('SELECT COUNT(*) as count FROM documents')
-    document_count = cursor.fetchone()['count']
+    query = args.get('q', '').strip()
+    if not query:
+        raise QueryParamError('q is required')
+    if len(query) > SEARCH_MAX_QUERY_LENGTH:
+        raise QueryParamError(f'q must be at most {SEARCH_MAX_QUERY_LENGTH} characters')
+    terms = tuple(dict.fromkeys(query.split()))
+    if len(terms) > SEARCH_MAX_TERMS:
+        raise QueryParamError(f'q must have at most {SEARCH_MAX_TERMS} terms')
     
-    # 入力項目数
-    cursor.execute('SELECT COUNT(*) as count FROM input_fields')
-    field_count = cursor.fetchone()['count']
+    kinds = ()
+    if 'kind' in args:
+        kinds = tuple(sorted({kind.strip() for kind in args['kind'].split(',') if kind.strip()}))
+        unknown = set(kinds) - set(SEARCH_KINDS)
+        if unknown:
+            raise QueryParamError(f"kind must be one of {', '.join(SEARCH_KINDS)}")
     
-    # ペルソナ数
-    cursor.execute('SELECT COUNT(*) as count FROM characters')
-    character_count = cursor.fetchone()['count']
+    offset = 0
+    if 'cursor' in args:
+        value, = decode_cursor(args['cursor'], 1)
+        if not value.isdigit():
+            raise QueryParamError('Invalid cursor')
+        offset = int(value)
     
-    conn.close()
+    return terms, kinds, offset, parse_limit(args)
+
+def escape_like(term):
+    """LIKE パターン用に % _ \\ をエスケープ"""
+    return re.sub(r'([%_\\])', r'\\\1', term)
+
+def highlight_terms(text, terms):
+    """text の検索語に一致する部分を <mark> で囲み、それ以外とともに HTMLエスケープする（大文字小文字は区別しない）
     
-    return jsonify({
-        'domains': domain_count,
-        'documents': document_count,
-        'fields': field_count,
-        'characters': character_count
-    })
+    一致箇所はエスケープ前のテキストで探す（&amp; などの実体参照の中を囲まないように）
+    """
+    pattern = '|'.join(re.escape(term) for term in sorted(terms, key=len, reverse=True))
+    parts, end = [], 0
+    for match in re.finditer(pattern, text, flags=re.IGNORECASE):
+        parts.append(html.escape(text[end:match.start()]))
+        parts.append(f'<mark>{html.escape(match.group(0))}</mark>')
+        end = match.end()
+    parts.append(html.escape(text[end:]))
+    return ''.join(parts)
+
+def query_search(conn, terms, kinds, offset, limit):
+    """search_index を検索し、関連度順の行を返す
+    
+    3文字以上の語は FTS5 の MATCH（bm25 で順位付け）、それより短い語は LIKE で絞り込む。
+    短い語だけの場合は一致したテキストが短い順に並べる
+    """
+    long_terms = [term for term in terms if len(term) >= TRIGRAM_MIN_LENGTH]
+    conditions, params = [], []
+    if long_terms:
+        conditions.append('search_index MATCH ?')
+        params.append(' AND '.join('"{}"'.format(term.replace('"', '""')) for term in long_terms))
+    for term in terms:
+        if len(term) < TRIGRAM_MIN_LENGTH:
+            conditions.append("(title LIKE ? ESCAPE '\\' OR body LIKE ? ESCAPE '\\')")
+            pattern = f'%{escape_like(term)}%'
+            params.extend([pattern, pattern])
+    if kinds:
+        conditions.append(f"kind IN ({', '.join('?' * len(kinds))})")
+        params.extend(kinds)
+    
+    if long_terms:
+        order = 'bm25(search_index, {}, {})'.format(*SEARCH_COLUMN_WEIGHTS)
+    else:
+        order = 'length(title) + length(body)'
+    params.extend([limit, offset])
+    
+    return conn.execute(f'''
+        SELECT kind, domain_id, document_id, field_id, character_id, title, body
+        FROM search_index
+        WHERE {' AND '.join(conditions)}
+        ORDER BY {order}, rowid
+        LIMIT ? OFFSET ?
+    ''', params).fetchall()
+
+def search_page(conn, terms, kinds, offset, limit):
+    """検索結果の1ページ（強調表示付き、続きがあれば nextCursor）"""
+    rows = query_search(conn, terms, kinds, offset, limit + 1)
+    results = []
+    for row in rows[:limit]:
+        result = {'kind': row['kind'], 'title': highlight_terms(row['title'], terms)}
+        if row['body']:
+            result['body'] = highlight_terms(row['body'], terms)
+        for column, key in (('domain_id', 'domainId'), ('document_id', 'documentId'),
+                            ('field_id', 'fieldId'), ('character_id', 'characterId')):
+            if row[column] is not None:
+                result[key] = row[column]
+        results.append(result)
+    
+    has_more = len(rows) > limit
+    return {
+        'query': ' '.join(terms),
+        'results': results,
+        'nextCursor': encode_cursor([str(offset + limit)]) if has_more else None,
+    }
+
+@app.route('/api/search', methods=['GET'])
+@handle_errors
+def search():
+    """書類・入力項目・タスク・痛み点を全文検索
+    
+    q（空白区切りの全ての語を含むものを検索）、kind（document / field / task / painPoint）、limit / cursor
+    """
+    try:
+        params = parse_search_params(request.args)
+    except QueryParamError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    version = get_db_version()
+    try:
+        entry = get_projection_entry(('search', (), params), version, lambda: search_page(get_db(), *params))
+    except sqlite3.OperationalError as e:
+        if 'no such table' not in str(e):
+            raise
+        return jsonify({'error': 'Search index is not available. Run migrate_to_db.py'}), 503
+    return negotiated_json_response(entry, version[0])
+
+# ----- Fields API -----
+
+# 入力項目の転置インデックス（field_keys / field_postings）をビット集合にしたもの（DBのバージョンごと）
+# 書類に連番を振り、入力項目の集合・書類の集合をそれぞれ連番のビットを立てた int で表す
+# documents: 書類ID → 書類の連番 / document_fields: 書類の連番順の入力項目のビット集合
+# fields: 入力項目の連番順のリスト [{'id', 'label', 'documents': 書類のビット集合, 'sources': {source: 書類のビット集合}}]
+# domains: ドメインID → 書類のビット集合
+# 更新時は辞書ごと差し替えるため、読み取り側はロック不要
+_field_index = None
+_field_index_lock = threading.Lock()
+
+def build_field_index(conn):
+    """domains / documents / field_keys / field_postings を読み込み、ビット集合の索引を組み立てる
+    
+    書類のないドメイン・入力項目のない書類も含む（選択すると空の集合になる）
+    """
+    documents, document_fields = {}, []
+    domains = {row['id']: [] for row in conn.execute('SELECT id FROM domains')}
+    for row in conn.execute('SELECT id, domain_id FROM documents ORDER BY id'):
+        documents[row['id']] = len(document_fields)
+        document_fields.append([])
+        domains[row['domain_id']].append(documents[row['id']])
+    
+    fields = [
+        {'id': row['field_id'], 'label': row['label'], 'documents': [], 'sources': {}}
+        for row in conn.execute('SELECT id, field_id, label FROM field_keys ORDER BY id')
+    ]
+    for row in conn.execute('''
+        SELECT field_key, document_id, source
+        FROM field_postings
+        ORDER BY field_key, document_id
+    '''):
+        position = documents[row['document_id']]
+        field = fields[row['field_key']]
+        document_fields[position].append(row['field_key'])
+        field['documents'].append(position)
+        field['sources'].setdefault(row['source'], []).append(position)
+    
+    # 連番のリストはまとめてビット集合に変換する（1ビットずつ論理和を取ると大きな int を作り直し続ける）
+    for field in fields:
+        field['documents'] = bits_from_positions(field['documents'])
+        field['sources'] = {source: bits_from_positions(positions) for source, positions in field['sources'].items()}
+    return {
+        'documents': documents,
+        'document_fields': [bits_from_positions(keys) for keys in document_fields],
+        'fields': fields,
+        'domains': {domain_id: bits_from_positions(positions) for domain_id, positions in domains.items()},
+    }
+
+def bits_from_positions(positions):
+    """ビット位置のリストからビット集合（int）を作る"""
+    if not positions:
+        return 0
+    bitmap = bytearray(max(positions) // 8 + 1)
+    for position in positions:
+        bitmap[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(bitmap, 'little')
+
+def iter_bits(bits):
+    """ビット集合の立っているビット位置を小さい順に返す"""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+def get_field_index(version, build):
+    """ビット集合の索引を取得（DBのバージョンが変わった場合のみ build() で作り直す）"""
+    global _field_index
+    
+    index = _field_index
+    if index is not None and index['version'] == version:
+        return index
+    
+    with _field_index_lock:
+        index = _field_index
+        if index is None or index['version'] != version:
+            index = {'version': version, **build()}
+            _field_index = index
+    return index
+
+def parse_id_list(args, name):
+    """カンマ区切りのID（b,a,b → ('a', 'b')。順序違い・重複を同じキャッシュキーにするため整列する）"""
+    return tuple(sorted({item.strip() for item in args.get(name, '').split(',') if item.strip()}))
+
+def parse_field_union_params(args, index):
+    """documents / domains を検証し、(書類ID, ドメインID) のタプルにする"""
+    unknown = set(args) - {'documents', 'domains'}
+    if unknown:
+        raise QueryParamError(f'Unknown parameter: {sorted(unknown)[0]}')
+    
+    document_ids, domain_ids = parse_id_list(args, 'documents'), parse_id_list(args, 'domains')
+    if not document_ids and not domain_ids:
+        raise QueryParamError('documents or domains is required')
+    for document_id in document_ids:
+        if document_id not in index['documents']:
+            raise QueryParamError(f'Unknown document: {document_id}')
+    for domain_id in domain_ids:
+        if domain_id not in index['domains']:
+            raise QueryParamError(f'Unknown domain: {domain_id}')
+    return document_ids, domain_ids
+
+def field_union(index, document_ids, domain_ids):
+    """選択した書類の入力項目の和集合と、重複項目の自動入力で省ける入力数
+    
+    書類の集合・入力項目の集合はいずれもビット集合（int）のまま論理和・論理積で計算する
+    """
+    selected = 0
+    for domain_id in domain_ids:
+        selected |= index['domains'][domain_id]
+    for document_id in document_ids:
+        selected |= 1 << index['documents'][document_id]
+    
+    union, total = 0, 0
+    for position in iter_bits(selected):
+        union |= index['document_fields'][position]
+        total += index['document_fields'][position].bit_count()
+    
+    fields = []
+    for key in iter_bits(union):
+        field = index['fields'][key]
+        fields.append({
+            'id': field['id'],
+            'label': field['label'],
+            'sources': sorted(source for source, bits in field['sources'].items() if bits & selected),
+            'documents': (field['documents'] & selected).bit_count(),
+        })
+    fields.sort(key=lambda field: (-field['documents'], field['id']))
+    
+    duplicates = total - len(fields)
+    return {
+        'documents': selected.bit_count(),
+        'totalFields': total,
+        'uniqueFields': len(fields),
+        'duplicateFields': duplicates,
+        'keystrokesSaved': duplicates * app.config['KEYSTROKES_PER_FIELD'],
+        'fields': fields,
+    }
+
+def query_field_documents(conn, field_id):
+    """転置インデックスから入力項目を使う書類・ドメインを1クエリで取得（存在しなければ None）"""
+    row = conn.execute('''
+        SELECT k.field_id, k.label, k.document_count, k.domain_count,
+               (SELECT json_group_array(json_object('id', document_id, 'domainId', domain_id, 'source', source))
+                FROM (SELECT * FROM field_postings WHERE field_key = k.id ORDER BY domain_id, document_id)
+               ) AS documents_json
+        FROM field_keys k
+        WHERE k.field_id = ?
+    ''', (field_id,)).fetchone()
+    if row is None:
+        return None
+    
+    documents = json.loads(row['documents_json'])
+    return {
+        'id': row['field_id'],
+        'label': row['label'],
+        'documentCount': row['document_count'],
+        'domainCount': row['domain_count'],
+        'domains': list(dict.fromkeys(document['domainId'] for document in documents)),
+        'documents': documents,
+    }
+
+@app.route('/api/fields/union', methods=['GET'])
+@handle_errors
+def get_field_union():
+    """選択した書類（documents）・ドメインの全書類（domains）の入力項目の和集合と、省ける入力数
+    
+    fields は使う書類数の多い順。duplicateFields = totalFields - uniqueFields（同じ項目の2回目以降の入力）
+    """
+    version = get_db_version()
+    try:
+        index = get_field_index(version, lambda: build_field_index(get_db()))
+    except sqlite3.OperationalError as e:
+        if 'no such table' not in str(e):
+            raise
+        return jsonify({'error': 'Field index is not available. Run migrate_to_db.py'}), 503
+    
+    try:
+        params = parse_field_union_params(request.args, index)
+    except QueryParamError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    entry = get_projection_entry(('fieldUnion', (), params), version, lambda: field_union(index, *params))
+    return negotiated_json_response(entry, version[0])
+
+@app.route('/api/fields/<field_id>/documents', methods=['GET'])
+@handle_errors
+def get_field_documents(field_id):
+    """入力項目を使う書類・ドメインを取得"""
+    try:
+        return get_field_documents_cached(field_id)
+    except sqlite3.OperationalError as e:
+        if 'no such table' not in str(e):
+            raise
+        return jsonify({'error': 'Field index is not available. Run migrate_to_db.py'}), 503
+
+@cached_response(get_db_version)
+def get_field_documents_cached(field_id):
+    """入力項目を使う書類・ドメイン（データバージョンごとにキャッシュ）"""
+    field = query_field_documents(get_db(), field_id)
+    if field is None:
+        return jsonify({'error': 'Field not found'}), 404
+    return jsonify(field)
+
+# ----- Analysis API -----
+
+ANALYSIS_MODES = ('plain', 'smart', 'ai')
+
+# ドメイン別に上書きできる項目: クエリパラメータ名 -> (demoMetrics のキー, モード別の値か, 最小値, 最大値)
+ANALYSIS_DOMAIN_OVERRIDES = {
+    'dailyVolume': ('dailyVolume', False, 0, None),
+    'averageTimePerCase': ('averageTimePerCase', False, 0, None),
+    'reductionRate': ('reductionRates', True, 0, 1),
+    'timeReductionRate': ('timeReductionRates', True, 0, 1),
+    'costReductionRate': ('costReductionPercentage', True, 0, 1),
+}
+
+# 計算結果のLRUキャッシュ（domains.json のバージョンが変わったら破棄）
+# key: (エンドポイント名, 正規化したパラメータ) / value: {'body', 'etag'}
+_analysis_cache = {'version': None, 'entries': OrderedDict(), 'hits': 0, 'misses': 0}
+_analysis_cache_lock = threading.Lock()
+
+def normalize_analysis_params(args, domain_ids, default_mode):
+    """クエリパラメータを正規化し、キャッシュキーとして使えるタプルにする
+    
+    mode=smart&costPerHour=4000&dailyVolume.medical=3000&reductionRate.medical=0.5
+    → ('smart', 4000.0, (('dailyVolume', 'medical', 3000.0), ('reductionRate', 'medical', 0.5)))
+    """
+    mode = args.get('mode', default_mode)
+    if mode not in ANALYSIS_MODES:
+        raise QueryParamError(f"mode must be one of {', '.join(ANALYSIS_MODES)}")
+    
+    cost_per_hour = None
+    if 'costPerHour' in args:
+        cost_per_hour = parse_number('costPerHour', args['costPerHour'], minimum=0)
+    
+    overrides = []
+    for name, value in args.items():
+        if name in ('mode', 'costPerHour'):
+            continue
+        field, _, domain_id = name.partition('.')
+        if field not in ANALYSIS_DOMAIN_OVERRIDES or not domain_id:
+            raise QueryParamError(f'Unknown parameter: {name}')
+        if domain_id not in domain_ids:
+            raise QueryParamError(f'Unknown domain: {domain_id}')
+        _, _, minimum, maximum = ANALYSIS_DOMAIN_OVERRIDES[field]
+        overrides.append((field, domain_id, parse_number(name, value, minimum, maximum)))
+    
+    return mode, cost_per_hour, tuple(sorted(overrides))
+
+def compute_analysis(data, mode, cost_per_hour, overrides):
+    """上書きを適用した domains / meta で compute_metrics_for_mode を実行"""
+    meta = data.get('meta', {})
+    if cost_per_hour is not None:
+        meta = {**meta, 'demoMetaInfo': {**meta.get('demoMetaInfo', {}), 'costPerHour': cost_per_hour}}
+    
+    # 上書きのあるドメインだけ demoMetrics をコピーする
+    domains = list(data.get('domains', []))
+    index_by_id = {domain.get('id'): i for i, domain in enumerate(domains)}
+    for field, domain_id, value in overrides:
+        i = index_by_id[domain_id]
+        domain = domains[i]
+        if domain is data['domains'][i]:
+            domain = domains[i] = {**domain, 'demoMetrics': dict(domain.get('demoMetrics') or {})}
+        
+        key, per_mode, _, _ = ANALYSIS_DOMAIN_OVERRIDES[field]
+        if per_mode:
+            domain['demoMetrics'][key] = {**domain['demoMetrics'].get(key, {}), mode: value}
+        else:
+            domain['demoMetrics'][key] = value
+    
+    return compute_metrics_for_mode(mode, domains, meta)
+
+def get_analysis_entry(domains_cache, key, compute):
+    """計算結果（シリアライズ済み）をLRUキャッシュから取得、なければ compute() で計算して追加"""
+    with _analysis_cache_lock:
+        if _analysis_cache['version'] != domains_cache['key']:
+            _analysis_cache['version'] = domains_cache['key']
+            _analysis_cache['entries'].clear()
+        entries = _analysis_cache['entries']
+        entry = entries.get(key)
+        if entry is not None:
+            entries.move_to_end(key)
+            _analysis_cache['hits'] += 1
+            return entry
+        _analysis_cache['misses'] += 1
+    
+    body = app.json.dumps(compute()).encode('utf-8')
+    entry = {'body': body, 'etag': make_etag(body)}
+    
+    with _analysis_cache_lock:
+        # 計算中に domains.json が更新された場合は古い結果を格納しない
+        if _analysis_cache['version'] == domains_cache['key']:
+            entries = _analysis_cache['entries']
+            entries[key] = entry
+            while len(entries) > app.config['ANALYSIS_CACHE_SIZE']:
+                entries.popitem(last=False)
+    return entry
+
+@app.route('/api/analysis', methods=['GET'])
+@handle_errors
+def get_analysis():
+    """デモ分析（what-if シナリオ）を計算
+    
+    mode と上書きパラメータ（costPerHour、ドメイン別の dailyVolume / 各削減率）を受け取り、
+    compute_metrics_for_mode と同じ形の結果を返す
+    """
+    domains_cache = get_domains_cache()
+    data = domains_cache['data']
+    domain_ids = {domain.get('id') for domain in data.get('domains', [])}
+    default_mode = data.get('meta', {}).get('defaultMode', 'plain')
+    
+    try:
+        params = normalize_analysis_params(request.args, domain_ids, default_mode)
+    except QueryParamError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    entry = get_analysis_entry(
+        domains_cache, ('analysis', params), lambda: compute_analysis(data, *params)
+    )
+    return negotiated_json_response(entry, domains_cache['key'][0])
+
+@app.route('/api/analysis/optimize', methods=['GET'])
+@handle_errors
+def get_optimized_modes():
+    """予算内で削減効果が最大になるドメイン別モードの組み合わせを探す
+    
+    budget（必須）、objective（cost / time）、maintenanceYears（予算に含める運用保守費の年数）
+    """
+    domains_cache = get_domains_cache()
+    data = domains_cache['data']
+    
+    try:
+        unknown = set(request.args) - {'budget', 'objective', 'maintenanceYears'}
+        if unknown:
+            raise QueryParamError(f'Unknown parameter: {sorted(unknown)[0]}')
+        if 'budget' not in request.args:
+            raise QueryParamError('budget is required')
+        budget = parse_number('budget', request.args['budget'], minimum=0)
+        objective = request.args.get('objective', 'cost')
+        if objective not in OBJECTIVES:
+            raise QueryParamError(f"objective must be one of {', '.join(OBJECTIVES)}")
+        maintenance_years = parse_number('maintenanceYears', request.args.get('maintenanceYears', 0), minimum=0)
+    except QueryParamError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    params = (budget, objective, maintenance_years)
+    
+    def compute():
+        result = optimize_modes(data.get('domains', []), data.get('meta', {}), *params)
+        if result is None:
+            raise QueryParamError('No mode combination fits within the budget')
+        return result
+    
+    try:
+        entry = get_analysis_entry(domains_cache, ('optimize', params), compute)
+    except QueryParamError as e:
+        return jsonify({'error': str(e)}), 400
+    return negotiated_json_response(entry, domains_cache['key'][0])
 
 # ===== フロントエンド配信 =====
 
+FRONTEND_DIR = Path(__file__).parent.parent
+
+# トップレベルのHTMLページのキャッシュ
+# key: ファイル名 / value: {key: (mtime_ns, size), path, body, etag, encoded}
+_page_cache = {}
+
+def get_page_entry(filename):
+    """HTMLページのキャッシュエントリを取得（ファイルがなければ None）
+    
+    ファイルの (mtime_ns, size) が変わった時だけ読み直す。
+    PAGE_CACHE_MAX_FILE_SIZE を超えるファイルは body を持たない（send_file で配信する）。
+    """
+    path = safe_join(str(FRONTEND_DIR), filename)
+    if path is None:
+        return None
+    path = Path(path)
+    
+    try:
+        key = file_signature(path)
+        entry = _page_cache.get(filename)
+        if entry is not None and entry['key'] == key:
+            return entry
+        
+        if key[1] > app.config['PAGE_CACHE_MAX_FILE_SIZE']:
+            entry = {'key': key, 'path': path, 'body': None}
+        else:
+            body = path.read_bytes()
+            entry = {'key': key, 'path': path, 'body': body, 'etag': make_etag(body)}
+    except OSError:
+        # 存在しない・ディレクトリ等
+        return None
+    
+    _page_cache[filename] = entry
+    return entry
+
+def serve_page(filename):
+    """HTMLページを配信（ETag / Last-Modified で 304、Accept-Encoding に応じて圧縮）"""
+    # HTML以外はファイルシステムを参照せずに 404
+    if not filename.endswith('.html'):
+        return jsonify({'error': f'{filename} not found'}), 404
+    
+    entry = get_page_entry(filename)
+    if entry is None:
+        return jsonify({'error': f'{filename} not found'}), 404
+    if entry['body'] is None:
+        return send_file(entry['path'], mimetype='text/html', conditional=True)
+    return negotiated_json_response(entry, entry['key'][0], mimetype='text/html')
+
 @app.route('/', methods=['GET'])
 def serve_home():
     """home.html を配信"""
-    frontend_path = Path(__file__).parent.parent / 'home.html'
-    if frontend_path.exists():
-        with open(frontend_path, 'r', encoding='utf-8') as f:
-            return f.read()
-    return jsonify({'error': 'home.html not found'}), 404
+    return serve_page('home.html')
 
 @app.route('/<path:filename>', methods=['GET'])
 def serve_frontend(filename):
     """フロントエンド HTML ファイルを配信"""
-    frontend_path = Path(__file__).parent.parent / filename
-    if frontend_path.exists() and frontend_path.suffix == '.html':
-        with open(frontend_path, 'r', encoding='utf-8') as f:
-            return f.read()
-    return jsonify({'error': f'{filename} not found'}), 404
+    return serve_page(filename)
+
+# ===== キャッシュの事前読み込み =====
+
+def list_cacheable_api_paths():
+    """キャッシュ対象の読み取り系APIの全パス（ドメイン・ペルソナごとのパスを含む）"""
+    conn = connect_db()
+    try:
+        domain_ids = [row['id'] for row in conn.execute('SELECT id FROM domains ORDER BY id')]
+        character_ids = [row['id'] for row in conn.execute('SELECT id FROM characters ORDER BY id')]
+    finally:
+        conn.close()
+    
+    paths = [
+        '/api/domains',
+        '/api/characters',
+        '/api/flows/questions',
+        '/api/statistics/summary',
+    ]
+    # ドメイン詳細は /api/domains と同じく domains.json から配信する
+    for domain in get_domains_cache()['data'].get('domains', []):
+        paths.append(f"/api/domains/{domain.get('id')}")
+    for domain_id in domain_ids:
+        paths.append(f'/api/domains/{domain_id}/documents')
+    for character_id in character_ids:
+        paths.append(f'/api/characters/{character_id}')
+    return paths
+
+def preload_caches():
+    """全ての読み取り系APIとHTMLページを1回ずつ生成・圧縮してキャッシュに載せる
+    
+    gunicorn の preload_app で fork 前に呼ぶと、ワーカーはキャッシュをコピーオンライトで共有する。
+    DB接続は子プロセスに引き継がないよう閉じ、以降の GC でページが複製されないよう gc.freeze() する。
+    'memory' モードではインメモリDBを作らず、DBファイルを読み取り専用で開いて生成する
+    （インメモリDBは fork 後に各ワーカーで作る。キャッシュのバージョンはどちらもファイルの (mtime_ns, size)）
+    """
+    import gc
+    
+    open_mode = app.config['DB_OPEN_MODE']
+    if open_mode == 'memory':
+        app.config['DB_OPEN_MODE'] = 'ro'
+    try:
+        paths = list_cacheable_api_paths()
+        paths += [HOME_DOMAINS_PATH]
+        paths += ['/'] + [f'/{page.name}' for page in sorted(FRONTEND_DIR.glob('*.html'))]
+        
+        client = app.test_client()
+        for path in paths:
+            for encoding in (None,) + CONTENT_ENCODINGS:
+                client.get(path, headers={'Accept-Encoding': encoding} if encoding else {})
+    finally:
+        app.config['DB_OPEN_MODE'] = open_mode
+        db_pool.close_idle()
+    gc.collect()
+    gc.freeze()
+    return paths
 
 # ===== メイン実行 =====
 
 if __name__ == '__main__':
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='DX-AI Model REST API Server')
+    parser.add_argument('--db-mode', choices=DB_OPEN_MODES, default=app.config['DB_OPEN_MODE'],
+                        help='DBのオープンモード（ro: 読み取り専用 / immutable: 読み取り専用かつ変更検知なし / '
+                             'memory: インメモリDBにコピーして配信、ファイル更新または SIGHUP で再読み込み）')
+    args = parser.parse_args()
+    app.config['DB_OPEN_MODE'] = args.db_mode
+    if args.db_mode == 'memory':
+        load_memory_db()
+        start_memory_db_watcher()
+    db_mode = describe_db_mode()
+    
     print("=" * 60)
     print("🚀 DX-AI Model REST API Server")
     print("=" * 60)
     print(f"📦 Database: {DB_PATH}")
+    print(f"🔒 DB Mode: {db_mode['openMode']} (journal_mode={db_mode['journalMode']}, "
+          f"mmap_size={db_mode['mmapSize']}, query_only={db_mode['queryOnly']})")
     print(f"🌐 Server: http://localhost:5000")
     print(f"📚 API Docs: http://localhost:5000/api/health")
+    print("⚠️ 開発用サーバーです。本番環境では: cd backend && gunicorn -c gunicorn.conf.py wsgi:app")
     print("=" * 60)
     
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DX-AIモデル REST API Server（非同期版）
+Quart（ASGI）+ SQLite3
+
+app.py と同じルート・同じレスポンス（本文・ETag・圧縮）を返す読み取り専用APIの非同期版。
+- sqlite3 の呼び出しは asyncio.to_thread でスレッドプールに逃がし、イベントループを止めない
+  （接続は app.py と同じ接続プールから借りる。クエリも app.py の query_* 関数を共用）
+- domains.json は aiofiles で非同期に読み込む
+- Keep-Alive のアイドル接続はスレッドを占有しないので、1プロセスで数千本の接続を保持できる
+
+対象: /api/health, /api/domains, /api/domains/<id>, /api/domains/<id>/documents,
+      /api/characters, /api/characters/<id>, /api/flows/questions, /api/statistics/summary,
+      /api/search, /api/fields/union, /api/fields/<id>/documents
+（分析API・フロントエンド配信は app.py を使う）
+
+Usage:
+    cd backend && hypercorn async_app:app --bind 0.0.0.0:5000 --keep-alive 75
+"""
+
+import asyncio
+import sqlite3
+import traceback
+from collections import OrderedDict
+from functools import wraps
+
+import aiofiles
+import aiofiles.os
+from quart import Quart, request, Response
+
+import app as sync_api
+
+app = Quart(__name__)
+
+# APIレスポンスのLRUキャッシュ（app.py の _response_cache と同じ形式: {'version', 'body', 'etag'}、最大 RESPONSE_CACHE_SIZE 件）
+_response_cache = OrderedDict()
+
+# domains.json のキャッシュ（app.py の get_domains_cache() と同じ形式）
+_domains_cache = None
+_domains_cache_lock = asyncio.Lock()
+
+# ===== ユーティリティ関数 =====
+
+def encode_json(data):
+    """app.py の jsonify と同じバイト列にシリアライズ（ETag も一致する）"""
+    return sync_api.app.json.response(data).get_data()
+
+def call_with_connection(query, *args):
+    """プールから接続を借りて query(conn, *args) を実行（スレッドプール内で呼ぶ）"""
+    conn = sync_api.db_pool.acquire()
+    try:
+        return query(conn, *args)
+    finally:
+        sync_api.db_pool.release(conn)
+
+async def run_query(query, *args):
+    """query(conn, *args) をスレッドプールで実行"""
+    return await asyncio.to_thread(call_with_connection, query, *args)
+
+def handle_errors(f):
+    """エラーハンドリングデコレータ（app.py と同じく 500 とエラーメッセージを返す）"""
+    @wraps(f)
+    async def decorated_function(*args, **kwargs):
+        try:
+            return await f(*args, **kwargs)
+        except Exception as e:
+            print(f"Error in {f.__name__}: {e}")
+            traceback.print_exc()
+            return error_response({'error': str(e)}, 500)
+    return decorated_function
+
+def error_response(data, status):
+    return Response(encode_json(data), status=status, mimetype='application/json')
+
+async def negotiated_json_response(entry, last_modified_ns):
+    """キャッシュ済みのレスポンスを Accept-Encoding に応じて圧縮し、条件付きGETなら304を返す
+    
+    圧縮はスレッドプールで行い、結果は entry['encoded'] に保持する
+    """
+    body, etag, encoding = entry['body'], entry['etag'], None
+    compressible = len(body) >= sync_api.app.config['COMPRESS_MIN_SIZE']
+    if compressible:
+        encodings = sync_api.negotiate_encodings(request.accept_encodings)
+        if encodings:
+            encoding = encodings[0]
+            encoded = entry.setdefault('encoded', {})
+            if encoding not in encoded:
+                encoded[encoding] = await asyncio.to_thread(sync_api.compress_body, body, encoding)
+            body = encoded[encoding]
+            etag = f'{etag}-{encoding}'
+    
+    response = Response(body, mimetype='application/json')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    if compressible:
+        response.vary.add('Accept-Encoding')
+    sync_api.set_cache_headers(response, etag, last_modified_ns)
+    return await response.make_conditional(request)
+
+def cached_response(not_found=None):
+    """DBのバージョンが変わるまでレスポンスをキャッシュするデコレータ（app.py の cached_response と同じ）
+    
+    ハンドラはJSONにするデータを返す。None の場合は not_found を本文とする 404 を返す（キャッシュしない）。
+    """
+    def decorator(f):
+        @wraps(f)
+        async def decorated_function(*args, **kwargs):
+            version = await asyncio.to_thread(sync_api.get_db_version)
+            key = (f.__name__, args, tuple(sorted(kwargs.items())))
+            entry = _response_cache.get(key)
+            if entry is not None:
+                _response_cache.move_to_end(key)
+            
+            if entry is None or entry['version'] != version:
+                data = await f(*args, **kwargs)
+                if data is None:
+                    return error_response(not_found, 404)
+                body = encode_json(data)
+                entry = {'version': version, 'body': body, 'etag': sync_api.make_etag(body)}
+                _response_cache[key] = entry
+                _response_cache.move_to_end(key)
+                while len(_response_cache) > sync_api.app.config['RESPONSE_CACHE_SIZE']:
+                    _response_cache.popitem(last=False)
+            
+            return await negotiated_json_response(entry, entry['version'][0])
+        return decorated_function
+    return decorator
+
+async def get_domains_cache():
+    """domains.json のキャッシュを取得（ファイルが変更された場合のみ非同期に再読み込み）"""
+    global _domains_cache
+    
+    path = sync_api.DOMAINS_JSON_PATH
+    stat = await aiofiles.os.stat(path)
+    key = (stat.st_mtime_ns, stat.st_size)
+    cache = _domains_cache
+    if cache is not None and cache['key'] == key:
+        return cache
+    
+    async with _domains_cache_lock:
+        cache = _domains_cache
+        if cache is None or cache['key'] != key:
+            async with aiofiles.open(path, 'r', encoding='utf-8') as f:
+                text = await f.read()
+            # パースとシリアライズはCPU処理なのでスレッドで行う
+            data = await asyncio.to_thread(sync_api.parse_domains_data, text)
+            body = await asyncio.to_thread(lambda: sync_api.app.json.dumps(data).encode('utf-8'))
+            cache = {
+                'key': key,
+                'data': data,
+                'body': body,
+                'etag': sync_api.make_etag(body),
+            }
+            _domains_cache = cache
+    return cache
+
+@app.after_request
+async def add_cors_headers(response):
+    """全てのオリジンからのアクセスを許可（app.py の CORS(app) に合わせる）"""
+    response.headers.setdefault('Access-Control-Allow-Origin', '*')
+    return response
+
+# ===== API エンドポイント =====
+
+@app.route('/api/health', methods=['GET'])
+async def health_check():
+    """ヘルスチェック"""
+    return Response(encode_json({
+        'status': 'ok',
+        'message': 'DX-AI Model API is running',
+        'dbPool': sync_api.db_pool.stats()
+    }), mimetype='application/json')
+
+# ----- Domains API -----
+
+@app.route('/api/domains', methods=['GET'])
+@handle_errors
+async def get_domains():
+    """全ドメインを取得 - JSONファイルを優先（fields / limit / cursor は app.py と同じ）"""
+    cache = await get_domains_cache()
+    if not request.args:
+        return await negotiated_json_response(cache, cache['key'][0])
+    
+    data = cache['data']
+    try:
+        allowed_fields = frozenset().union(*(domain.keys() for domain in data.get('domains', [])))
+        params = sync_api.parse_list_params(request.args, allowed_fields, 1)
+        entry = await asyncio.to_thread(
+            sync_api.get_projection_entry, ('domains', (), params), cache['key'],
+            lambda: sync_api.domains_page(data, *params)
+        )
+    except sync_api.QueryParamError as e:
+        return error_response({'error': str(e)}, 400)
+    return await negotiated_json_response(entry, cache['key'][0])
+
+@app.route('/api/domains/<domain_id>', methods=['GET'])
+@handle_errors
+async def get_domain(domain_id):
+    """特定のドメインを取得 - /api/domains の要素と同じ（JSONファイルから）"""
+    cache = await get_domains_cache()
+    domain = sync_api.find_domain(cache['data'], domain_id)
+    if domain is None:
+        return error_response({'error': 'Domain not found'}, 404)
+    entry = await asyncio.to_thread(
+        sync_api.get_projection_entry, ('domain', (domain_id,), ()), cache['key'], lambda: domain
+    )
+    return await negotiated_json_response(entry, cache['key'][0])
+
+@app.route('/api/domains/<domain_id>/documents', methods=['GET'])
+@handle_errors
+async def get_domain_documents(domain_id):
+    """特定ドメインの書類一覧を取得（fields / limit / cursor は app.py と同じ）"""
+    if not request.args:
+        return await get_all_domain_documents(domain_id)
+    
+    try:
+        params = sync_api.parse_list_params(request.args, sync_api.DOCUMENT_FIELDS, 3)
+    except sync_api.QueryParamError as e:
+        return error_response({'error': str(e)}, 400)
+    
+    version = await asyncio.to_thread(sync_api.get_db_version)
+    try:
+        entry = await asyncio.to_thread(
+            sync_api.get_projection_entry, ('documents', (domain_id,), params), version,
+            lambda: call_with_connection(sync_api.documents_page, domain_id, *params)
+        )
+    except sync_api.NotFoundError as e:
+        return error_response({'error': str(e)}, 404)
+    return await negotiated_json_response(entry, version[0])
+
+@cached_response({'error': 'Domain not found'})
+async def get_all_domain_documents(domain_id):
+    """特定ドメインの書類一覧（パラメータなし）"""
+    try:
+        return await run_query(sync_api.query_existing_domain_documents, domain_id)
+    except sync_api.NotFoundError:
+        return None
+
+# ----- Characters API -----
+
+@app.route('/api/characters', methods=['GET'])
+@handle_errors
+@cached_response()
+async def get_characters():
+    """全ペルソナを取得"""
+    return {'characters': await run_query(sync_api.query_characters)}
+
+@app.route('/api/characters/<character_id>', methods=['GET'])
+@handle_errors
+@cached_response({'error': 'Character not found'})
+async def get_character(character_id):
+    """特定のペルソナを取得"""
+    return await run_query(sync_api.query_character, character_id)
+
+# ----- Flows API -----
+
+@app.route('/api/flows/questions', methods=['GET'])
+@handle_errors
+@cached_response()
+async def get_flow_questions():
+    """フロー質問を取得"""
+    return {'baseQuestions': await run_query(sync_api.query_flow_questions)}
+
+# ----- Statistics API -----
+
+@app.route('/api/statistics/summary', methods=['GET'])
+@handle_errors
+@cached_response()
+async def get_statistics_summary():
+    """統計サマリーを取得"""
+    return await run_query(sync_api.query_statistics_summary)
+
+# ----- Search API -----
+
+@app.route('/api/search', methods=['GET'])
+@handle_errors
+async def search():
+    """書類・入力項目・タスク・痛み点を全文検索（q / kind / limit / cursor は app.py と同じ）"""
+    try:
+        params = sync_api.parse_search_params(request.args)
+    except sync_api.QueryParamError as e:
+        return error_response({'error': str(e)}, 400)
+    
+    version = await asyncio.to_thread(sync_api.get_db_version)
+    try:
+        entry = await asyncio.to_thread(
+            sync_api.get_projection_entry, ('search', (), params), version,
+            lambda: call_with_connection(sync_api.search_page, *params)
+        )
+    except sqlite3.OperationalError as e:
+        if 'no such table' not in str(e):
+            raise
+        return error_response({'error': 'Search index is not available. Run migrate_to_db.py'}, 503)
+    return await negotiated_json_response(entry, version[0])
+
+# ----- Fields API -----
+
+@app.route('/api/fields/union', methods=['GET'])
+@handle_errors
+async def get_field_union():
+    """選択した書類・ドメインの入力項目の和集合と、省ける入力数（documents / domains は app.py と同じ）"""
+    version = await asyncio.to_thread(sync_api.get_db_version)
+    try:
+        index = await asyncio.to_thread(
+            sync_api.get_field_index, version,
+            lambda: call_with_connection(sync_api.build_field_index)
+        )
+    except sqlite3.OperationalError as e:
+        if 'no such table' not in str(e):
+            raise
+        return error_response({'error': 'Field index is not available. Run migrate_to_db.py'}, 503)
+    
+    try:
+        params = sync_api.parse_field_union_params(request.args, index)
+    except sync_api.QueryParamError as e:
+        return error_response({'error': str(e)}, 400)
+    
+    entry = await asyncio.to_thread(
+        sync_api.get_projection_entry, ('fieldUnion', (), params), version,
+        lambda: sync_api.field_union(index, *params)
+    )
+    return await negotiated_json_response(entry, version[0])
+
+@app.route('/api/fields/<field_id>/documents', methods=['GET'])
+@handle_errors
+async def get_field_documents(field_id):
+    """入力項目を使う書類・ドメインを取得"""
+    try:
+        return await get_field_documents_cached(field_id)
+    except sqlite3.OperationalError as e:
+        if 'no such table' not in str(e):
+            raise
+        return error_response({'error': 'Field index is not available. Run migrate_to_db.py'}, 503)
+
+@cached_response({'error': 'Field not found'})
+async def get_field_documents_cached(field_id):
+    """入力項目を使う書類・ドメイン"""
+    return await run_query(sync_api.query_field_documents, field_id)
+
+# ===== メイン実行 =====
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("🚀 DX-AI Model REST API Server (async)")
+    print("=" * 60)
+    print(f"📦 Database: {sync_api.DB_PATH}")
+    print(f"🌐 Server: http://localhost:5000")
+    print("⚠️ 開発用サーバーです。本番環境では: cd backend && hypercorn async_app:app --bind 0.0.0.0:5000")
+    print("=" * 60)
+    
+    app.run(debug=True, host='0.0.0.0', port=5000)
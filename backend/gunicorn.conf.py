@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""
+gunicorn 設定（本番用）
+
+Usage:
+    cd backend && gunicorn -c gunicorn.conf.py wsgi:app
+
+環境変数で調整:
+    GUNICORN_BIND       待ち受けアドレス（既定 0.0.0.0:5000）
+    GUNICORN_WORKERS    ワーカープロセス数（既定 CPU数）
+    GUNICORN_THREADS    ワーカーあたりのスレッド数（既定 4）
+    GUNICORN_KEEPALIVE  Keep-Alive 接続の待機秒数（既定 5）
+    GUNICORN_ACCESSLOG  アクセスログの出力先（'-' で標準出力、既定は出力しない）
+    DB_OPEN_MODE        app.py の DBオープンモード（rw / ro / immutable / memory）
+"""
+
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count()))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+worker_class = 'gthread'
+accesslog = os.environ.get('GUNICORN_ACCESSLOG')
+
+# fork 前にアプリを読み込み、事前生成したキャッシュをワーカー間で共有する
+preload_app = True
+
+def post_worker_init(worker):
+    """ワーカーごとの初期化（インメモリDBとその監視スレッドは fork 後に作る）
+    
+    マスターの preload_caches() はインメモリDBを作らないので、fork をまたいで SQLite の接続は共有しない。
+    SIGHUP は gunicorn のマスターが使う（ワーカーを入れ替えるので、新しいワーカーがDBを読み込み直す）
+    """
+    from app import app, load_memory_db, start_memory_db_watcher
+    
+    if app.config['DB_OPEN_MODE'] == 'memory':
+        load_memory_db()
+        start_memory_db_watcher(handle_sighup=False)
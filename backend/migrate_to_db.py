@@ -4,12 +4,20 @@
 JSONデータをSQLiteデータベースにマイグレーションするスクリプト
 
 Usage:
-    python migrate_to_db.py
+    python migrate_to_db.py                # 全データを作り直す
+    python migrate_to_db.py --incremental  # 変更のあったドメイン・ペルソナ・質問のみ反映
+
+どちらのモードも一時ファイル上で構築してから dx_ai_model.db に差し替えるため、
+APIサーバーから作成途中のDBが見えることはない。
 """
 
+import argparse
+import hashlib
 import json
+import re
 import sqlite3
 import os
+import time
 from pathlib import Path
 
 # パス設定
@@ -19,204 +27,526 @@ BACKEND_DIR = BASE_DIR / 'backend'
 DB_PATH = BACKEND_DIR / 'dx_ai_model.db'
 SCHEMA_PATH = BACKEND_DIR / 'schema.sql'
 
-def create_database():
-    """データベースを作成し、スキーマを適用"""
-    print(f"📦 データベースを作成中: {DB_PATH}")
+def content_hash(item):
+    """JSONの要素から内容ハッシュを計算（キー順に依存しない）"""
+    canonical = json.dumps(item, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+def temp_path_for(db_path):
+    """構築用の一時ファイルパス（同じディレクトリに置き、rename をアトミックにする）"""
+    return db_path.with_name(db_path.name + '.tmp')
+
+def remove_db_files(db_path):
+    """DBファイルと WAL の付随ファイルを削除"""
+    for path in (db_path, Path(f'{db_path}-wal'), Path(f'{db_path}-shm')):
+        if path.exists():
+            path.unlink()
+
+def load_schema():
+    """schema.sql を読み込み、(テーブル等の定義, 後から作成するインデックス定義のリスト) に分ける"""
+    with open(SCHEMA_PATH, 'r', encoding='utf-8') as f:
+        schema_sql = f.read()
+    
+    index_pattern = re.compile(r'^CREATE INDEX[^;]*;', re.MULTILINE)
+    index_statements = index_pattern.findall(schema_sql)
+    return index_pattern.sub('', schema_sql), index_statements
+
+def apply_bulk_load_pragmas(conn):
+    """一括書き込み用の PRAGMA を設定（一時ファイル上での構築なので、失敗時はファイルごと破棄する）"""
+    conn.execute('PRAGMA synchronous = OFF')
+    conn.execute('PRAGMA journal_mode = MEMORY')
+
+def create_database(db_path):
+    """データベースを作成し、スキーマを適用（インデックスはデータ投入後に create_indexes で作成）"""
+    print(f"📦 データベースを作成中: {db_path}")
     
-    # 既存のDBファイルを削除
-    if DB_PATH.exists():
-        DB_PATH.unlink()
-        print("  ✓ 既存のデータベースを削除しました")
+    # 前回の失敗で残った一時ファイルを削除
+    remove_db_files(db_path)
     
     # スキーマを読み込んで実行
-    conn = sqlite3.connect(DB_PATH)
-    with open(SCHEMA_PATH, 'r', encoding='utf-8') as f:
-        schema_sql = f.read()
+    conn = sqlite3.connect(db_path)
+    schema_sql, _ = load_schema()
     
     conn.executescript(schema_sql)
     conn.commit()
+    apply_bulk_load_pragmas(conn)
     print("  ✓ スキーマを適用しました")
     
     return conn
 
-def migrate_domains(conn, domains_data):
-    """domains.jsonからドメインデータを移行"""
-    print("\n🏛️  ドメインデータを移行中...")
-    cursor = conn.cursor()
+def create_indexes(conn):
+    """インデックスを作成（行ごとの更新を避けるため、全データ投入後に実行する）"""
+    _, index_statements = load_schema()
+    started = time.perf_counter()
+    for statement in index_statements:
+        conn.execute(statement)
+    print(f"  ✓ {len(index_statements)}個のインデックスを作成しました ({time.perf_counter() - started:.3f}秒)")
+
+def copy_database(db_path):
+    """既存のDBを一時ファイルにコピー（差分マイグレーション用）"""
+    print(f"📦 既存のデータベースをコピー中: {DB_PATH} → {db_path}")
     
-    domains = domains_data.get('domains', [])
+    remove_db_files(db_path)
+    # 通常モードで開く（最後の接続として閉じた際に -wal / -shm が片付けられるように）
+    source = sqlite3.connect(DB_PATH)
+    conn = sqlite3.connect(db_path)
+    try:
+        source.backup(conn)
+    finally:
+        source.close()
+    
+    # 古いスキーマのDBにも後から追加したテーブル（差分管理用・統計用・検索用など）を用意する
+    # （schema.sql はインデックス以外 IF NOT EXISTS なので、既存のテーブルはそのまま）
+    schema_sql, _ = load_schema()
+    conn.executescript(schema_sql)
+    # 後から追加した列。追加した場合は全ペルソナを「更新あり」として並び順を書き込み直させる
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(characters)')}
+    if 'character_order' not in columns:
+        conn.execute('ALTER TABLE characters ADD COLUMN character_order INTEGER DEFAULT 0')
+        conn.execute("UPDATE source_hashes SET content_hash = '' WHERE kind = 'character'")
+    conn.commit()
+    apply_bulk_load_pragmas(conn)
+    print("  ✓ コピーしました")
+    return conn
+
+def install_database(conn, db_path):
+    """構築したDBを閉じて本来のパスにアトミックに差し替える"""
+    # WALモードに切り替え（DBファイルに永続化され、APIサーバーの読み取りが書き込みにブロックされなくなる）
+    conn.execute('PRAGMA journal_mode = WAL')
+    print("  ✓ ジャーナルモードを WAL に設定しました")
+    
+    # 閉じる際に WAL がチェックポイントされ、-wal / -shm は削除される
+    conn.close()
+    os.replace(db_path, DB_PATH)
+    print(f"  ✓ {DB_PATH.name} を差し替えました")
+
+# ===== 要素ごとの削除・挿入 =====
+
+def delete_domain(cursor, domain_id):
+    """ドメインに属する行を削除（domains 行自体は UPSERT で更新するため残す）"""
+    cursor.execute('''
+        DELETE FROM input_fields
+        WHERE document_id IN (SELECT id FROM documents WHERE domain_id = ?)
+    ''', (domain_id,))
+    cursor.execute('DELETE FROM documents WHERE domain_id = ?', (domain_id,))
+    cursor.execute('DELETE FROM demo_metrics WHERE domain_id = ?', (domain_id,))
+    cursor.execute('DELETE FROM domain_dependencies WHERE source_domain_id = ?', (domain_id,))
+
+def insert_domain(batches, domain):
+    """ドメインと関連データの行をバッチに追加"""
+    # 基本情報
+    batches.add('domains', (
+        domain['id'],
+        domain['name'],
+        domain.get('emoji', ''),
+        domain.get('intro', ''),
+        domain.get('description', ''),
+        domain.get('annualMaintenanceCost', {}).get('smart', 0),
+        domain.get('annualMaintenanceCost', {}).get('ai', 0)
+    ))
     
-    for domain in domains:
-        # 基本情報を挿入
-        cursor.execute('''
-            INSERT INTO domains (id, name, emoji, intro, description, 
-                                annual_maintenance_cost_smart, annual_maintenance_cost_ai)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (
+    # デモメトリクス
+    demo_metrics = domain.get('demoMetrics', {})
+    for mode in ['plain', 'smart', 'ai']:
+        batches.add('demo_metrics', (
             domain['id'],
-            domain['name'],
-            domain.get('emoji', ''),
-            domain.get('intro', ''),
-            domain.get('description', ''),
-            domain.get('annualMaintenanceCost', {}).get('smart', 0),
-            domain.get('annualMaintenanceCost', {}).get('ai', 0)
+            mode,
+            demo_metrics.get('dailyDocuments', {}).get(mode, 0),
+            demo_metrics.get('reductionRates', {}).get(mode, 0.0),
+            demo_metrics.get('timeReductionRates', {}).get(mode, 0.0),
+            demo_metrics.get('costReductionPercentage', {}).get(mode, 0.0),
+            demo_metrics.get('implementationCost', {}).get(mode, 0)
         ))
-        
-        # デモメトリクスを挿入
-        demo_metrics = domain.get('demoMetrics', {})
-        for mode in ['plain', 'smart', 'ai']:
-            cursor.execute('''
-                INSERT INTO demo_metrics (domain_id, mode, daily_documents, 
-                                         reduction_rate, time_reduction_rate, 
-                                         cost_reduction_percentage, implementation_cost)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (
+    
+    # 書類テンプレート（他ドメインから移動した書類は UPSERT で付け替え、入力項目は入れ直す）
+    documents_dict = domain.get('documents', {})
+    for category, docs in documents_dict.items():
+        for doc in docs:
+            batches.add('documents', (
+                doc['id'],
                 domain['id'],
-                mode,
-                demo_metrics.get('dailyDocuments', {}).get(mode, 0),
-                demo_metrics.get('reductionRates', {}).get(mode, 0.0),
-                demo_metrics.get('timeReductionRates', {}).get(mode, 0.0),
-                demo_metrics.get('costReductionPercentage', {}).get(mode, 0.0),
-                demo_metrics.get('implementationCost', {}).get(mode, 0)
+                doc['name'],
+                doc.get('description', ''),
+                category
             ))
-        
-        # 書類テンプレートを挿入
-        documents_dict = domain.get('documents', {})
-        for category, docs in documents_dict.items():
-            for doc in docs:
-                cursor.execute('''
-                    INSERT INTO documents (id, domain_id, name, description, category)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (
+            batches.add('input_fields_reset', (doc['id'],))
+            
+            # 入力項目
+            for order, field in enumerate(doc.get('inputFields', [])):
+                batches.add('input_fields', (
                     doc['id'],
-                    domain['id'],
-                    doc['name'],
-                    doc.get('description', ''),
-                    category
+                    field['id'],
+                    field['label'],
+                    field['source'],
+                    field.get('requiredIf'),
+                    order
                 ))
-                
-                # 入力項目を挿入
-                for order, field in enumerate(doc.get('inputFields', [])):
-                    cursor.execute('''
-                        INSERT INTO input_fields (document_id, field_id, label, source, 
-                                                 required_if, field_order)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                    ''', (
-                        doc['id'],
-                        field['id'],
-                        field['label'],
-                        field['source'],
-                        field.get('requiredIf'),
-                        order
-                    ))
-        
-        # 依存関係を挿入
-        dependencies = domain.get('dependencies', {})
-        for target_id, rate in dependencies.items():
-            cursor.execute('''
-                INSERT INTO domain_dependencies (source_domain_id, target_domain_id, 
-                                                dependency_rate, description)
-                VALUES (?, ?, ?, ?)
-            ''', (
-                domain['id'],
-                target_id,
-                rate,
-                f"{domain['name']}が{target_id}に依存"
-            ))
     
-    conn.commit()
-    print(f"  ✓ {len(domains)}個のドメインを移行しました")
+    # 依存関係
+    dependencies = domain.get('dependencies', {})
+    for target_id, rate in dependencies.items():
+        batches.add('domain_dependencies', (
+            domain['id'],
+            target_id,
+            rate,
+            f"{domain['name']}が{target_id}に依存"
+        ))
 
-def migrate_characters(conn, characters_data):
-    """characters.jsonからペルソナデータを移行"""
-    print("\n👥 ペルソナデータを移行中...")
-    cursor = conn.cursor()
+def delete_character(cursor, character_id):
+    """ペルソナに属する行を削除（characters 行自体は UPSERT で更新するため残す）"""
+    cursor.execute('''
+        DELETE FROM character_tasks
+        WHERE character_domain_id IN (SELECT id FROM character_domains WHERE character_id = ?)
+    ''', (character_id,))
+    cursor.execute('DELETE FROM character_domains WHERE character_id = ?', (character_id,))
+    cursor.execute('DELETE FROM character_pain_points WHERE character_id = ?', (character_id,))
+
+def insert_character(batches, char, order):
+    """ペルソナと関連データの行をバッチに追加（order は characters.json での位置）"""
+    # 基本情報
+    batches.add('characters', (
+        char['id'],
+        char['name'],
+        char.get('emoji', ''),
+        char.get('role', ''),
+        char.get('age', 0),
+        char.get('description', ''),
+        char.get('situation', ''),
+        order
+    ))
     
-    characters = characters_data.get('characters', [])
+    # 痛み点
+    for order, pain in enumerate(char.get('pain_points', [])):
+        batches.add('character_pain_points', (char['id'], pain, order))
     
-    for char in characters:
-        # 基本情報を挿入
-        cursor.execute('''
-            INSERT INTO characters (id, name, emoji, role, age, description, situation)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (
+    # ドメインとの関連（タスクから参照するため ID は事前に採番する）
+    domains_dict = char.get('domains', {})
+    for domain_id, domain_info in domains_dict.items():
+        char_domain_id = batches.allocate_id('character_domains')
+        batches.add('character_domains', (
+            char_domain_id,
             char['id'],
-            char['name'],
-            char.get('emoji', ''),
-            char.get('role', ''),
-            char.get('age', 0),
-            char.get('description', ''),
-            char.get('situation', '')
+            domain_id,
+            domain_info.get('priority', ''),
+            domain_info.get('frequency', ''),
+            domain_info.get('documents', 0),
+            domain_info.get('fields', 0)
         ))
         
-        # 痛み点を挿入
-        for order, pain in enumerate(char.get('pain_points', [])):
-            cursor.execute('''
-                INSERT INTO character_pain_points (character_id, pain_point, point_order)
-                VALUES (?, ?, ?)
-            ''', (char['id'], pain, order))
-        
-        # ドメインとの関連を挿入
-        domains_dict = char.get('domains', {})
-        for domain_id, domain_info in domains_dict.items():
-            cursor.execute('''
-                INSERT INTO character_domains (character_id, domain_id, priority, 
-                                              frequency, documents, fields)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (
-                char['id'],
-                domain_id,
-                domain_info.get('priority', ''),
-                domain_info.get('frequency', ''),
-                domain_info.get('documents', 0),
-                domain_info.get('fields', 0)
-            ))
-            
-            # タスクを挿入
-            char_domain_id = cursor.lastrowid
-            for order, task in enumerate(domain_info.get('tasks', [])):
-                cursor.execute('''
-                    INSERT INTO character_tasks (character_domain_id, task, task_order)
-                    VALUES (?, ?, ?)
-                ''', (char_domain_id, task, order))
+        # タスク
+        for order, task in enumerate(domain_info.get('tasks', [])):
+            batches.add('character_tasks', (char_domain_id, task, order))
+
+def delete_flow_question(cursor, question_id):
+    """質問の選択肢を削除（flow_questions 行自体は UPSERT で更新するため残す）"""
+    cursor.execute('DELETE FROM flow_question_options WHERE question_id = ?', (question_id,))
+
+def insert_flow_question(batches, question, order):
+    """質問と選択肢の行をバッチに追加"""
+    batches.add('flow_questions', (
+        question['id'],
+        question['label'],
+        question['type'],
+        1 if question.get('required', False) else 0,
+        question.get('placeholder', ''),
+        order
+    ))
     
-    conn.commit()
-    print(f"  ✓ {len(characters)}人のペルソナを移行しました")
+    # 選択肢
+    for opt_order, option in enumerate(question.get('options', [])):
+        batches.add('flow_question_options', (
+            question['id'],
+            option['value'],
+            option['label'],
+            opt_order
+        ))
 
-def migrate_flows(conn, flows_data):
-    """flows.jsonからフローデータを移行"""
-    print("\n📋 フローデータを移行中...")
+# ===== バルクロード =====
+
+# テーブルごとの挿入SQL（RowBatches.flush はこの順序で実行する）
+# 親テーブルは差分マイグレーションで既存の行を更新できるよう UPSERT にする
+BULK_SQL = {
+    'domains': '''
+        INSERT INTO domains (id, name, emoji, intro, description,
+                            annual_maintenance_cost_smart, annual_maintenance_cost_ai)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(id) DO UPDATE SET
+            name = excluded.name,
+            emoji = excluded.emoji,
+            intro = excluded.intro,
+            description = excluded.description,
+            annual_maintenance_cost_smart = excluded.annual_maintenance_cost_smart,
+            annual_maintenance_cost_ai = excluded.annual_maintenance_cost_ai
+    ''',
+    'demo_metrics': '''
+        INSERT INTO demo_metrics (domain_id, mode, daily_documents,
+                                 reduction_rate, time_reduction_rate,
+                                 cost_reduction_percentage, implementation_cost)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''',
+    'documents': '''
+        INSERT INTO documents (id, domain_id, name, description, category)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(id) DO UPDATE SET
+            domain_id = excluded.domain_id,
+            name = excluded.name,
+            description = excluded.description,
+            category = excluded.category
+    ''',
+    'input_fields_reset': 'DELETE FROM input_fields WHERE document_id = ?',
+    'input_fields': '''
+        INSERT INTO input_fields (document_id, field_id, label, source,
+                                 required_if, field_order)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''',
+    'domain_dependencies': '''
+        INSERT INTO domain_dependencies (source_domain_id, target_domain_id,
+                                        dependency_rate, description)
+        VALUES (?, ?, ?, ?)
+    ''',
+    'characters': '''
+        INSERT INTO characters (id, name, emoji, role, age, description, situation, character_order)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(id) DO UPDATE SET
+            name = excluded.name,
+            emoji = excluded.emoji,
+            role = excluded.role,
+            age = excluded.age,
+            description = excluded.description,
+            situation = excluded.situation,
+            character_order = excluded.character_order
+    ''',
+    'character_pain_points': '''
+        INSERT INTO character_pain_points (character_id, pain_point, point_order)
+        VALUES (?, ?, ?)
+    ''',
+    'character_domains': '''
+        INSERT INTO character_domains (id, character_id, domain_id, priority,
+                                      frequency, documents, fields)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''',
+    'character_tasks': '''
+        INSERT INTO character_tasks (character_domain_id, task, task_order)
+        VALUES (?, ?, ?)
+    ''',
+    'flow_questions': '''
+        INSERT INTO flow_questions (id, label, type, required, placeholder, question_order)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT(id) DO UPDATE SET
+            label = excluded.label,
+            type = excluded.type,
+            required = excluded.required,
+            placeholder = excluded.placeholder,
+            question_order = excluded.question_order
+    ''',
+    'flow_question_options': '''
+        INSERT INTO flow_question_options (question_id, value, label, option_order)
+        VALUES (?, ?, ?, ?)
+    ''',
+    'source_hashes': '''
+        INSERT INTO source_hashes (kind, item_id, content_hash) VALUES (?, ?, ?)
+        ON CONFLICT(kind, item_id) DO UPDATE SET content_hash = excluded.content_hash
+    ''',
+}
+
+class RowBatches:
+    """テーブルごとに行を溜め、executemany でまとめて書き込む
+    
+    reset_existing が False（新規作成したDB）の場合、既存行を消すための '*_reset' バッチは無視する。
+    """
+    
+    def __init__(self, conn, reset_existing=True):
+        self.conn = conn
+        self.reset_existing = reset_existing
+        self.rows = {}
+        self._next_ids = {}
+    
+    def add(self, table, row):
+        """行を追加"""
+        if not self.reset_existing and table.endswith('_reset'):
+            return
+        self.rows.setdefault(table, []).append(row)
+    
+    def allocate_id(self, table):
+        """INTEGER PRIMARY KEY を事前に採番（既存の最大値の続きから）"""
+        if table not in self._next_ids:
+            max_id = self.conn.execute(f'SELECT COALESCE(MAX(id), 0) FROM {table}').fetchone()[0]
+            self._next_ids[table] = max_id + 1
+        next_id = self._next_ids[table]
+        self._next_ids[table] = next_id + 1
+        return next_id
+    
+    def flush(self, stats):
+        """溜めた行を BULK_SQL の順序で書き込み、テーブルごとの (行数, 秒) を stats に加算"""
+        cursor = self.conn.cursor()
+        for table, sql in BULK_SQL.items():
+            rows = self.rows.pop(table, None)
+            if not rows:
+                continue
+            started = time.perf_counter()
+            cursor.executemany(sql, rows)
+            elapsed = time.perf_counter() - started
+            
+            count, seconds = stats.get(table, (0, 0.0))
+            stats[table] = (count + len(rows), seconds + elapsed)
+
+def print_load_stats(stats):
+    """テーブルごとの書き込み件数と速度を表示"""
+    print("\n⏱️  テーブルごとの書き込み速度")
+    for table, (count, seconds) in stats.items():
+        if table == 'input_fields_reset':
+            continue
+        rate = count / seconds if seconds > 0 else float('inf')
+        print(f"  ✓ {table}: {count}行 ({rate:,.0f}行/秒)")
+
+# ===== 差分の適用 =====
+
+# kind -> (親テーブル, 関連行の削除関数)
+ITEM_KINDS = {
+    'domain': ('domains', delete_domain),
+    'character': ('characters', delete_character),
+    'flow_question': ('flow_questions', delete_flow_question),
+}
+
+def sync_items(conn, kind, items, insert, incremental, stats):
+    """要素のリストをDBに反映し、(追加, 更新, 削除, 変更なし) の件数を返す
+    
+    incremental の場合は source_hashes と内容ハッシュを比較し、変更された要素のみ削除→再挿入する。
+    insert(batches, item, index) で1要素分の行をバッチに追加し、最後にまとめて書き込む。
+    """
+    table, delete = ITEM_KINDS[kind]
     cursor = conn.cursor()
+    batches = RowBatches(conn, reset_existing=incremental)
     
-    questions = flows_data.get('baseQuestions', [])
+    stored = {}
+    if incremental:
+        cursor.execute('SELECT item_id, content_hash FROM source_hashes WHERE kind = ?', (kind,))
+        stored = dict(cursor.fetchall())
     
-    for order, question in enumerate(questions):
-        cursor.execute('''
-            INSERT INTO flow_questions (id, label, type, required, placeholder, question_order)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (
-            question['id'],
-            question['label'],
-            question['type'],
-            1 if question.get('required', False) else 0,
-            question.get('placeholder', ''),
-            order
-        ))
+    added = updated = unchanged = 0
+    for index, item in enumerate(items):
+        item_id = item['id']
+        item_hash = content_hash({'index': index, 'item': item})
         
-        # 選択肢を挿入
-        for opt_order, option in enumerate(question.get('options', [])):
-            cursor.execute('''
-                INSERT INTO flow_question_options (question_id, value, label, option_order)
-                VALUES (?, ?, ?, ?)
-            ''', (
-                question['id'],
-                option['value'],
-                option['label'],
-                opt_order
-            ))
+        if stored.get(item_id) == item_hash:
+            unchanged += 1
+            continue
+        if item_id in stored:
+            updated += 1
+        else:
+            added += 1
+        
+        # 新規作成したDBには消すべき行がない
+        if incremental:
+            delete(cursor, item_id)
+        insert(batches, item, index)
+        batches.add('source_hashes', (kind, item_id, item_hash))
     
-    conn.commit()
-    print(f"  ✓ {len(questions)}個の質問を移行しました")
+    # JSONから消えた要素を削除
+    current_ids = {item['id'] for item in items}
+    removed_ids = [item_id for item_id in stored if item_id not in current_ids]
+    for item_id in removed_ids:
+        delete(cursor, item_id)
+        cursor.execute(f'DELETE FROM {table} WHERE id = ?', (item_id,))
+        cursor.execute('DELETE FROM source_hashes WHERE kind = ? AND item_id = ?', (kind, item_id))
+    
+    batches.flush(stats)
+    return added, updated, len(removed_ids), unchanged
+
+def print_sync_result(result, unit):
+    """反映件数を表示"""
+    added, updated, removed, unchanged = result
+    print(f"  ✓ 追加 {added}{unit} / 更新 {updated}{unit} / 削除 {removed}{unit} / 変更なし {unchanged}{unit}")
+
+def migrate_domains(conn, domains_data, incremental=False, stats=None):
+    """domains.jsonからドメインデータを移行"""
+    print("\n🏛️  ドメインデータを移行中...")
+    domains = domains_data.get('domains', [])
+    result = sync_items(conn, 'domain', domains,
+                        lambda batches, domain, index: insert_domain(batches, domain),
+                        incremental, {} if stats is None else stats)
+    print_sync_result(result, '個')
+    return result
+
+def migrate_characters(conn, characters_data, incremental=False, stats=None):
+    """characters.jsonからペルソナデータを移行"""
+    print("\n👥 ペルソナデータを移行中...")
+    characters = characters_data.get('characters', [])
+    result = sync_items(conn, 'character', characters,
+                        insert_character,
+                        incremental, {} if stats is None else stats)
+    print_sync_result(result, '人')
+    return result
+
+def migrate_flows(conn, flows_data, incremental=False, stats=None):
+    """flows.jsonからフローデータを移行"""
+    print("\n📋 フローデータを移行中...")
+    questions = flows_data.get('baseQuestions', [])
+    result = sync_items(conn, 'flow_question', questions, insert_flow_question,
+                        incremental, {} if stats is None else stats)
+    print_sync_result(result, '個')
+    return result
+
+def write_stats(conn):
+    """統計サマリー（/api/statistics/summary）の件数を stats テーブルに書き込む"""
+    conn.execute('DELETE FROM stats')
+    conn.execute('''
+        INSERT INTO stats (name, value)
+        SELECT 'domains', COUNT(*) FROM domains
+        UNION ALL SELECT 'documents', COUNT(*) FROM documents
+        UNION ALL SELECT 'fields', COUNT(*) FROM input_fields
+        UNION ALL SELECT 'characters', COUNT(*) FROM characters
+    ''')
+
+def rebuild_search_index(conn):
+    """全文検索インデックス（search_index）を移行後のテーブルから作り直す"""
+    started = time.perf_counter()
+    conn.execute('DELETE FROM search_index')
+    conn.execute('''
+        INSERT INTO search_index (kind, domain_id, document_id, field_id, character_id, title, body)
+        SELECT 'document', d.domain_id, d.id, NULL, NULL, d.name, COALESCE(d.description, '')
+        FROM documents d
+        UNION ALL
+        SELECT 'field', d.domain_id, f.document_id, f.field_id, NULL, f.label, ''
+        FROM input_fields f JOIN documents d ON d.id = f.document_id
+        UNION ALL
+        SELECT 'task', cd.domain_id, NULL, NULL, cd.character_id, t.task, ''
+        FROM character_tasks t JOIN character_domains cd ON cd.id = t.character_domain_id
+        UNION ALL
+        SELECT 'painPoint', NULL, NULL, NULL, p.character_id, p.pain_point, ''
+        FROM character_pain_points p
+    ''')
+    # 削除・再投入で分かれたセグメントを1つにまとめ、検索時に読む b-tree を減らす
+    conn.execute("INSERT INTO search_index (search_index) VALUES ('optimize')")
+    count = conn.execute('SELECT COUNT(*) FROM search_index').fetchone()[0]
+    print(f"  ✓ 全文検索インデックスを作成しました: {count}件 ({time.perf_counter() - started:.3f}秒)")
+
+def rebuild_field_index(conn):
+    """入力項目の転置インデックス（field_keys / field_postings）を作り直す
+    
+    field_id ごとに0始まりの連番を振り、それを使う書類・ドメインを field_postings に登録する。
+    同じ書類に同じ field_id が複数ある場合は1件にまとめる
+    """
+    started = time.perf_counter()
+    conn.execute('DELETE FROM field_postings')
+    conn.execute('DELETE FROM field_keys')
+    conn.execute('''
+        INSERT INTO field_keys (id, field_id, label, document_count, domain_count)
+        SELECT ROW_NUMBER() OVER (ORDER BY f.field_id) - 1, f.field_id, MIN(f.label),
+               COUNT(DISTINCT f.document_id), COUNT(DISTINCT d.domain_id)
+        FROM input_fields f JOIN documents d ON d.id = f.document_id
+        GROUP BY f.field_id
+    ''')
+    conn.execute('''
+        INSERT INTO field_postings (field_key, document_id, domain_id, source)
+        SELECT k.id, f.document_id, d.domain_id, MIN(f.source)
+        FROM input_fields f
+        JOIN documents d ON d.id = f.document_id
+        JOIN field_keys k ON k.field_id = f.field_id
+        GROUP BY k.id, f.document_id
+    ''')
+    count = conn.execute('SELECT COUNT(*) FROM field_keys').fetchone()[0]
+    print(f"  ✓ 入力項目の転置インデックスを作成しました: {count}項目 ({time.perf_counter() - started:.3f}秒)")
 
 def verify_migration(conn):
     """マイグレーション結果を検証"""
@@ -238,8 +568,52 @@ def verify_migration(conn):
         count = cursor.fetchone()[0]
         print(f"  ✓ {display_name}: {count}件")
 
+def run_migration(domains_data, characters_data, flows_data, incremental=False):
+    """一時ファイル上でDBを構築し、成功した場合のみ DB_PATH に差し替える
+    
+    incremental の場合は既存のDBをコピーして差分のみを反映する（既存のDBがなければ全データを移行）。
+    """
+    if incremental and not DB_PATH.exists():
+        print("\n⚠️ 既存のデータベースがないため全データを移行します")
+        incremental = False
+    
+    temp_path = temp_path_for(DB_PATH)
+    conn = copy_database(temp_path) if incremental else create_database(temp_path)
+    
+    try:
+        # データを移行（全体を1トランザクションで反映）
+        stats = {}
+        results = {
+            'domains': migrate_domains(conn, domains_data, incremental, stats),
+            'characters': migrate_characters(conn, characters_data, incremental, stats),
+            'flows': migrate_flows(conn, flows_data, incremental, stats),
+        }
+        if not incremental:
+            create_indexes(conn)
+        write_stats(conn)
+        rebuild_search_index(conn)
+        rebuild_field_index(conn)
+        conn.commit()
+        print_load_stats(stats)
+        
+        # 検証
+        verify_migration(conn)
+    except Exception:
+        # 既存のDBには手を付けずに一時ファイルを破棄
+        conn.close()
+        remove_db_files(temp_path)
+        raise
+    
+    install_database(conn, temp_path)
+    return results
+
 def main():
     """メイン処理"""
+    parser = argparse.ArgumentParser(description='JSONデータをSQLiteデータベースにマイグレーション')
+    parser.add_argument('--incremental', action='store_true',
+                        help='既存のDBとの差分（内容ハッシュ）のみを反映する')
+    args = parser.parse_args()
+    
     print("=" * 60)
     print("🚀 DX-AIモデル データベースマイグレーション")
     print("=" * 60)
@@ -258,29 +632,18 @@ def main():
         flows_data = json.load(f)
     print("  ✓ flows.json")
     
-    # データベースを作成
-    conn = create_database()
-    
     try:
-        # データを移行
-        migrate_domains(conn, domains_data)
-        migrate_characters(conn, characters_data)
-        migrate_flows(conn, flows_data)
-        
-        # 検証
-        verify_migration(conn)
+        run_migration(domains_data, characters_data, flows_data, args.incremental)
         
         print("\n" + "=" * 60)
         print("✅ マイグレーション完了！")
         print(f"📦 データベース: {DB_PATH}")
         print("=" * 60)
-        
+    
     except Exception as e:
         print(f"\n❌ エラーが発生しました: {e}")
         import traceback
         traceback.print_exc()
-    finally:
-        conn.close()
 
 if __name__ == '__main__':
     main()
@@ -67,6 +67,7 @@ CREATE TABLE IF NOT EXISTS characters (
     age INTEGER,
     description TEXT,
     situation TEXT,
+    character_order INTEGER DEFAULT 0,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
@@ -147,6 +148,53 @@ CREATE TABLE IF NOT EXISTS flow_question_options (
 
 CREATE INDEX idx_options_question ON flow_question_options(question_id);
 
+-- 12. 移行元JSONのハッシュテーブル（差分マイグレーション用）
+CREATE TABLE IF NOT EXISTS source_hashes (
+    kind TEXT NOT NULL,
+    item_id TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    PRIMARY KEY (kind, item_id)
+);
+
+-- 13. 統計サマリーの集計値テーブル（migrate_to_db.py が移行のたびに書き直す）
+CREATE TABLE IF NOT EXISTS stats (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+
+-- 14. 全文検索インデックス（FTS5 trigram、migrate_to_db.py が移行のたびに作り直す）
+-- 書類名・説明、入力項目のラベル、ペルソナのタスク・痛み点を title / body で検索する
+CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+    title,
+    body,
+    kind UNINDEXED,
+    domain_id UNINDEXED,
+    document_id UNINDEXED,
+    field_id UNINDEXED,
+    character_id UNINDEXED,
+    tokenize = 'trigram'
+);
+
+-- 15. 入力項目のキー（field_id ごとに0始まりの連番を振る。migrate_to_db.py が移行のたびに作り直す）
+-- 連番は書類ごとの入力項目集合をビット列で表す際のビット位置として使う
+CREATE TABLE IF NOT EXISTS field_keys (
+    id INTEGER PRIMARY KEY,
+    field_id TEXT NOT NULL UNIQUE,
+    label TEXT NOT NULL,
+    document_count INTEGER NOT NULL,
+    domain_count INTEGER NOT NULL
+);
+
+-- 16. 入力項目の転置インデックス（入力項目 → それを使う書類・ドメイン）
+CREATE TABLE IF NOT EXISTS field_postings (
+    field_key INTEGER NOT NULL,
+    document_id TEXT NOT NULL,
+    domain_id TEXT NOT NULL,
+    source TEXT NOT NULL,
+    PRIMARY KEY (field_key, document_id),
+    FOREIGN KEY (field_key) REFERENCES field_keys(id) ON DELETE CASCADE
+) WITHOUT ROWID;
+
 -- 更新日時を自動更新するトリガー
 CREATE TRIGGER IF NOT EXISTS update_domains_timestamp 
 AFTER UPDATE ON domains
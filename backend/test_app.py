@@ -0,0 +1,1180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+APIサーバーのユニットテスト（Flask テストクライアントを使用）
+
+Usage:
+    python -m pytest backend/test_app.py
+"""
+
+import gzip
+import importlib.util
+import json
+import os
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+import app as api
+import migrate_to_db
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """テスト用クライアント（事前生成スナップショットは使わずDBから応答する）"""
+    api.app.config['TESTING'] = True
+    monkeypatch.setitem(api.app.config, 'API_SNAPSHOT_DIR', None)
+    return api.app.test_client()
+
+
+def build_test_db(db_path, num_characters):
+    """スキーマを適用したテスト用DBを作成し、ペルソナを num_characters 人登録する"""
+    conn = sqlite3.connect(db_path)
+    conn.executescript((Path(api.__file__).parent / 'schema.sql').read_text(encoding='utf-8'))
+    conn.execute("INSERT INTO domains (id, name) VALUES ('administration', '行政')")
+    conn.execute("INSERT INTO domains (id, name) VALUES ('medical', '医療')")
+    for i in range(num_characters):
+        char_id = f'char{i}'
+        conn.execute('INSERT INTO characters (id, name) VALUES (?, ?)', (char_id, f'ペルソナ{i}'))
+        for order in range(2):
+            conn.execute(
+                'INSERT INTO character_pain_points (character_id, pain_point, point_order) VALUES (?, ?, ?)',
+                (char_id, f'痛み{i}-{order}', order)
+            )
+        for domain_id in ('administration', 'medical'):
+            cursor = conn.execute(
+                'INSERT INTO character_domains (character_id, domain_id, priority) VALUES (?, ?, ?)',
+                (char_id, domain_id, 'high')
+            )
+            for order in range(3):
+                conn.execute(
+                    'INSERT INTO character_tasks (character_domain_id, task, task_order) VALUES (?, ?, ?)',
+                    (cursor.lastrowid, f'{domain_id}-task{order}', order)
+                )
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture
+def sql_trace(monkeypatch):
+    """get_db() が返す接続で実行されたSQL文を記録する"""
+    statements = []
+    original_get_db = api.get_db
+
+    def traced_get_db():
+        conn = original_get_db()
+        conn.set_trace_callback(statements.append)
+        return conn
+
+    monkeypatch.setattr(api, 'get_db', traced_get_db)
+    monkeypatch.setattr(api, '_response_cache', api.OrderedDict())
+    return statements
+
+
+@pytest.fixture
+def domains_json(tmp_path, monkeypatch):
+    """一時ディレクトリに置いた domains.json を参照させる"""
+    json_path = tmp_path / 'domains.json'
+    json_path.write_text(json.dumps({'domains': [{'id': 'a'}]}), encoding='utf-8')
+    monkeypatch.setattr(api, 'DOMAINS_JSON_PATH', json_path)
+    monkeypatch.setattr(api, '_domains_cache', None)
+    return json_path
+
+
+# ----- Domains API -----
+
+def test_domains_merges_default_cost_per_hour(client, domains_json):
+    """costPerHour が未定義ならデフォルト値が補完される"""
+    data = client.get('/api/domains').get_json()
+    assert data['meta']['demoMetaInfo']['costPerHour'] == 3000
+    assert data['domains'] == [{'id': 'a'}]
+
+
+def test_domains_cache_reused_until_file_changes(client, domains_json):
+    """ファイルが変わらない限りキャッシュを再利用し、更新時のみ再読み込みする"""
+    client.get('/api/domains')
+    cache = api._domains_cache
+    client.get('/api/domains')
+    assert api._domains_cache is cache
+
+    domains_json.write_text(json.dumps({'domains': [{'id': 'a'}, {'id': 'b'}]}), encoding='utf-8')
+    stat = domains_json.stat()
+    os.utime(domains_json, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    data = client.get('/api/domains').get_json()
+    assert api._domains_cache is not cache
+    assert [d['id'] for d in data['domains']] == ['a', 'b']
+
+
+def test_domains_fields_projection_and_pagination(client, domains_json, monkeypatch):
+    """fields で要素のキーを絞り、cursor を辿ると全ドメインを1回ずつ取得できる"""
+    monkeypatch.setattr(api, '_projection_cache', api.OrderedDict())
+    domains = [{'id': f'd{i}', 'name': f'分野{i}', 'emoji': '🏛️', 'documents': {'basic': [{'id': 'x'}]}}
+               for i in range(5)]
+    domains_json.write_text(json.dumps({'domains': domains}), encoding='utf-8')
+
+    data = client.get('/api/domains?fields=name,emoji').get_json()
+    assert data['domains'][0] == {'id': 'd0', 'name': '分野0', 'emoji': '🏛️'}
+    assert data['meta']['demoMetaInfo']['costPerHour'] == 3000
+    assert 'nextCursor' not in data
+
+    ids, cursor = [], None
+    while True:
+        url = '/api/domains?fields=name&limit=2' + (f'&cursor={cursor}' if cursor else '')
+        data = client.get(url).get_json()
+        assert all(set(domain) == {'id', 'name'} for domain in data['domains'])
+        ids += [domain['id'] for domain in data['domains']]
+        cursor = data['nextCursor']
+        if cursor is None:
+            break
+    assert ids == [f'd{i}' for i in range(5)]
+
+    # 同じ射影（パラメータの順序違いを含む）はキャッシュ済みのエントリを再利用する
+    client.get('/api/domains?fields=emoji,name')
+    entry = api._projection_cache[('domains', (), (('emoji', 'id', 'name'), None, None))]
+    client.get('/api/domains?fields=name,emoji')
+    assert api._projection_cache[('domains', (), (('emoji', 'id', 'name'), None, None))] is entry
+
+
+def test_domain_documents_cursor_pagination(client, tmp_path, monkeypatch, sql_trace):
+    """書類一覧はキーセット方式でページングし、ページを連結すると全件と一致する"""
+    db_path = tmp_path / 'test.db'
+    build_test_db(db_path, 0)
+    conn = sqlite3.connect(db_path)
+    for i in range(7):
+        # 同じカテゴリ・同じ名前の書類があっても ID で順序が決まる
+        conn.execute(
+            'INSERT INTO documents (id, domain_id, name, category) VALUES (?, ?, ?, ?)',
+            (f'doc{i}', 'medical', f'書類{i % 3}', None if i == 0 else 'basic')
+        )
+        conn.execute(
+            'INSERT INTO input_fields (document_id, field_id, label, source) VALUES (?, ?, ?, ?)',
+            (f'doc{i}', 'name', '氏名', 'user')
+        )
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(api, 'DB_PATH', db_path)
+    monkeypatch.setattr(api, '_projection_cache', api.OrderedDict())
+
+    full = client.get('/api/domains/medical/documents').get_json()
+    del sql_trace[:]
+
+    pages, cursor = [], None
+    while True:
+        url = '/api/domains/medical/documents?fields=name,inputFields&limit=3' + (f'&cursor={cursor}' if cursor else '')
+        data = client.get(url).get_json()
+        pages.append(data['documents'])
+        cursor = data['nextCursor']
+        if cursor is None:
+            break
+
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert len(sql_trace) == 3
+    documents = [doc for page in pages for doc in page]
+    assert documents == [{'id': d['id'], 'name': d['name'], 'inputFields': d['inputFields']} for d in full]
+
+
+def test_domain_documents_fields_as_json_array(client, tmp_path, monkeypatch, sql_trace):
+    """入力項目は field_order 順の1つのJSON配列として取得する（ラベルに '||' を含んでも壊れない）"""
+    db_path = tmp_path / 'test.db'
+    build_test_db(db_path, 0)
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO documents (id, domain_id, name, category) VALUES ('doc', 'medical', '診断書', 'basic')")
+    conn.execute("INSERT INTO documents (id, domain_id, name, category) VALUES ('empty', 'medical', '同意書', 'basic')")
+    for order in reversed(range(300)):
+        conn.execute(
+            'INSERT INTO input_fields (document_id, field_id, label, source, field_order) VALUES (?, ?, ?, ?, ?)',
+            ('doc', f'field{order}', f'項目||{order}', 'user', order)
+        )
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(api, 'DB_PATH', db_path)
+
+    documents = {doc['id']: doc for doc in client.get('/api/domains/medical/documents').get_json()}
+
+    assert len(sql_trace) == 1
+    assert documents['empty']['inputFields'] == []
+    fields = documents['doc']['inputFields']
+    assert [field['id'] for field in fields] == [f'field{order}' for order in range(300)]
+    assert fields[1] == {'id': 'field1', 'label': '項目||1', 'source': 'user', 'requiredIf': None}
+
+
+def test_domain_documents_unknown_domain_not_cached(client, tmp_path, monkeypatch):
+    """存在しないドメインの書類一覧は 404 でキャッシュしない（書類のないドメインは空配列）"""
+    db_path = tmp_path / 'test.db'
+    build_test_db(db_path, 0)
+    monkeypatch.setattr(api, 'DB_PATH', db_path)
+    monkeypatch.setattr(api, '_response_cache', api.OrderedDict())
+    monkeypatch.setattr(api, '_projection_cache', api.OrderedDict())
+
+    for i in range(10):
+        for url in (f'/api/domains/unknown{i}/documents', f'/api/domains/unknown{i}/documents?limit=5'):
+            response = client.get(url)
+            assert response.status_code == 404
+            assert response.get_json() == {'error': 'Domain not found'}
+    assert len(api._response_cache) == 0
+    assert len(api._projection_cache) == 0
+
+    assert client.get('/api/domains/medical/documents').get_json() == []
+
+
+def test_response_cache_is_bounded_lru(client, tmp_path, monkeypatch):
+    """レスポンスキャッシュは RESPONSE_CACHE_SIZE 件を超えると最も古く使われたものから捨てる"""
+    db_path = tmp_path / 'test.db'
+    build_test_db(db_path, 5)
+    monkeypatch.setattr(api, 'DB_PATH', db_path)
+    monkeypatch.setattr(api, '_response_cache', api.OrderedDict())
+    monkeypatch.setitem(api.app.config, 'RESPONSE_CACHE_SIZE', 3)
+
+    for i in range(3):
+        client.get(f'/api/characters/char{i}')
+    client.get('/api/characters/char0')
+    client.get('/api/characters/char3')
+
+    assert list(api._response_cache) == [
+        ('get_character', (), (('character_id', 'char2'),)),
+        ('get_character', (), (('character_id', 'char0'),)),
+        ('get_character', (), (('character_id', 'char3'),)),
+    ]
+
+
+@pytest.mark.parametrize('query', [
+    'fields=unknown',
+    'limit=0',
+    'limit=101',
+    'limit=2.5',
+    'cursor=not-a-cursor',
+    'page=2',
+])
+def test_list_params_rejected(client, query):
+    for url in ('/api/domains', '/api/domains/administration/documents'):
+        response = client.get(f'{url}?{query}')
+        assert response.status_code == 400
+        assert 'error' in response.get_json()
+
+
+def test_domain_detail_matches_catalog_entry(client, domains_json, sql_trace, monkeypatch):
+    """ドメイン詳細は /api/domains の要素と同じ（DBに移していない項目も含み、クエリを発行しない）"""
+    monkeypatch.setattr(api, '_projection_cache', api.OrderedDict())
+    domain = {
+        'id': 'a',
+        'name': '医療',
+        'dailyVolume': 120,
+        'averageTimePerCase': 15,
+        'administrativeDependency': 0.4,
+        'demoMetrics': {
+            'dailyDocuments': {'plain': 10, 'smart': 7, 'ai': 2},
+            'reductionRates': {'plain': 0.0, 'smart': 0.3, 'ai': 0.8},
+            'annualMaintenanceCost': {'plain': 0, 'smart': 500, 'ai': 1200},
+            'impactOnOtherDomains': {'b': 0.9},
+        },
+        'documents': [{'id': 'doc1', 'name': '診断書'}],
+        'checklist': ['保険証'],
+    }
+    domains_json.write_text(json.dumps({'domains': [domain, {'id': 'b'}]}), encoding='utf-8')
+
+    catalog = client.get('/api/domains').get_json()['domains']
+    for entry in catalog:
+        response = client.get(f"/api/domains/{entry['id']}")
+        assert response.status_code == 200
+        assert response.get_json() == entry
+    assert catalog[0] == domain
+    assert sql_trace == []
+
+    response = client.get('/api/domains/unknown')
+    assert response.status_code == 404
+    assert 'error' in response.get_json()
+
+
+def test_domain_detail_follows_file_changes(client, domains_json, monkeypatch):
+    """domains.json が更新されたら新しい内容を返す"""
+    monkeypatch.setattr(api, '_projection_cache', api.OrderedDict())
+    assert client.get('/api/domains/a').get_json() == {'id': 'a'}
+
+    domains_json.write_text(json.dumps({'domains': [{'id': 'a', 'name': 'A'}]}), encoding='utf-8')
+    stat = domains_json.stat()
+    os.utime(domains_json, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert client.get('/api/domains/a').get_json() == {'id': 'a', 'name': 'A'}
+
+
+# ----- Characters API -----
+
+@pytest.mark.parametrize('num_characters', [1, 25])
+def test_characters_query_count_is_constant(client, tmp_path, monkeypatch, sql_trace, num_characters):
+    """ペルソナ数に関わらず発行されるSQL文の数が一定（N+1 にならない）"""
+    db_path = tmp_path / 'test.db'
+    build_test_db(db_path, num_characters)
+    monkeypatch.setattr(api, 'DB_PATH', db_path)
+
+    data = client.get('/api/characters').get_json()
+
+    assert len(data['characters']) == num_characters
+    assert len(sql_trace) == 3
+    char = data['characters'][-1]
+    assert char['pain_points'] == [f'痛み{num_characters - 1}-0', f'痛み{num_characters - 1}-1']
+    assert list(char['domains']) == ['administration', 'medical']
+    assert char['domains']['medical']['tasks'] == ['medical-task0', 'medical-task1', 'medical-task2']
+
+
+def test_character_detail_matches_list_single_query(client, tmp_path, monkeypatch, sql_trace):
+    """ペルソナ詳細は一覧の要素と同じ内容を1クエリで返し、キーごとにキャッシュする"""
+    db_path = tmp_path / 'test.db'
+    build_test_db(db_path, 3)
+    monkeypatch.setattr(api, 'DB_PATH', db_path)
+    characters = client.get('/api/characters').get_json()['characters']
+    del sql_trace[:]
+
+    for char in characters:
+        assert client.get(f"/api/characters/{char['id']}").get_json() == char
+    assert len(sql_trace) == len(characters)
+
+    client.get('/api/characters/char1')
+    assert len(sql_trace) == len(characters)
+    assert client.get('/api/characters/unknown').status_code == 404
+
+
+# ----- Flows API -----
+
+def test_flow_questions_single_query(client, sql_trace):
+    """質問と選択肢が1クエリで取得され、選択肢は順序どおりに付与される"""
+    data = client.get('/api/flows/questions').get_json()
+
+    assert len(sql_trace) == 1
+    questions = data['baseQuestions']
+    assert [q['question_order'] for q in questions] == sorted(q['question_order'] for q in questions)
+    assert all(isinstance(q['required'], bool) for q in questions)
+    with_options = [q for q in questions if 'options' in q]
+    assert with_options
+    for question in with_options:
+        assert question['options'] and set(question['options'][0]) == {'value', 'label'}
+
+
+def test_flow_questions_with_tied_order(client, tmp_path, monkeypatch):
+    """question_order が同じ質問でも、質問ごとに1つにまとめて全ての選択肢を順序どおりに付与する"""
+    db_path = tmp_path / 'test.db'
+    build_test_db(db_path, 0)
+    conn = sqlite3.connect(db_path)
+    for question_id in ('b', 'a'):
+        conn.execute(
+            'INSERT INTO flow_questions (id, label, type, question_order) VALUES (?, ?, ?, 0)',
+            (question_id, question_id, 'select')
+        )
+        for order in (1, 0):
+            conn.execute(
+                'INSERT INTO flow_question_options (question_id, value, label, option_order) VALUES (?, ?, ?, ?)',
+                (question_id, f'{question_id}{order}', f'{question_id}{order}', order)
+            )
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(api, 'DB_PATH', db_path)
+
+    questions = client.get('/api/flows/questions').get_json()['baseQuestions']
+
+    assert [(q['id'], [o['value'] for o in q['options']]) for q in questions] == [
+        ('a', ['a0', 'a1']), ('b', ['b0', 'b1'])
+    ]
+
+
+# ----- Statistics API -----
+
+def test_statistics_summary_single_query_and_cached(client, tmp_path, monkeypatch, sql_trace):
+    """件数は1クエリで取得し、DBが変わるまではSQLを発行しない"""
+    db_path = tmp_path / 'test.db'
+    build_test_db(db_path, 3)
+    monkeypatch.setattr(api, 'DB_PATH', db_path)
+
+    assert client.get('/api/statistics/summary').get_json() == {
+        'domains': 2, 'documents': 0, 'fields': 0, 'characters': 3
+    }
+    assert len(sql_trace) == 1
+
+    client.get('/api/statistics/summary')
+    assert len(sql_trace) == 1
+
+
+def test_statistics_summary_prefers_stats_table(client, tmp_path, monkeypatch):
+    """stats テーブルの集計値を優先し、stats テーブルのない古いDBでは件数を数える"""
+    db_path = tmp_path / 'test.db'
+    build_test_db(db_path, 3)
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO stats (name, value) VALUES ('fields', 42)")
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(api, 'DB_PATH', db_path)
+    monkeypatch.setattr(api, '_response_cache', api.OrderedDict())
+
+    data = client.get('/api/statistics/summary').get_json()
+    assert data == {'domains': 2, 'documents': 0, 'fields': 42, 'characters': 3}
+
+    conn = sqlite3.connect(db_path)
+    conn.execute('DROP TABLE stats')
+    conn.commit()
+    conn.close()
+    stat = db_path.stat()
+    os.utime(db_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    data = client.get('/api/statistics/summary').get_json()
+    assert data == {'domains': 2, 'documents': 0, 'fields': 0, 'characters': 3}
+
+
+# ----- Search API -----
+
+@pytest.fixture
+def search_db(tmp_path, monkeypatch):
+    """全文検索インデックスを作成したテスト用DB"""
+    db_path = tmp_path / 'test.db'
+    build_test_db(db_path, 2)
+    conn = sqlite3.connect(db_path)
+    conn.executemany(
+        'INSERT INTO documents (id, domain_id, name, description, category) VALUES (?, ?, ?, ?, ?)',
+        [
+            ('juminhyo', 'administration', '住民票の写し交付申請書', '住民票の写しを請求する申請書', 'basic'),
+            ('tenshutsu', 'administration', '転出届', '住所を異動するときの届出。申請書の様式は自治体ごと', 'basic'),
+            ('shindansho', 'medical', '診断書', '<b>医師</b>が作成する', 'basic'),
+        ]
+    )
+    conn.executemany(
+        'INSERT INTO input_fields (document_id, field_id, label, source) VALUES (?, ?, ?, ?)',
+        [(doc_id, 'address', '住所', 'user') for doc_id in ('juminhyo', 'tenshutsu', 'shindansho')]
+        + [('juminhyo', f'extra{i}', f'申請書の追記事項{i}', 'user') for i in range(25)]
+    )
+    conn.commit()
+    migrate_to_db.rebuild_search_index(conn)
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(api, 'DB_PATH', db_path)
+    monkeypatch.setattr(api, '_projection_cache', api.OrderedDict())
+    return db_path
+
+
+def test_search_ranks_title_matches_first(client, search_db, sql_trace):
+    """タイトルに一致するものを本文のみの一致より上位に返し、検索語を <mark> で囲む"""
+    data = client.get('/api/search?q=申請書&kind=document').get_json()
+
+    # FTS5 が内部で発行する文を除き、検索クエリは1回
+    searches = [sql for sql in sql_trace if 'FROM search_index' in sql]
+    assert len(searches) == 1
+    assert data['query'] == '申請書'
+    assert [r['documentId'] for r in data['results']] == ['juminhyo', 'tenshutsu']
+    assert data['results'][0] == {
+        'kind': 'document', 'domainId': 'administration', 'documentId': 'juminhyo',
+        'title': '住民票の写し交付<mark>申請書</mark>',
+        'body': '住民票の写しを請求する<mark>申請書</mark>',
+    }
+    assert data['nextCursor'] is None
+
+    # 同じ検索はキャッシュから返す
+    del sql_trace[:]
+    client.get('/api/search?kind=document&q=申請書')
+    assert not [sql for sql in sql_trace if 'FROM search_index' in sql]
+
+
+def test_search_multiple_and_short_terms(client, search_db):
+    """空白区切りの語は全て含むものに絞り込み、trigram で引けない2文字以下の語も検索できる"""
+    data = client.get('/api/search?q=住所').get_json()
+    assert {(r['kind'], r.get('documentId')) for r in data['results']} == {
+        ('field', 'juminhyo'), ('field', 'tenshutsu'), ('field', 'shindansho'), ('document', 'tenshutsu')
+    }
+    assert data['results'][0]['title'] == '<mark>住所</mark>'
+
+    data = client.get('/api/search?q=住所 申請書').get_json()
+    assert [(r['kind'], r['documentId']) for r in data['results']] == [('document', 'tenshutsu')]
+    assert data['results'][0]['body'] == '<mark>住所</mark>を異動するときの届出。<mark>申請書</mark>の様式は自治体ごと'
+
+    data = client.get('/api/search?q=task1&kind=task').get_json()
+    assert {(r['characterId'], r['domainId']) for r in data['results']} == {
+        (f'char{i}', domain) for i in range(2) for domain in ('administration', 'medical')
+    }
+
+
+def test_search_escapes_html_and_like_wildcards(client, search_db):
+    data = client.get('/api/search?q=医師').get_json()
+    assert data['results'][0]['body'] == '&lt;b&gt;<mark>医師</mark>&lt;/b&gt;が作成する'
+
+    assert client.get('/api/search?q=%25').get_json()['results'] == []
+
+    # 実体参照（&#x27; や &amp;）の中を囲まない
+    assert api.highlight_terms("Tom's form 27", ['27']) == 'Tom&#x27;s form <mark>27</mark>'
+    assert api.highlight_terms('A&B amp', ['amp']) == 'A&amp;B <mark>amp</mark>'
+    assert api.highlight_terms('<b>', ['<b']) == '<mark>&lt;b</mark>&gt;'
+    assert client.get('/api/search?q="申請').get_json()['results'] == []
+
+
+def test_search_pagination(client, search_db):
+    """cursor を辿ると全件を重複なく取得できる"""
+    full = client.get('/api/search?q=申請書&limit=100').get_json()['results']
+    assert len(full) == 27
+
+    pages, cursor = [], None
+    while True:
+        data = client.get('/api/search?q=申請書&limit=10' + (f'&cursor={cursor}' if cursor else '')).get_json()
+        pages.append(data['results'])
+        cursor = data['nextCursor']
+        if cursor is None:
+            break
+
+    assert [len(page) for page in pages] == [10, 10, 7]
+    assert [r for page in pages for r in page] == full
+
+
+@pytest.mark.parametrize('query', [
+    '',
+    'q=',
+    'q=%20',
+    'q=' + 'あ' * 101,
+    'q=' + '%20'.join(f'語{i}' for i in range(9)),
+    'q=申請書&kind=unknown',
+    'q=申請書&limit=0',
+    'q=申請書&cursor=not-a-cursor',
+    'q=申請書&fields=title',
+])
+def test_search_params_rejected(client, query):
+    response = client.get(f'/api/search?{query}')
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+def test_search_without_index_returns_503(client, tmp_path, monkeypatch):
+    """検索インデックスのない古いDBでは 503 を返す"""
+    db_path = tmp_path / 'test.db'
+    build_test_db(db_path, 1)
+    conn = sqlite3.connect(db_path)
+    conn.execute('DROP TABLE search_index')
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(api, 'DB_PATH', db_path)
+    monkeypatch.setattr(api, '_projection_cache', api.OrderedDict())
+
+    response = client.get('/api/search?q=申請書')
+    assert response.status_code == 503
+    assert 'migrate_to_db.py' in response.get_json()['error']
+
+
+# ----- Fields API -----
+
+@pytest.fixture
+def field_db(tmp_path, monkeypatch):
+    """入力項目の転置インデックスを作成したテスト用DB（name は3書類、address は2書類で共通）"""
+    db_path = tmp_path / 'test.db'
+    build_test_db(db_path, 0)
+    conn = sqlite3.connect(db_path)
+    conn.executemany(
+        'INSERT INTO documents (id, domain_id, name) VALUES (?, ?, ?)',
+        [('juminhyo', 'administration', '住民票'), ('tenshutsu', 'administration', '転出届'),
+         ('shindansho', 'medical', '診断書')]
+    )
+    conn.executemany(
+        'INSERT INTO input_fields (document_id, field_id, label, source) VALUES (?, ?, ?, ?)',
+        [
+            ('juminhyo', 'name', '氏名', 'mynumber'), ('juminhyo', 'address', '住所', 'mynumber'),
+            ('tenshutsu', 'name', '氏名', 'user'), ('tenshutsu', 'address', '住所', 'user'),
+            ('tenshutsu', 'new_address', '転出先', 'user'),
+            ('shindansho', 'name', '氏名', 'shared'), ('shindansho', 'disease', '病名', 'ai'),
+        ]
+    )
+    conn.commit()
+    migrate_to_db.rebuild_field_index(conn)
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(api, 'DB_PATH', db_path)
+    monkeypatch.setattr(api, '_projection_cache', api.OrderedDict())
+    monkeypatch.setattr(api, '_field_index', None)
+    return db_path
+
+
+def test_field_union_deduplicates_shared_fields(client, field_db, sql_trace):
+    """選択した書類の入力項目の和集合と、共通項目の重複分の入力数を返す"""
+    data = client.get('/api/fields/union?documents=juminhyo,tenshutsu,shindansho').get_json()
+
+    assert {key: value for key, value in data.items() if key != 'fields'} == {
+        'documents': 3, 'totalFields': 7, 'uniqueFields': 4, 'duplicateFields': 3,
+        'keystrokesSaved': 3 * api.app.config['KEYSTROKES_PER_FIELD'],
+    }
+    assert data['fields'] == [
+        {'id': 'name', 'label': '氏名', 'sources': ['mynumber', 'shared', 'user'], 'documents': 3},
+        {'id': 'address', 'label': '住所', 'sources': ['mynumber', 'user'], 'documents': 2},
+        {'id': 'disease', 'label': '病名', 'sources': ['ai'], 'documents': 1},
+        {'id': 'new_address', 'label': '転出先', 'sources': ['user'], 'documents': 1},
+    ]
+    # 索引はDBのバージョンごとに1回だけ読み込む（domains / documents / field_keys / field_postings の4クエリ）
+    assert len(sql_trace) == 4
+
+    data = client.get('/api/fields/union?documents=juminhyo,shindansho').get_json()
+    assert (data['totalFields'], data['uniqueFields'], data['duplicateFields']) == (4, 3, 1)
+    assert data['fields'][0] == {'id': 'name', 'label': '氏名', 'sources': ['mynumber', 'shared'], 'documents': 2}
+    assert len(sql_trace) == 4
+
+
+def test_field_union_selects_domains(client, field_db):
+    """domains を指定するとそのドメインの全書類を選択する（documents との重複は1回と数える）"""
+    data = client.get('/api/fields/union?domains=administration&documents=tenshutsu').get_json()
+    assert (data['documents'], data['totalFields'], data['uniqueFields']) == (2, 5, 3)
+
+    by_domain = client.get('/api/fields/union?domains=medical,administration').get_json()
+    by_document = client.get('/api/fields/union?documents=shindansho,tenshutsu,juminhyo').get_json()
+    assert by_domain == by_document
+
+
+def test_field_union_domain_without_documents(client, field_db):
+    """書類のないドメインも選択でき、空の和集合を返す"""
+    conn = sqlite3.connect(field_db)
+    conn.execute("INSERT INTO domains (id, name) VALUES ('empty', '空')")
+    conn.commit()
+    conn.close()
+    stat = field_db.stat()
+    os.utime(field_db, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    data = client.get('/api/fields/union?domains=empty').get_json()
+    assert data == {
+        'documents': 0, 'totalFields': 0, 'uniqueFields': 0, 'duplicateFields': 0, 'keystrokesSaved': 0, 'fields': []
+    }
+
+
+def test_field_union_cache_key_ignores_order_and_duplicates(client, field_db):
+    """documents / domains の順序違い・重複は同じキャッシュエントリを使う"""
+    first = client.get('/api/fields/union?documents=tenshutsu,juminhyo').data
+    entries = dict(api._projection_cache)
+    second = client.get('/api/fields/union?documents=juminhyo,tenshutsu,juminhyo').data
+
+    assert second == first
+    assert dict(api._projection_cache) == entries
+    assert ('fieldUnion', (), (('juminhyo', 'tenshutsu'), ())) in entries
+
+
+def test_field_union_matches_set_operations(client, tmp_path, monkeypatch):
+    """多数の書類を選択しても、集合演算で素直に求めた結果と一致する"""
+    db_path = tmp_path / 'test.db'
+    build_test_db(db_path, 0)
+    conn = sqlite3.connect(db_path)
+    document_fields = {f'doc{d}': {f'field{(d * 7 + i * 13) % 150}' for i in range(d % 20)} for d in range(300)}
+    conn.executemany(
+        'INSERT INTO documents (id, domain_id, name) VALUES (?, ?, ?)',
+        [(doc_id, 'medical', doc_id) for doc_id in document_fields]
+    )
+    conn.executemany(
+        'INSERT INTO input_fields (document_id, field_id, label, source) VALUES (?, ?, ?, ?)',
+        [(doc_id, field_id, field_id, 'user') for doc_id, fields in document_fields.items() for field_id in fields]
+    )
+    conn.commit()
+    migrate_to_db.rebuild_field_index(conn)
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(api, 'DB_PATH', db_path)
+    monkeypatch.setattr(api, '_field_index', None)
+
+    selected = [f'doc{d}' for d in range(0, 300, 3)]
+    data = client.get(f"/api/fields/union?documents={','.join(selected)}").get_json()
+
+    union = set().union(*(document_fields[doc_id] for doc_id in selected))
+    total = sum(len(document_fields[doc_id]) for doc_id in selected)
+    assert (data['documents'], data['totalFields'], data['uniqueFields']) == (len(selected), total, len(union))
+    assert {field['id']: field['documents'] for field in data['fields']} == {
+        field_id: sum(field_id in document_fields[doc_id] for doc_id in selected) for field_id in union
+    }
+
+
+@pytest.mark.parametrize('query', [
+    '',
+    'documents=',
+    'documents=unknown',
+    'domains=unknown',
+    'documents=juminhyo&fields=id',
+])
+def test_field_union_params_rejected(client, field_db, query):
+    response = client.get(f'/api/fields/union?{query}')
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+def test_field_documents_from_inverted_index(client, field_db, sql_trace):
+    """入力項目を使う書類・ドメインを1クエリで返す"""
+    data = client.get('/api/fields/name/documents').get_json()
+
+    assert len(sql_trace) == 1
+    assert data == {
+        'id': 'name', 'label': '氏名', 'documentCount': 3, 'domainCount': 2,
+        'domains': ['administration', 'medical'],
+        'documents': [
+            {'id': 'juminhyo', 'domainId': 'administration', 'source': 'mynumber'},
+            {'id': 'tenshutsu', 'domainId': 'administration', 'source': 'user'},
+            {'id': 'shindansho', 'domainId': 'medical', 'source': 'shared'},
+        ],
+    }
+    assert client.get('/api/fields/unknown/documents').status_code == 404
+
+
+def test_fields_without_index_return_503(client, tmp_path, monkeypatch):
+    """転置インデックスのない古いDBでは 503 を返す"""
+    db_path = tmp_path / 'test.db'
+    build_test_db(db_path, 0)
+    conn = sqlite3.connect(db_path)
+    conn.execute('DROP TABLE field_postings')
+    conn.execute('DROP TABLE field_keys')
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(api, 'DB_PATH', db_path)
+    monkeypatch.setattr(api, '_field_index', None)
+
+    for url in ('/api/fields/union?domains=medical', '/api/fields/name/documents'):
+        response = client.get(url)
+        assert response.status_code == 503
+        assert 'migrate_to_db.py' in response.get_json()['error']
+
+
+# ----- 接続プール -----
+
+def test_db_pool_reuses_connections(client, tmp_path, monkeypatch):
+    """接続はリクエスト間で再利用され、DBファイルが差し替えられると破棄される"""
+    db_path = tmp_path / 'test.db'
+    build_test_db(db_path, 1)
+    monkeypatch.setattr(api, 'DB_PATH', db_path)
+    monkeypatch.setattr(api, '_response_cache', api.OrderedDict())
+    pool = api.ConnectionPool(api.connect_db, api.get_db_identity)
+    monkeypatch.setattr(api, 'db_pool', pool)
+
+    for _ in range(3):
+        api._response_cache.clear()
+        assert client.get('/api/characters').status_code == 200
+    assert (pool.misses, pool.hits) == (1, 2)
+
+    # 接続は読み取り専用
+    conn = pool.acquire()
+    with pytest.raises(sqlite3.OperationalError):
+        conn.execute("INSERT INTO domains (id, name) VALUES ('x', 'x')")
+    pool.release(conn)
+
+    # マイグレーションでDBが再作成された場合
+    new_db_path = tmp_path / 'new.db'
+    build_test_db(new_db_path, 2)
+    os.replace(new_db_path, db_path)
+    api._response_cache.clear()
+    data = client.get('/api/characters').get_json()
+    assert len(data['characters']) == 2
+    assert pool.stats()['discarded'] == 1
+
+
+@pytest.mark.parametrize('open_mode', ['ro', 'immutable'])
+def test_read_only_open_modes(tmp_path, monkeypatch, open_mode):
+    """URI の mode=ro / immutable=1 で開き、mmap_size はファイルサイズに合わせる"""
+    db_path = tmp_path / 'テスト.db'
+    build_test_db(db_path, 1)
+    monkeypatch.setattr(api, 'DB_PATH', db_path)
+    monkeypatch.setitem(api.app.config, 'DB_OPEN_MODE', open_mode)
+
+    mode = api.describe_db_mode()
+    assert mode['openMode'] == open_mode
+    assert mode['mmapSize'] == db_path.stat().st_size
+
+    conn = api.connect_db()
+    assert conn.execute('SELECT COUNT(*) FROM characters').fetchone()[0] == 1
+    with pytest.raises(sqlite3.OperationalError):
+        conn.execute('PRAGMA query_only = OFF')
+        conn.execute("INSERT INTO domains (id, name) VALUES ('x', 'x')")
+    conn.close()
+
+
+def test_memory_mode_serves_copy_and_reloads(client, tmp_path, monkeypatch):
+    """'memory' モードではインメモリDBのコピーから配信し、ファイル更新時に切り替える"""
+    db_path = tmp_path / 'test.db'
+    build_test_db(db_path, 1)
+    monkeypatch.setattr(api, 'DB_PATH', db_path)
+    monkeypatch.setattr(api, '_response_cache', api.OrderedDict())
+    monkeypatch.setattr(api, '_memory_db', None)
+    monkeypatch.setattr(api, 'db_pool', api.ConnectionPool(api.connect_db, api.get_db_identity))
+    monkeypatch.setitem(api.app.config, 'DB_OPEN_MODE', 'memory')
+
+    response = client.get('/api/characters')
+    assert len(response.get_json()['characters']) == 1
+    assert api.describe_db_mode()['journalMode'] == 'memory'
+    assert api.reload_memory_db_if_changed() is False
+
+    new_db_path = tmp_path / 'new.db'
+    build_test_db(new_db_path, 3)
+    os.replace(new_db_path, db_path)
+
+    # ファイルの差し替えだけではインメモリDBは変わらない
+    assert len(client.get('/api/characters').get_json()['characters']) == 1
+
+    assert api.reload_memory_db_if_changed() is True
+    reloaded = client.get('/api/characters')
+    assert len(reloaded.get_json()['characters']) == 3
+    assert reloaded.headers['ETag'] != response.headers['ETag']
+    api._memory_db['keeper'].close()
+
+
+
+def test_memory_db_reload_request_does_not_take_lock(tmp_path, monkeypatch):
+    """SIGHUP ハンドラは要求を記録するだけで、ロック保持中に割り込んでも止まらない（読み込みは監視スレッド）"""
+    db_path = tmp_path / 'test.db'
+    build_test_db(db_path, 1)
+    monkeypatch.setattr(api, 'DB_PATH', db_path)
+    monkeypatch.setattr(api, '_memory_db', None)
+    monkeypatch.setattr(api, '_memory_db_reload_requested', api.threading.Event())
+    api.load_memory_db()
+    generation = api._memory_db['generation']
+
+    with api._memory_db_lock:
+        api.request_memory_db_reload()
+    assert api._memory_db['generation'] == generation
+
+    # ファイルが変わっていなくても要求があれば再読み込みし、要求は1回で消える
+    assert api.wait_and_reload_memory_db(0) is True
+    assert api._memory_db['generation'] == generation + 1
+    assert api.wait_and_reload_memory_db(0) is False
+    api._memory_db['keeper'].close()
+
+# ----- APIスナップショット -----
+
+def load_tool(name):
+    """tools/ 配下のスクリプトをモジュールとして読み込む"""
+    path = Path(api.__file__).resolve().parents[1] / 'tools' / f'{name}.py'
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_api_snapshot_matches_live_responses(client, tmp_path, monkeypatch, sql_trace):
+    """スナップショットはDBからの応答と同一で、有効な間はDBにアクセスせずに配信される"""
+    snapshot_dir = tmp_path / 'api_snapshot'
+    manifest = load_tool('build_api_snapshot').build_snapshot(snapshot_dir)
+    monkeypatch.setitem(api.app.config, 'API_SNAPSHOT_DIR', None)
+    assert '/api/domains/administration/documents' in manifest['entries']
+
+    live = {path: client.get(path).data for path in manifest['entries']}
+    sql_trace.clear()
+    monkeypatch.setitem(api.app.config, 'API_SNAPSHOT_DIR', snapshot_dir)
+    monkeypatch.setattr(api, '_api_snapshot', None)
+
+    for path, body in live.items():
+        assert client.get(path).data == body
+        response = client.get(path, headers={'Accept-Encoding': 'gzip'})
+        if len(body) < api.app.config['COMPRESS_MIN_SIZE']:
+            assert 'Content-Encoding' not in response.headers
+            continue
+        assert response.headers['Content-Encoding'] == 'gzip'
+        # 事前圧縮版をそのまま返す
+        assert response.data == (snapshot_dir / manifest['entries'][path]['gzip']).read_bytes()
+        assert gzip.decompress(response.data) == body
+    assert sql_trace == []
+
+    # 生成元のコード（app.py）が変わったスナップショットは使わない
+    code_version = api.API_CODE_VERSION
+    monkeypatch.setattr(api, '_api_snapshot', None)
+    monkeypatch.setattr(api, 'API_CODE_VERSION', 'changed')
+    assert api.get_api_snapshot() is None
+    assert manifest['sources']['code'] == code_version
+    monkeypatch.setattr(api, 'API_CODE_VERSION', code_version)
+
+    # 生成元のデータが変わったスナップショットは使わない
+    monkeypatch.setattr(api, 'get_db_version', lambda: (0, 0))
+    monkeypatch.setattr(api, 'sha256_file', lambda path: 'changed')
+    assert api.get_api_snapshot() is None
+
+
+# ----- 圧縮 -----
+
+def test_cached_api_response_compressed_once(client, domains_json):
+    """データのバージョンごとに1回だけ圧縮し、受け付けない場合は非圧縮で返す"""
+    domains_json.write_text(json.dumps({'domains': [{'id': f'd{i}', 'name': 'x' * 100} for i in range(50)]}),
+                            encoding='utf-8')
+    plain = client.get('/api/domains')
+    assert 'Content-Encoding' not in plain.headers
+    assert 'Accept-Encoding' in plain.headers['Vary']
+
+    response = client.get('/api/domains', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.data) == plain.data
+    compressed = api._domains_cache['encoded']['gzip']
+
+    client.get('/api/domains', headers={'Accept-Encoding': 'gzip, deflate'})
+    assert api._domains_cache['encoded']['gzip'] is compressed
+
+    # 圧縮版の ETag で条件付きGET
+    response = client.get('/api/domains', headers={'Accept-Encoding': 'gzip', 'If-None-Match': response.headers['ETag']})
+    assert response.status_code == 304
+
+
+def test_brotli_preferred_when_available(client):
+    brotli = pytest.importorskip('brotli')
+    response = client.get('/api/domains', headers={'Accept-Encoding': 'gzip, br'})
+    assert response.headers['Content-Encoding'] == 'br'
+    assert brotli.decompress(response.data) == client.get('/api/domains').data
+
+
+def test_small_and_dynamic_responses(client):
+    """小さいレスポンスは圧縮せず、キャッシュしない HTML は都度圧縮する"""
+    response = client.get('/api/health', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+
+    plain = client.get('/home.html')
+    response = client.get('/home.html', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.data) == plain.data
+
+
+def test_static_precompressed_siblings(client, tmp_path, monkeypatch):
+    """元ファイルより新しい .gz があればそのまま配信し、古ければ元ファイルを配信する"""
+    monkeypatch.setattr(api.app, 'static_folder', str(tmp_path))
+    source = tmp_path / 'js' / 'app.js'
+    source.parent.mkdir()
+    source.write_text('console.log("dx");\n' * 200, encoding='utf-8')
+    written = load_tool('build_static_compressed').build(tmp_path)
+    assert tmp_path / 'js' / 'app.js.gz' in written
+
+    response = client.get('/assets/js/app.js', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.mimetype == 'text/javascript'
+    assert gzip.decompress(response.get_data()) == source.read_bytes()
+    response.close()
+
+    response = client.get('/assets/js/app.js')
+    assert 'Content-Encoding' not in response.headers
+    assert response.get_data() == source.read_bytes()
+    response.close()
+
+    stat = source.stat()
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10_000_000_000))
+    response = client.get('/assets/js/app.js', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+    response.close()
+
+    assert client.get('/assets/../backend/app.py').status_code == 404
+
+
+# ----- HTMLページ -----
+
+@pytest.fixture
+def frontend_dir(tmp_path, monkeypatch):
+    """一時ディレクトリのHTMLを配信させる"""
+    (tmp_path / 'home.html').write_text('<h1>ホーム</h1>', encoding='utf-8')
+    (tmp_path / 'domain.html').write_text('<h1>分野</h1>', encoding='utf-8')
+    monkeypatch.setattr(api, 'FRONTEND_DIR', tmp_path)
+    monkeypatch.setattr(api, '_page_cache', {})
+    return tmp_path
+
+
+def test_page_cache_serves_bytes_until_file_changes(client, frontend_dir):
+    response = client.get('/')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/html'
+    assert response.get_data(as_text=True) == '<h1>ホーム</h1>'
+    entry = api._page_cache['home.html']
+
+    response = client.get('/home.html', headers={'If-None-Match': response.headers['ETag']})
+    assert response.status_code == 304
+    assert api._page_cache['home.html'] is entry
+
+    page = frontend_dir / 'home.html'
+    page.write_text('<h1>新しいホーム</h1>', encoding='utf-8')
+    stat = page.stat()
+    os.utime(page, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    response = client.get('/', headers={'If-None-Match': response.headers['ETag']})
+    assert response.status_code == 200
+    assert response.get_data(as_text=True) == '<h1>新しいホーム</h1>'
+
+
+def test_page_rejects_non_html_without_filesystem_access(client, frontend_dir, monkeypatch):
+    def fail(*args):
+        raise AssertionError('filesystem accessed')
+
+    monkeypatch.setattr(api, 'file_signature', fail)
+    for path in ('/backend/app.py', '/domains.json', '/home.htm'):
+        assert client.get(path).status_code == 404
+
+
+def test_page_missing_and_traversal(client, frontend_dir):
+    assert client.get('/missing.html').status_code == 404
+    assert client.get('/../secret.html').status_code == 404
+    assert api.get_page_entry('../secret.html') is None
+
+
+def test_large_page_served_with_send_file(client, frontend_dir, monkeypatch):
+    monkeypatch.setitem(api.app.config, 'PAGE_CACHE_MAX_FILE_SIZE', 5)
+    response = client.get('/domain.html')
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.get_data(as_text=True) == '<h1>分野</h1>'
+    response.close()
+    assert api._page_cache['domain.html']['body'] is None
+
+
+# ----- 事前読み込み -----
+
+def test_preload_caches_fills_caches_and_closes_connections(client, monkeypatch):
+    """fork 前の事前読み込みで全APIとHTMLをキャッシュし、DB接続は閉じておく"""
+    import gc
+    monkeypatch.setattr(gc, 'freeze', lambda: None)
+    monkeypatch.setattr(api, '_response_cache', api.OrderedDict())
+    monkeypatch.setattr(api, '_page_cache', {})
+
+    paths = api.preload_caches()
+
+    assert '/api/domains/administration/documents' in paths
+    assert '/strategy.html' in paths
+    assert api.db_pool.stats()['idle'] == 0
+    assert any(key[0] == 'get_characters' for key in api._response_cache)
+    assert 'gzip' in api._page_cache['strategy.html']['encoded']
+
+
+
+def test_preload_caches_in_memory_mode_does_not_create_memory_db(client, monkeypatch):
+    """'memory' モードでも fork 前のマスターではインメモリDBを作らず、ワーカーで作ったDBでキャッシュが有効なまま使える"""
+    import gc
+    monkeypatch.setattr(gc, 'freeze', lambda: None)
+    monkeypatch.setattr(api, '_response_cache', api.OrderedDict())
+    monkeypatch.setattr(api, '_page_cache', {})
+    monkeypatch.setattr(api, '_memory_db', None)
+    monkeypatch.setattr(api, 'db_pool', api.ConnectionPool(api.connect_db, api.get_db_identity))
+    monkeypatch.setitem(api.app.config, 'DB_OPEN_MODE', 'memory')
+
+    api.preload_caches()
+
+    assert api._memory_db is None
+    assert api.app.config['DB_OPEN_MODE'] == 'memory'
+    entry = api._response_cache[('get_characters', (), ())]
+
+    # fork 後のワーカーに相当（インメモリDBのバージョンはファイルと同じ）
+    api.load_memory_db()
+    client.get('/api/characters')
+    assert api._response_cache[('get_characters', (), ())] is entry
+    api._memory_db['keeper'].close()
+
+# ----- Analysis API -----
+
+def write_analysis_domains(json_path, daily_volume=1000):
+    """/api/analysis 用の最小構成の domains.json を書き出す"""
+    metrics = {
+        'dailyVolume': daily_volume,
+        'averageTimePerCase': 30,
+        'administrativeDependency': 0.5,
+        'reductionRates': {'plain': 0, 'smart': 0.4, 'ai': 0.8},
+        'timeReductionRates': {'plain': 0, 'smart': 0.3, 'ai': 0.6},
+        'costReductionPercentage': {'plain': 0, 'smart': 0.2, 'ai': 0.5},
+    }
+    json_path.write_text(json.dumps({
+        'meta': {'defaultMode': 'smart'},
+        'domains': [
+            {'id': 'administration', 'name': '行政', 'demoMetrics': dict(metrics, administrativeDependency=0)},
+            {'id': 'medical', 'name': '医療', 'demoMetrics': metrics},
+        ],
+    }), encoding='utf-8')
+
+
+@pytest.fixture
+def analysis_domains(domains_json, monkeypatch):
+    write_analysis_domains(domains_json)
+    monkeypatch.setattr(api, '_analysis_cache', {'version': None, 'entries': api.OrderedDict(), 'hits': 0, 'misses': 0})
+    return domains_json
+
+
+def test_analysis_matches_compute_metrics_for_mode(client, analysis_domains):
+    """上書きなしの結果は compute_metrics_for_mode と一致する"""
+    data = json.loads(analysis_domains.read_text(encoding='utf-8'))
+    data['meta']['demoMetaInfo'] = {'costPerHour': 3000}
+
+    assert client.get('/api/analysis').get_json() == api.compute_metrics_for_mode('smart', data['domains'], data['meta'])
+    assert client.get('/api/analysis?mode=ai').get_json()['currentMode'] == 'ai'
+
+
+def test_analysis_applies_overrides(client, analysis_domains):
+    """costPerHour とドメイン別の上書きが選択モードに反映される"""
+    data = client.get(
+        '/api/analysis?mode=smart&costPerHour=6000&dailyVolume.medical=2000&reductionRate.medical=0.5'
+    ).get_json()
+
+    medical = data['domainMetrics']['medical']
+    assert data['costPerHour'] == 6000
+    assert medical['dailyVolume'] == 2000
+    # 行政が AI 以外なので依存度に応じて低下する（0.5 - 0.5 * 0.15）
+    assert medical['reductionRate'] == pytest.approx(0.425)
+    assert data['domainMetrics']['administration']['dailyVolume'] == 1000
+
+    # 元データは変更されない
+    assert client.get('/api/analysis').get_json()['domainMetrics']['medical']['dailyVolume'] == 1000
+
+
+def test_analysis_lru_cache_and_invalidation(client, analysis_domains, monkeypatch):
+    """正規化したパラメータでキャッシュし、上限を超えると古いものから捨て、domains.json 更新で破棄する"""
+    monkeypatch.setitem(api.app.config, 'ANALYSIS_CACHE_SIZE', 2)
+
+    client.get('/api/analysis?mode=ai&costPerHour=4000')
+    client.get('/api/analysis?costPerHour=4000.0&mode=ai')
+    assert (api._analysis_cache['hits'], api._analysis_cache['misses']) == (1, 1)
+
+    client.get('/api/analysis?mode=plain')
+    client.get('/api/analysis?mode=smart')
+    assert len(api._analysis_cache['entries']) == 2
+    assert ('analysis', ('ai', 4000.0, ())) not in api._analysis_cache['entries']
+
+    write_analysis_domains(analysis_domains, daily_volume=5000)
+    stat = analysis_domains.stat()
+    os.utime(analysis_domains, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    data = client.get('/api/analysis?mode=smart').get_json()
+    assert data['domainMetrics']['medical']['dailyVolume'] == 5000
+    assert len(api._analysis_cache['entries']) == 1
+
+
+def test_optimize_within_budget(client, analysis_domains):
+    """予算内で最も効果の大きいモードの組み合わせを返し、結果はキャッシュされる"""
+    data = json.loads(analysis_domains.read_text(encoding='utf-8'))
+    for domain in data['domains']:
+        domain['demoMetrics']['implementationCost'] = {'plain': 1_000_000, 'smart': 5_000_000, 'ai': 20_000_000}
+    analysis_domains.write_text(json.dumps(data), encoding='utf-8')
+
+    response = client.get('/api/analysis/optimize?budget=25000000')
+    assert response.status_code == 200
+    result = response.get_json()
+    # 行政を AI にすると医療の削減率が低下しなくなるため、医療を AI にするより効果が大きい
+    assert result['domainModes'] == {'administration': 'ai', 'medical': 'smart'}
+    assert result['optimization']['spend'] == 25_000_000
+
+    assert client.get('/api/analysis/optimize?budget=25000000&objective=cost').get_json() == result
+    assert api._analysis_cache['hits'] == 1
+
+    response = client.get('/api/analysis/optimize?budget=1000')
+    assert response.status_code == 400
+    assert client.get('/api/analysis/optimize').status_code == 400
+    assert client.get('/api/analysis/optimize?budget=1e9&objective=fun').status_code == 400
+
+
+@pytest.mark.parametrize('query', [
+    'mode=turbo',
+    'costPerHour=abc',
+    'costPerHour=-1',
+    'dailyVolume.unknown=10',
+    'reductionRate.medical=1.5',
+    'unknownParam=1',
+])
+def test_analysis_rejects_invalid_params(client, analysis_domains, query):
+    response = client.get(f'/api/analysis?{query}')
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+# ----- 条件付きGET -----
+
+@pytest.mark.parametrize('url', [
+    '/api/domains',
+    '/api/characters',
+    '/api/flows/questions',
+    '/api/statistics/summary',
+    '/api/domains/administration/documents',
+])
+def test_conditional_get_returns_304(client, url):
+    """ETag / Last-Modified による条件付きGETで 304 が返る"""
+    response = client.get(url)
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    assert response.headers['Last-Modified']
+    assert 'no-cache' in response.headers['Cache-Control']
+
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+
+    response = client.get(url, headers={'If-None-Match': '"stale"'})
+    assert response.status_code == 200
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+非同期版APIサーバー（async_app.py）のユニットテスト
+
+Flask 版（app.py）と同じ本文・ステータス・ETag を返すことを確認する。
+
+Usage:
+    python -m pytest backend/test_async_app.py
+"""
+
+import asyncio
+import json
+import os
+import threading
+
+import pytest
+
+pytest.importorskip('quart')
+pytest.importorskip('aiofiles')
+
+import app as api
+import async_app
+
+
+URLS = [
+    '/api/domains',
+    '/api/domains/administration',
+    '/api/domains/unknown',
+    '/api/domains/administration/documents',
+    '/api/domains?fields=name,emoji&limit=3',
+    '/api/domains/administration/documents?fields=name&limit=5',
+    '/api/domains/unknown/documents',
+    '/api/domains/unknown/documents?fields=name&limit=5',
+    '/api/domains?fields=unknown',
+    '/api/characters',
+    '/api/characters/housewife',
+    '/api/characters/unknown',
+    '/api/flows/questions',
+    '/api/statistics/summary',
+    '/api/search?q=%E4%BD%8F%E6%89%80&limit=3',  # q=住所
+    '/api/search?q=%E7%94%B3%E8%AB%8B%E6%9B%B8&kind=document',  # q=申請書
+    '/api/search?q=',
+    '/api/fields/union?domains=administration,medical',
+    '/api/fields/union?documents=unknown',
+    '/api/fields/name/documents',
+    '/api/fields/unknown/documents',
+]
+
+
+@pytest.fixture
+def flask_client(monkeypatch):
+    """比較用の Flask 版クライアント（事前生成スナップショットは使わない）"""
+    api.app.config['TESTING'] = True
+    monkeypatch.setitem(api.app.config, 'API_SNAPSHOT_DIR', None)
+    return api.app.test_client()
+
+
+@pytest.fixture
+def get():
+    """非同期版に GET リクエストを送り、(レスポンス, 本文) を返す"""
+    async_app.app.config['TESTING'] = True
+    async_app._response_cache.clear()
+
+    def request(url, headers=None):
+        async def run():
+            response = await async_app.app.test_client().get(url, headers=headers or {})
+            return response, await response.get_data()
+        return asyncio.run(run())
+    return request
+
+
+@pytest.mark.parametrize('accept_encoding', ['', 'gzip'])
+@pytest.mark.parametrize('url', URLS)
+def test_responses_match_flask_app(flask_client, get, url, accept_encoding):
+    """全ルートで Flask 版と同じステータス・本文・ETag・Content-Encoding を返す"""
+    headers = {'Accept-Encoding': accept_encoding}
+    expected = flask_client.get(url, headers=headers)
+    response, body = get(url, headers)
+
+    assert response.status_code == expected.status_code
+    assert body == expected.data
+    assert response.headers.get('ETag') == expected.headers.get('ETag')
+    assert response.headers.get('Content-Encoding') == expected.headers.get('Content-Encoding')
+
+
+def test_health_check(get):
+    response, body = get('/api/health')
+    data = json.loads(body)
+    assert response.status_code == 200
+    assert data['status'] == 'ok'
+    assert 'dbPool' in data
+
+
+@pytest.mark.parametrize('url', ['/api/domains', '/api/characters', '/api/statistics/summary'])
+def test_conditional_get_returns_304(get, url):
+    response, _ = get(url)
+    etag = response.headers['ETag']
+
+    response, body = get(url, {'If-None-Match': etag})
+    assert response.status_code == 304
+    assert body == b''
+
+
+def test_queries_run_off_event_loop_thread(get, monkeypatch):
+    """DBアクセスはイベントループのスレッドではなくスレッドプールで行う"""
+    threads = []
+    acquire = api.db_pool.acquire
+
+    def traced_acquire():
+        threads.append(threading.get_ident())
+        return acquire()
+    monkeypatch.setattr(api.db_pool, 'acquire', traced_acquire)
+
+    loop_threads = []
+
+    async def run():
+        loop_threads.append(threading.get_ident())
+        response = await async_app.app.test_client().get('/api/characters')
+        return response.status_code
+
+    assert asyncio.run(run()) == 200
+    assert threads and loop_threads[0] not in threads
+
+
+def test_domains_cache_reloads_when_file_changes(get, tmp_path, monkeypatch):
+    """domains.json は変更時のみ非同期に再読み込みする"""
+    json_path = tmp_path / 'domains.json'
+    json_path.write_text(json.dumps({'domains': [{'id': 'a'}]}), encoding='utf-8')
+    monkeypatch.setattr(api, 'DOMAINS_JSON_PATH', json_path)
+    monkeypatch.setattr(async_app, '_domains_cache', None)
+
+    _, body = get('/api/domains')
+    cache = async_app._domains_cache
+    assert json.loads(body)['meta']['demoMetaInfo']['costPerHour'] == 3000
+    get('/api/domains')
+    assert async_app._domains_cache is cache
+
+    json_path.write_text(json.dumps({'domains': [{'id': 'a'}, {'id': 'b'}]}), encoding='utf-8')
+    stat = json_path.stat()
+    os.utime(json_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    _, body = get('/api/domains')
+    assert async_app._domains_cache is not cache
+    assert [d['id'] for d in json.loads(body)['domains']] == ['a', 'b']
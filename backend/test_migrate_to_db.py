@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+マイグレーションスクリプトのユニットテスト
+
+Usage:
+    python -m pytest backend/test_migrate_to_db.py
+"""
+
+import copy
+import sqlite3
+
+import pytest
+
+import migrate_to_db as migrate
+
+
+DOMAINS = {'domains': [
+    {
+        'id': 'administration', 'name': '行政', 'emoji': '🏛️',
+        'demoMetrics': {'reductionRates': {'plain': 0, 'smart': 0.35, 'ai': 0.8}},
+        'documents': {'basic': [
+            {'id': 'doc-a', 'name': '住民票', 'inputFields': [
+                {'id': 'name', 'label': '氏名', 'source': 'user'},
+                {'id': 'address', 'label': '住所', 'source': 'user'},
+            ]},
+        ]},
+    },
+    {
+        'id': 'medical', 'name': '医療', 'emoji': '🏥',
+        'documents': {'basic': [
+            {'id': 'doc-b', 'name': '診断書', 'inputFields': [
+                {'id': 'name', 'label': '氏名', 'source': 'user'},
+            ]},
+        ]},
+    },
+]}
+
+CHARACTERS = {'characters': [
+    {'id': 'housewife', 'name': '田中 花子', 'pain_points': ['同じ情報を何度も書かされる'],
+     'domains': {'administration': {'priority': 'high', 'tasks': ['住民票の異動']}}},
+    {'id': 'student', 'name': '佐藤 太郎', 'pain_points': [], 'domains': {}},
+]}
+
+FLOWS = {'baseQuestions': [
+    {'id': 'name', 'label': '氏名', 'type': 'text', 'required': True},
+    {'id': 'gender', 'label': '性別', 'type': 'select',
+     'options': [{'value': 'm', 'label': '男性'}, {'value': 'f', 'label': '女性'}]},
+]}
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    """一時ディレクトリのDBに移行させる"""
+    path = tmp_path / 'dx_ai_model.db'
+    monkeypatch.setattr(migrate, 'DB_PATH', path)
+    return path
+
+
+def dump_tables(path):
+    """比較用に主要テーブルの内容を取得（自動採番IDやタイムスタンプを除く）"""
+    conn = sqlite3.connect(path)
+    queries = {
+        'domains': 'SELECT id, name, emoji FROM domains ORDER BY id',
+        'documents': 'SELECT id, domain_id, name, category FROM documents ORDER BY id',
+        'input_fields': '''SELECT document_id, field_id, label, field_order FROM input_fields
+                           ORDER BY document_id, field_order''',
+        'demo_metrics': 'SELECT domain_id, mode, reduction_rate FROM demo_metrics ORDER BY domain_id, mode',
+        'characters': 'SELECT id, name FROM characters ORDER BY id',
+        # APIが返す順（characters.json の順）
+        'character_order': 'SELECT id FROM characters ORDER BY character_order, rowid',
+        'pain_points': 'SELECT character_id, pain_point FROM character_pain_points ORDER BY character_id',
+        'tasks': '''SELECT cd.character_id, cd.domain_id, ct.task FROM character_tasks ct
+                    JOIN character_domains cd ON cd.id = ct.character_domain_id ORDER BY 1, 2, 3''',
+        'questions': 'SELECT id, label, question_order FROM flow_questions ORDER BY id',
+        'options': 'SELECT question_id, value, option_order FROM flow_question_options ORDER BY 1, 3',
+        'stats': 'SELECT name, value FROM stats ORDER BY name',
+        'field_postings': '''SELECT k.field_id, k.document_count, k.domain_count, p.document_id, p.domain_id, p.source
+                             FROM field_postings p JOIN field_keys k ON k.id = p.field_key ORDER BY 1, 4''',
+        'search_index': 'SELECT kind, domain_id, document_id, field_id, character_id, title FROM search_index ORDER BY 1, 2, 3, 4, 5, 6',
+    }
+    try:
+        return {name: conn.execute(sql).fetchall() for name, sql in queries.items()}
+    finally:
+        conn.close()
+
+
+def test_full_migration_replaces_db_atomically(db_path):
+    """全データ移行は一時ファイルで構築してから差し替え、WAL モードになる"""
+    results = migrate.run_migration(DOMAINS, CHARACTERS, FLOWS)
+
+    assert results['domains'] == (2, 0, 0, 0)
+    assert not migrate.temp_path_for(db_path).exists()
+    conn = sqlite3.connect(db_path)
+    assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    # 統計サマリーの件数を stats テーブルに書き込む
+    assert dict(conn.execute('SELECT name, value FROM stats')) == {
+        'domains': 2, 'documents': 2, 'fields': 3, 'characters': 2
+    }
+    # 全文検索インデックスに書類・入力項目・タスク・痛み点を登録する
+    assert dict(conn.execute('SELECT kind, COUNT(*) FROM search_index GROUP BY kind')) == {
+        'document': 2, 'field': 3, 'task': 1, 'painPoint': 1
+    }
+    assert conn.execute(
+        "SELECT domain_id, document_id, field_id FROM search_index WHERE search_index MATCH '\"住所\"'"
+    ).fetchall() == []  # 2文字の語は trigram では一致しない（API側で LIKE を使う）
+    assert conn.execute(
+        "SELECT character_id, title FROM search_index WHERE search_index MATCH '\"住民票の\"'"
+    ).fetchall() == [('housewife', '住民票の異動')]
+    # 入力項目の転置インデックス（field_id ごとに0始まりの連番）
+    assert conn.execute('SELECT id, field_id, document_count, domain_count FROM field_keys ORDER BY id').fetchall() == [
+        (0, 'address', 1, 1), (1, 'name', 2, 2)
+    ]
+    assert conn.execute('SELECT field_key, document_id, domain_id FROM field_postings').fetchall() == [
+        (0, 'doc-a', 'administration'), (1, 'doc-a', 'administration'), (1, 'doc-b', 'medical')
+    ]
+    conn.close()
+
+
+def test_bulk_load_large_dataset(db_path):
+    """大量の書類・入力項目をまとめて投入し、インデックスは投入後に作成される"""
+    domains = {'domains': [
+        {'id': f'city{d}', 'name': f'自治体{d}', 'documents': {'basic': [
+            {'id': f'city{d}-doc{i}', 'name': f'書類{i}', 'inputFields': [
+                {'id': f'field{f}', 'label': f'項目{f}', 'source': 'user'} for f in range(20)
+            ]} for i in range(10)
+        ]}} for d in range(50)
+    ]}
+    characters = {'characters': [
+        {'id': f'char{c}', 'name': f'ペルソナ{c}',
+         'domains': {f'city{d}': {'tasks': ['申請', '届出']} for d in range(3)}} for c in range(100)
+    ]}
+
+    migrate.run_migration(domains, characters, FLOWS)
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute('SELECT COUNT(*) FROM input_fields').fetchone()[0] == 50 * 10 * 20
+    assert conn.execute('SELECT COUNT(*) FROM character_tasks').fetchone()[0] == 100 * 3 * 2
+    # タスクは事前採番した character_domains の ID を参照している
+    orphan_tasks = conn.execute('''
+        SELECT COUNT(*) FROM character_tasks ct
+        LEFT JOIN character_domains cd ON cd.id = ct.character_domain_id
+        WHERE cd.id IS NULL
+    ''').fetchone()[0]
+    assert orphan_tasks == 0
+    indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {'idx_input_fields_document', 'idx_tasks_character_domain'} <= indexes
+    conn.close()
+
+
+def test_incremental_migration_applies_only_changes(db_path, tmp_path, monkeypatch):
+    """差分マイグレーションは変更された要素のみ反映し、結果は全データ移行と一致する"""
+    migrate.run_migration(DOMAINS, CHARACTERS, FLOWS)
+
+    # 変更がなければ何も反映しない（冪等）
+    results = migrate.run_migration(DOMAINS, CHARACTERS, FLOWS, incremental=True)
+    assert results == {'domains': (0, 0, 0, 2), 'characters': (0, 0, 0, 2), 'flows': (0, 0, 0, 2)}
+
+    domains = copy.deepcopy(DOMAINS)
+    domains['domains'][0]['documents']['basic'][0]['inputFields'].pop()
+    domains['domains'][1]['documents']['basic'].append({'id': 'doc-c', 'name': '紹介状', 'inputFields': []})
+    characters = {'characters': CHARACTERS['characters'][:1]}
+    flows = {'baseQuestions': FLOWS['baseQuestions'] + [{'id': 'age', 'label': '年齢', 'type': 'number'}]}
+
+    results = migrate.run_migration(domains, characters, flows, incremental=True)
+    assert results == {'domains': (0, 2, 0, 0), 'characters': (0, 0, 1, 1), 'flows': (1, 0, 0, 2)}
+    incremental_tables = dump_tables(db_path)
+
+    # 同じデータを全データ移行した結果と比較
+    full_path = tmp_path / 'full.db'
+    monkeypatch.setattr(migrate, 'DB_PATH', full_path)
+    migrate.run_migration(domains, characters, flows)
+    assert incremental_tables == dump_tables(full_path)
+
+
+def test_incremental_migration_keeps_json_order(db_path, tmp_path, monkeypatch):
+    """並び替えたペルソナ・追加したペルソナも、全データ移行と同じ順で返る"""
+    migrate.run_migration(DOMAINS, CHARACTERS, FLOWS)
+
+    characters = {'characters': [
+        {'id': 'newbie', 'name': '新人'},
+        *reversed(CHARACTERS['characters']),
+    ]}
+    migrate.run_migration(DOMAINS, characters, FLOWS, incremental=True)
+    incremental_tables = dump_tables(db_path)
+
+    full_path = tmp_path / 'full.db'
+    monkeypatch.setattr(migrate, 'DB_PATH', full_path)
+    migrate.run_migration(DOMAINS, characters, FLOWS)
+    assert incremental_tables['character_order'] == [('newbie',), ('student',), ('housewife',)]
+    assert incremental_tables == dump_tables(full_path)
+
+
+def test_incremental_migration_upgrades_old_schema(db_path, tmp_path, monkeypatch):
+    """後から追加したテーブルのない古いDBでも、差分マイグレーションで schema.sql のテーブルが作られる"""
+    migrate.run_migration(DOMAINS, CHARACTERS, FLOWS)
+    conn = sqlite3.connect(db_path)
+    for table in ('source_hashes', 'stats', 'search_index', 'field_postings', 'field_keys'):
+        conn.execute(f'DROP TABLE {table}')
+    conn.execute('ALTER TABLE characters DROP COLUMN character_order')
+    conn.commit()
+    conn.close()
+
+    migrate.run_migration(DOMAINS, CHARACTERS, FLOWS, incremental=True)
+
+    full_path = tmp_path / 'full.db'
+    monkeypatch.setattr(migrate, 'DB_PATH', full_path)
+    migrate.run_migration(DOMAINS, CHARACTERS, FLOWS)
+    assert dump_tables(db_path) == dump_tables(full_path)
+
+def test_failed_migration_keeps_existing_db(db_path):
+    """移行に失敗した場合は既存のDBを残し、一時ファイルを破棄する"""
+    migrate.run_migration(DOMAINS, CHARACTERS, FLOWS)
+    before = dump_tables(db_path)
+
+    broken = {'domains': [{'id': 'broken'}]}  # name がない
+    with pytest.raises(KeyError):
+        migrate.run_migration(broken, CHARACTERS, FLOWS, incremental=True)
+
+    assert dump_tables(db_path) == before
+    assert not migrate.temp_path_for(db_path).exists()
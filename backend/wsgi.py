@@ -0,0 +1,15 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本番用 WSGI エントリポイント
+
+Usage:
+    cd backend && gunicorn -c gunicorn.conf.py wsgi:app
+
+gunicorn.conf.py の preload_app により、マスタープロセスで1回だけ読み込まれ、
+キャッシュ（APIレスポンス・HTMLページ・圧縮版）を生成してからワーカーを fork する。
+"""
+
+from app import app, preload_caches
+
+preload_caches()
@@ -0,0 +1,112 @@
+"""書類一覧クエリ（backend/app.py の query_domain_documents）のベンチマーク。
+
+1書類あたりの入力項目数を変えた合成DBを作り、入力項目を json_group_array で1つの配列に
+集約する現在の実装と、GROUP_CONCAT で '||' 区切りに連結して項目ごとに json.loads する
+旧実装の処理時間を比べる。
+
+Usage:
+    python tools/benchmark_documents_query.py
+    python tools/benchmark_documents_query.py --documents 50 --fields 10 100 500 --repeat 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT / "backend"))
+
+from app import query_domain_documents  # noqa: E402
+
+SCHEMA_PATH = REPO_ROOT / "backend" / "schema.sql"
+
+
+def build_db(documents: int, fields: int) -> sqlite3.Connection:
+    """documents 件の書類それぞれに fields 件の入力項目を持つインメモリDB"""
+    conn = sqlite3.connect(":memory:")
+    conn.executescript(SCHEMA_PATH.read_text(encoding="utf-8"))
+    conn.execute("INSERT INTO domains (id, name) VALUES ('bench', 'ベンチマーク')")
+    conn.executemany(
+        "INSERT INTO documents (id, domain_id, name, category) VALUES (?, 'bench', ?, 'basic')",
+        [(f"doc{d}", f"書類{d}") for d in range(documents)],
+    )
+    conn.executemany(
+        "INSERT INTO input_fields (document_id, field_id, label, source, field_order) VALUES (?, ?, ?, 'user', ?)",
+        [(f"doc{d}", f"field{f}", f"入力項目{f}", f) for d in range(documents) for f in range(fields)],
+    )
+    conn.commit()
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def query_group_concat(conn: sqlite3.Connection, domain_id: str) -> list[dict]:
+    """旧実装（GROUP_CONCAT で連結し、'||' で分割して項目ごとにデコード）"""
+    cursor = conn.execute(
+        """
+        SELECT d.*,
+               GROUP_CONCAT(
+                   json_object('id', f.field_id, 'label', f.label, 'source', f.source, 'requiredIf', f.required_if),
+                   '||'
+               ) AS input_fields_json
+        FROM documents d
+        LEFT JOIN input_fields f ON d.id = f.document_id
+        WHERE d.domain_id = ?
+        GROUP BY d.id
+        ORDER BY d.category, d.name
+        """,
+        (domain_id,),
+    )
+    documents = []
+    for row in cursor:
+        doc = dict(row)
+        fields_str = doc.pop("input_fields_json")
+        doc["inputFields"] = [json.loads(f) for f in fields_str.split("||")] if fields_str else []
+        documents.append(doc)
+    return documents
+
+
+def best_time(func, conn: sqlite3.Connection, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(conn, "bench")
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def benchmark(documents: int, fields: int, repeat: int) -> dict:
+    conn = build_db(documents, fields)
+    try:
+        return {
+            "documents": documents,
+            "fields": fields,
+            "json_group_array_ms": best_time(query_domain_documents, conn, repeat) * 1000,
+            "group_concat_ms": best_time(query_group_concat, conn, repeat) * 1000,
+        }
+    finally:
+        conn.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="書類一覧クエリのベンチマーク")
+    parser.add_argument("--documents", type=int, default=20, help="書類数")
+    parser.add_argument("--fields", type=int, nargs="+", default=[10, 100, 500], help="1書類あたりの入力項目数")
+    parser.add_argument("--repeat", type=int, default=10, help="繰り返し回数（最速値を表示）")
+    args = parser.parse_args()
+
+    print(f"{'書類数':>6} {'項目数':>6} {'json_group_array':>18} {'GROUP_CONCAT':>14}")
+    for fields in args.fields:
+        result = benchmark(args.documents, fields, args.repeat)
+        print(
+            f"{result['documents']:>9} {result['fields']:>9} "
+            f"{result['json_group_array_ms']:>15.2f} ms {result['group_concat_ms']:>11.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""起動済みのAPIサーバーにHTTPリクエストを並行して送り、スループットとレイテンシを測る。
+
+各クライアントスレッドは1本の Keep-Alive 接続を使い回す（標準ライブラリのみ使用）。
+
+Usage:
+    python tools/benchmark_server.py --url http://127.0.0.1:5000 --concurrency 16 --duration 10
+    python tools/benchmark_server.py --path /api/characters --path /api/domains --gzip
+"""
+
+from __future__ import annotations
+
+import argparse
+import http.client
+import threading
+import time
+from urllib.parse import urlsplit
+
+DEFAULT_PATHS = ["/api/domains", "/api/characters", "/api/statistics/summary", "/home.html"]
+
+
+def run_client(host: str, port: int, paths: list[str], headers: dict, deadline: float, results: list) -> None:
+    latencies: list[float] = []
+    errors = 0
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    i = 0
+    while time.perf_counter() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            conn.request("GET", path, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                errors += 1
+            if response.getheader("Connection", "").lower() == "close":
+                conn.close()
+                conn = http.client.HTTPConnection(host, port, timeout=30)
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=30)
+            continue
+        latencies.append(time.perf_counter() - start)
+    conn.close()
+    results.append((latencies, errors))
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def benchmark(url: str, paths: list[str], concurrency: int, duration: float, accept_encoding: str | None) -> dict:
+    parts = urlsplit(url)
+    headers = {"Accept-Encoding": accept_encoding} if accept_encoding else {}
+    deadline = time.perf_counter() + duration
+    results: list = []
+
+    threads = [
+        threading.Thread(target=run_client, args=(parts.hostname, parts.port or 80, paths, headers, deadline, results))
+        for _ in range(concurrency)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for client_latencies, _ in results for latency in client_latencies)
+    return {
+        "requests": len(latencies),
+        "errors": sum(errors for _, errors in results),
+        "elapsed": elapsed,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="APIサーバーの簡易ベンチマーク")
+    parser.add_argument("--url", default="http://127.0.0.1:5000", help="サーバーのURL")
+    parser.add_argument("--path", action="append", dest="paths", help="リクエストするパス（複数指定可）")
+    parser.add_argument("--concurrency", type=int, default=16, help="並行クライアント数")
+    parser.add_argument("--duration", type=float, default=10, help="計測時間（秒）")
+    parser.add_argument("--gzip", action="store_true", help="Accept-Encoding: gzip を付ける")
+    args = parser.parse_args()
+
+    result = benchmark(args.url, args.paths or DEFAULT_PATHS, args.concurrency, args.duration,
+                       "gzip" if args.gzip else None)
+    print(
+        f"{result['requests']:,} requests in {result['elapsed']:.1f}s, {result['errors']} errors: "
+        f"{result['rps']:,.0f} req/s, p50 {result['p50_ms']:.1f} ms, p99 {result['p99_ms']:.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import shutil
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+BACKEND_DIR = REPO_ROOT / "backend"
+
+
+def load_api():
+    """backend/app.py を読み込む（レスポンスは実際のエンドポイントで生成する）"""
+    if str(BACKEND_DIR) not in sys.path:
+        sys.path.insert(0, str(BACKEND_DIR))
+    import app as api
+
+    return api
+
+
+def list_snapshot_paths(api) -> list[str]:
+    """スナップショット対象の全パス（ドメイン・ペルソナごとのパスを含む）"""
+    return api.list_cacheable_api_paths()
+
+
+def build_snapshot(output_dir: Path, with_gzip: bool = True, with_brotli: bool = True) -> dict:
+    api = load_api()
+    # 古いスナップショット自体を配信しないよう無効化して生成する
+    api.app.config["API_SNAPSHOT_DIR"] = None
+    client = api.app.test_client()
+
+    # 一時ディレクトリに生成してから差し替える（稼働中のサーバーが生成途中のファイルを読まないように）
+    final_dir = output_dir
+    output_dir = final_dir.with_name(final_dir.name + ".tmp")
+    if output_dir.exists():
+        shutil.rmtree(output_dir)
+    (output_dir / "bodies").mkdir(parents=True)
+
+    entries: dict[str, dict] = {}
+    for index, path in enumerate(list_snapshot_paths(api)):
+        response = client.get(path)
+        if response.status_code != 200:
+            raise RuntimeError(f"{path}: HTTP {response.status_code}")
+
+        body = response.get_data()
+        name = f"bodies/{index:04d}.json"
+        (output_dir / name).write_bytes(body)
+        entry = {"file": name, "etag": api.make_etag(body), "gzip": None, "br": None}
+
+        if with_gzip:
+            gzip_name = f"{name}.gz"
+            # mtime=0 で出力を再現可能にする
+            (output_dir / gzip_name).write_bytes(gzip.compress(body, compresslevel=9, mtime=0))
+            entry["gzip"] = gzip_name
+
+        # brotli は任意の依存（未インストールなら出力しない）
+        if with_brotli and api.brotli is not None:
+            br_name = f"{name}.br"
+            (output_dir / br_name).write_bytes(api.brotli.compress(body, quality=11))
+            entry["br"] = br_name
+
+        entries[path] = entry
+
+    manifest = {
+        "generatedAt": datetime.now(timezone.utc).isoformat(),
+        "sources": {
+            "code": api.API_CODE_VERSION,
+            "database": api.sha256_file(api.DB_PATH),
+            "domains": api.sha256_file(api.DOMAINS_JSON_PATH),
+        },
+        "entries": entries,
+    }
+    (output_dir / "manifest.json").write_text(
+        json.dumps(manifest, ensure_ascii=False, indent=2),
+        encoding="utf-8",
+    )
+
+    old_dir = final_dir.with_name(final_dir.name + ".old")
+    if final_dir.exists():
+        final_dir.rename(old_dir)
+    output_dir.rename(final_dir)
+    if old_dir.exists():
+        shutil.rmtree(old_dir)
+    return manifest
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="全読み取りAPIのレスポンスを事前生成する")
+    parser.add_argument("--output", type=Path, default=BACKEND_DIR / "api_snapshot")
+    parser.add_argument("--no-gzip", action="store_true", help="gzip 圧縮版を出力しない")
+    parser.add_argument("--no-brotli", action="store_true", help="brotli 圧縮版を出力しない")
+    args = parser.parse_args()
+
+    manifest = build_snapshot(args.output, with_gzip=not args.no_gzip, with_brotli=not args.no_brotli)
+    print(f"✓ {len(manifest['entries'])}件のレスポンスを {args.output} に出力しました")
+
+
+if __name__ == "__main__":
+    main()
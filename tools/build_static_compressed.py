@@ -0,0 +1,101 @@
+"""assets/ 配下の静的ファイルの事前圧縮版（.gz / .br）を生成する。
+
+backend/app.py はクライアントが受け付ける場合、元ファイルより新しい圧縮版をそのまま配信する。
+brotli がインストールされていない場合は .gz のみ生成する。
+
+Usage:
+    python tools/build_static_compressed.py
+    python tools/build_static_compressed.py --clean   # 圧縮版を削除
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+from pathlib import Path
+from typing import Callable
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+ASSETS_DIR = REPO_ROOT / "assets"
+
+# 圧縮する拡張子（画像などの圧縮済みの形式は対象外）
+COMPRESSIBLE_SUFFIXES = {".css", ".js", ".json", ".html", ".svg", ".txt", ".map"}
+COMPRESSED_SUFFIXES = (".gz", ".br")
+
+# これより小さいファイルは圧縮しない（バイト）
+MIN_SIZE = 1024
+
+
+def compressors() -> dict[str, Callable[[bytes], bytes]]:
+    available = {".gz": lambda data: gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        available[".br"] = lambda data: brotli.compress(data, quality=11)
+    return available
+
+
+def iter_sources(assets_dir: Path):
+    for path in sorted(assets_dir.rglob("*")):
+        if path.is_file() and path.suffix in COMPRESSIBLE_SUFFIXES:
+            yield path
+
+
+def build(assets_dir: Path = ASSETS_DIR, force: bool = False) -> list[Path]:
+    """更新が必要な圧縮版を生成し、書き出したファイルの一覧を返す"""
+    written = []
+    for source in iter_sources(assets_dir):
+        stat = source.stat()
+        if stat.st_size < MIN_SIZE:
+            continue
+        data = None
+        for suffix, compress in compressors().items():
+            target = source.with_name(source.name + suffix)
+            if not force and target.exists() and target.stat().st_mtime_ns >= stat.st_mtime_ns:
+                continue
+            if data is None:
+                data = source.read_bytes()
+            compressed = compress(data)
+            if len(compressed) >= len(data):
+                continue  # 小さくならないなら元ファイルを配信させる
+            tmp = target.with_name(target.name + ".tmp")
+            tmp.write_bytes(compressed)
+            tmp.replace(target)
+            written.append(target)
+    return written
+
+
+def clean(assets_dir: Path = ASSETS_DIR) -> list[Path]:
+    removed = []
+    for source in iter_sources(assets_dir):
+        for suffix in COMPRESSED_SUFFIXES:
+            target = source.with_name(source.name + suffix)
+            if target.exists():
+                target.unlink()
+                removed.append(target)
+    return removed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="静的ファイルの事前圧縮版（.gz / .br）を生成する")
+    parser.add_argument("--assets", type=Path, default=ASSETS_DIR, help="対象ディレクトリ")
+    parser.add_argument("--force", action="store_true", help="最新の圧縮版も作り直す")
+    parser.add_argument("--clean", action="store_true", help="圧縮版を削除する")
+    args = parser.parse_args()
+
+    if args.clean:
+        removed = clean(args.assets)
+        print(f"✓ {len(removed)}件の圧縮版を削除しました")
+        return
+
+    written = build(args.assets, force=args.force)
+    if brotli is None:
+        print("ℹ️ brotli が未インストールのため .gz のみ生成します（pip install brotli）")
+    print(f"✓ {len(written)}件の圧縮版を {args.assets} に出力しました")
+
+
+if __name__ == "__main__":
+    main()
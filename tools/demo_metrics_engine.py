@@ -0,0 +1,263 @@
+"""compute_metrics_for_mode の列指向（NumPy）版。
+
+全ドメインの demoMetrics を一度だけ配列に詰め、3モードとパラメータ上書きのバッチ（シナリオ）を
+1回のベクトル演算で評価する。結果はスカラー版と完全に一致する（round の偶数丸め、
+1000円単位のコスト丸め、行政DXによる低下を含む）。
+
+    engine = DemoMetricsEngine(domains, meta)
+    batch = engine.evaluate(cost_per_hour=np.linspace(2000, 5000, 1000))
+    batch.total_cost_saving  # shape (1000, 3)
+    batch.to_result(0, "smart")  # compute_metrics_for_mode と同じ形の dict
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from build_demo_analysis import build_admin_impact_message, safe_number
+
+MODES = ("plain", "smart", "ai")
+
+ADMIN_DOMAIN_ID = "administration"
+ADMIN_DEGRADATION_FACTOR = 0.3
+
+
+@dataclass
+class MetricsBatch:
+    """evaluate() の結果。ドメイン別の配列は (シナリオ, モード, ドメイン)、合計は (シナリオ, モード)。"""
+
+    engine: "DemoMetricsEngine"
+    modes: tuple[str, ...]
+    cost_per_hour: np.ndarray
+    daily_volume: np.ndarray
+    reduction_rate: np.ndarray
+    time_reduction_rate: np.ndarray
+    cost_reduction_rate: np.ndarray
+    processed_after: np.ndarray
+    time_before: np.ndarray
+    time_after: np.ndarray
+    cost_before: np.ndarray
+    cost_after: np.ndarray
+    total_daily_volume: np.ndarray
+    total_processed_after: np.ndarray
+    total_time_before: np.ndarray
+    total_time_after: np.ndarray
+    total_cost_before: np.ndarray
+    total_cost_after: np.ndarray
+
+    @property
+    def scenario_count(self) -> int:
+        return self.total_daily_volume.shape[0]
+
+    @property
+    def total_reduction_rate(self) -> np.ndarray:
+        volume = self.total_daily_volume
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rate = 1 - (self.total_processed_after / volume)
+        return np.where(volume != 0, rate, 0.0)
+
+    @property
+    def total_time_saving(self) -> np.ndarray:
+        return self.total_time_before - self.total_time_after
+
+    @property
+    def total_cost_saving(self) -> np.ndarray:
+        return self.total_cost_before - self.total_cost_after
+
+    def to_result(self, scenario: int, mode: str) -> dict:
+        """1シナリオ・1モード分を compute_metrics_for_mode と同じ形の dict に変換"""
+        s = scenario
+        m = self.modes.index(mode)
+        engine = self.engine
+
+        domain_metrics: dict[str, dict] = {}
+        for d, domain_id in enumerate(engine.domain_ids):
+            daily_volume = float(self.daily_volume[s, 0, d])
+            domain_metrics[domain_id] = {
+                "id": domain_id,
+                "name": engine.names[d],
+                "emoji": engine.emojis[d],
+                "dailyVolume": daily_volume,
+                "processedBefore": daily_volume,
+                "processedAfter": int(self.processed_after[s, m, d]),
+                "timeBefore": int(self.time_before[s, 0, d]),
+                "timeAfter": int(self.time_after[s, m, d]),
+                "costBefore": int(self.cost_before[s, 0, d]),
+                "costAfter": int(self.cost_after[s, m, d]),
+                "reductionRate": float(self.reduction_rate[s, m, d]),
+                "timeReductionRate": float(self.time_reduction_rate[s, m, d]),
+                "costReductionRate": float(self.cost_reduction_rate[s, m, d]),
+                "administrativeDependency": float(engine.admin_dependency[d]),
+                "impactOnOtherDomains": engine.impacts[d],
+            }
+
+        # スカラー版は空の場合に int の 0 を返す
+        total_daily_volume = float(self.total_daily_volume[s, m]) if engine.domain_ids else 0
+
+        return {
+            "currentMode": mode,
+            "totalDailyVolume": total_daily_volume,
+            "totalReductionRate": float(self.total_reduction_rate[s, m]),
+            "totalTimeBefore": int(self.total_time_before[s, m]),
+            "totalTimeAfter": int(self.total_time_after[s, m]),
+            "totalTimeSaving": int(self.total_time_saving[s, m]),
+            "totalCostBefore": int(self.total_cost_before[s, m]),
+            "totalCostAfter": int(self.total_cost_after[s, m]),
+            "totalCostSaving": int(self.total_cost_saving[s, m]),
+            "domainMetrics": domain_metrics,
+            "adminImpactMessage": build_admin_impact_message(mode, domain_metrics),
+            "costPerHour": float(self.cost_per_hour[s, 0, 0]),
+        }
+
+
+class DemoMetricsEngine:
+    """domains.json の demoMetrics を配列に詰めたもの（モード × ドメイン）"""
+
+    def __init__(self, domains: list[dict], meta: dict, modes: tuple[str, ...] = MODES):
+        self.modes = tuple(modes)
+        self.cost_per_hour = safe_number(meta.get("demoMetaInfo", {}).get("costPerHour"), 3000)
+
+        self.domain_ids: list[str] = []
+        self.names: list = []
+        self.emojis: list = []
+        self.impacts: list[dict] = []
+        daily_volume, average_time, admin_dependency = [], [], []
+        rates: dict[str, list[list[float]]] = {
+            "reductionRates": [],
+            "timeReductionRates": [],
+            "costReductionPercentage": [],
+        }
+
+        for domain in domains:
+            metrics = domain.get("demoMetrics")
+            if not metrics:
+                continue
+
+            self.domain_ids.append(domain.get("id"))
+            self.names.append(domain.get("name"))
+            self.emojis.append(domain.get("emoji"))
+            self.impacts.append(metrics.get("impactOnOtherDomains", {}))
+            daily_volume.append(safe_number(metrics.get("dailyVolume"), 0))
+            average_time.append(safe_number(metrics.get("averageTimePerCase"), 0))
+            admin_dependency.append(safe_number(metrics.get("administrativeDependency"), 0))
+            for key, values in rates.items():
+                values.append([safe_number(metrics.get(key, {}).get(mode), 0) for mode in self.modes])
+
+        count = len(self.domain_ids)
+        self.daily_volume = np.array(daily_volume, dtype=np.float64).reshape(count)
+        self.average_time = np.array(average_time, dtype=np.float64).reshape(count)
+        self.admin_dependency = np.array(admin_dependency, dtype=np.float64).reshape(count)
+        # (モード, ドメイン)
+        self.reduction_rates = np.array(rates["reductionRates"], dtype=np.float64).reshape(count, -1).T
+        self.time_reduction_rates = np.array(rates["timeReductionRates"], dtype=np.float64).reshape(count, -1).T
+        self.cost_reduction_rates = np.array(rates["costReductionPercentage"], dtype=np.float64).reshape(count, -1).T
+
+        # 行政DXの波及効果を受ける (モード, ドメイン) の組み合わせ
+        is_admin = np.array([domain_id == ADMIN_DOMAIN_ID for domain_id in self.domain_ids], dtype=bool)
+        is_ai = np.array([mode == "ai" for mode in self.modes], dtype=bool)
+        self.degraded = ~is_ai[:, None] & ~is_admin[None, :]
+
+    def domain_index(self, domain_id: str) -> int:
+        return self.domain_ids.index(domain_id)
+
+    def evaluate(
+        self,
+        cost_per_hour=None,
+        daily_volume=None,
+        volume_scale=None,
+        average_time_per_case=None,
+        reduction_rates=None,
+        time_reduction_rates=None,
+        cost_reduction_rates=None,
+    ) -> MetricsBatch:
+        """全モード × 全シナリオを一括評価する
+
+        cost_per_hour: (S,)
+        daily_volume / average_time_per_case: (D,) または (S, D)（モード共通）
+        volume_scale: daily_volume に掛ける倍率。(S,) または (S, D)
+        reduction_rates / time_reduction_rates / cost_reduction_rates: (M, D) または (S, M, D)
+        いずれも省略時は domains.json の値。S は指定された上書きから決まる（なければ 1）。
+        """
+        count = len(self.domain_ids)
+
+        cph = self._scenario_values(cost_per_hour, self.cost_per_hour, ())
+        volume = self._scenario_values(daily_volume, self.daily_volume, (count,))
+        if volume_scale is not None:
+            scale = np.asarray(volume_scale, dtype=np.float64)
+            volume = volume * (scale[:, None] if scale.ndim == 1 else scale)
+        avg = self._scenario_values(average_time_per_case, self.average_time, (count,))
+        reduction = self._scenario_values(reduction_rates, self.reduction_rates, (len(self.modes), count))
+        time_reduction = self._scenario_values(time_reduction_rates, self.time_reduction_rates, (len(self.modes), count))
+        cost_reduction = self._scenario_values(cost_reduction_rates, self.cost_reduction_rates, (len(self.modes), count))
+
+        scenarios = np.broadcast_shapes(
+            cph.shape[:1], volume.shape[:1], avg.shape[:1],
+            reduction.shape[:1], time_reduction.shape[:1], cost_reduction.shape[:1],
+        )[0]
+
+        # (S, M, D) に揃える。モード共通の値は M=1
+        cph = np.broadcast_to(cph.reshape(-1, 1, 1), (scenarios, 1, 1))
+        volume = np.broadcast_to(volume[:, None, :], (scenarios, 1, count))
+        avg = np.broadcast_to(avg[:, None, :], (scenarios, 1, count))
+        reduction = np.broadcast_to(reduction, (scenarios, len(self.modes), count))
+        time_reduction = np.broadcast_to(time_reduction, (scenarios, len(self.modes), count))
+        cost_reduction = np.broadcast_to(cost_reduction, (scenarios, len(self.modes), count))
+
+        # 行政DXの波及効果（行政がAI以外の場合に低下）。スカラー版と同じ演算順序にする
+        degradation = self.admin_dependency * ADMIN_DEGRADATION_FACTOR
+        reduction = self._degrade(reduction, degradation, self.degraded)
+        time_reduction = self._degrade(time_reduction, degradation, self.degraded)
+        cost_reduction = self._degrade(cost_reduction, degradation, self.degraded)
+
+        # np.round はスカラー版の round と同じく偶数丸め
+        processed_after = np.round(volume * (1 - reduction))
+        time_before = np.round(avg * volume / 60)
+        time_after = np.round(avg * volume * (1 - time_reduction) / 60)
+        cost_before = np.round(time_before * cph * 21 / 1000) * 1000
+        cost_after = np.round(time_after * cph * 21 / 1000) * 1000
+
+        modes = len(self.modes)
+        return MetricsBatch(
+            engine=self,
+            modes=self.modes,
+            cost_per_hour=cph,
+            daily_volume=volume,
+            reduction_rate=reduction,
+            time_reduction_rate=time_reduction,
+            cost_reduction_rate=cost_reduction,
+            processed_after=processed_after,
+            time_before=time_before,
+            time_after=time_after,
+            cost_before=cost_before,
+            cost_after=cost_after,
+            total_daily_volume=self._sequential_sum(np.broadcast_to(volume, (scenarios, modes, count))),
+            total_processed_after=self._sequential_sum(processed_after),
+            total_time_before=self._sequential_sum(np.broadcast_to(time_before, (scenarios, modes, count))),
+            total_time_after=self._sequential_sum(time_after),
+            total_cost_before=self._sequential_sum(np.broadcast_to(cost_before, (scenarios, modes, count))),
+            total_cost_after=self._sequential_sum(cost_after),
+        )
+
+    @staticmethod
+    def _scenario_values(value, default, item_shape: tuple[int, ...]) -> np.ndarray:
+        """上書き値（省略時はデフォルト）を (S, *item_shape) の配列にする"""
+        array = np.asarray(default if value is None else value, dtype=np.float64)
+        if array.ndim == len(item_shape):
+            array = array[None, ...]
+        if array.shape[1:] != item_shape:
+            raise ValueError(f"expected shape (S, {', '.join(map(str, item_shape))}), got {array.shape}")
+        return array
+
+    @staticmethod
+    def _degrade(rate: np.ndarray, degradation: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        return np.where(mask, np.maximum(0.0, rate - (rate * degradation)), rate)
+
+    @staticmethod
+    def _sequential_sum(values: np.ndarray) -> np.ndarray:
+        # スカラー版のループと同じ順序で足す（np.sum のペアワイズ加算だと端数が変わりうる）
+        total = np.zeros(values.shape[:-1], dtype=np.float64)
+        for d in range(values.shape[-1]):
+            total = total + values[..., d]
+        return total
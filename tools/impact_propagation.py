@@ -0,0 +1,275 @@
+"""分野間の相互依存（impactOnOtherDomains / domain_dependencies）を伝播させる評価エンジン。
+
+各ドメインが個別のモード（plain / smart / ai）を持つ混在構成について、依存グラフ上で
+「実効DXレベル」の不動点を求め、削減率を調整する。
+
+    efficiency_i = MODE_EFFICIENCY[mode_i] * (1 - penalty_i)
+    penalty_i    = min(0.8, Σ_j weight(j → i) * (1 - efficiency_j))
+
+weight(j → i) は「分野 i が分野 j にどれだけ依存しているか」（j の impactOnOtherDomains[i]）。
+efficiency をモード由来の値から始めて1回だけ計算した penalty は、フロントエンド（home.js）の
+相互依存ペナルティと同じ値になる。伝播させると、依存先がさらに別の分野に足を引っ張られている
+効果まで反映される。
+
+グラフは疎（ドメイン数 D に対して辺は数十本）なので、ターゲット順に並べた辺リスト
+（転置CSR）で行列ベクトル積を行い、シナリオ方向にベクトル化する。3^9 通りの全組み合わせも
+1回のバッチで評価できる。
+
+    engine = ImpactPropagationEngine(domains, meta)
+    batch = engine.evaluate(engine.all_mode_combinations())
+    best = batch.total_cost_saving.argmax()
+    batch.to_result(best)
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from build_demo_analysis import build_admin_impact_message
+from demo_metrics_engine import MODES, DemoMetricsEngine
+
+# 依存先のモードによる効率係数（home.js と同じ）
+MODE_EFFICIENCY = {"plain": 0.0, "smart": 0.6, "ai": 1.0}
+
+# 相互依存による削減率の低下は最大80%まで
+MAX_IMPACT_PENALTY = 0.8
+
+
+def load_dependencies(db_path: Path) -> list[tuple[str, str, float]]:
+    """domain_dependencies テーブルの (source_domain_id, target_domain_id, dependency_rate) を読み込む"""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        return conn.execute(
+            "SELECT source_domain_id, target_domain_id, dependency_rate FROM domain_dependencies"
+        ).fetchall()
+    finally:
+        conn.close()
+
+
+@dataclass
+class PropagationBatch:
+    """evaluate() の結果。ドメイン別の配列は (シナリオ, ドメイン)、合計は (シナリオ,)。"""
+
+    engine: "ImpactPropagationEngine"
+    mode_indices: np.ndarray
+    efficiency: np.ndarray
+    penalty: np.ndarray
+    iterations: int
+    reduction_rate: np.ndarray
+    time_reduction_rate: np.ndarray
+    cost_reduction_rate: np.ndarray
+    processed_after: np.ndarray
+    time_after: np.ndarray
+    cost_after: np.ndarray
+    total_processed_after: np.ndarray
+    total_time_after: np.ndarray
+    total_cost_after: np.ndarray
+
+    @property
+    def scenario_count(self) -> int:
+        return self.mode_indices.shape[0]
+
+    @property
+    def total_time_saving(self) -> np.ndarray:
+        return self.engine.total_time_before - self.total_time_after
+
+    @property
+    def total_cost_saving(self) -> np.ndarray:
+        return self.engine.total_cost_before - self.total_cost_after
+
+    def domain_modes(self, scenario: int) -> dict[str, str]:
+        modes = self.engine.modes
+        return {
+            domain_id: modes[m]
+            for domain_id, m in zip(self.engine.domain_ids, self.mode_indices[scenario])
+        }
+
+    def to_result(self, scenario: int) -> dict:
+        """1シナリオ分を compute_metrics_for_mode に近い形の dict に変換
+
+        currentMode の代わりに domainModes（ドメインごとのモード）を持ち、
+        各ドメインに impactPenalty / effectiveEfficiency を追加する。
+        """
+        s = scenario
+        engine = self.engine
+        base = engine.base
+        domain_modes = self.domain_modes(s)
+
+        domain_metrics: dict[str, dict] = {}
+        for d, domain_id in enumerate(engine.domain_ids):
+            daily_volume = float(base.daily_volume[d])
+            domain_metrics[domain_id] = {
+                "id": domain_id,
+                "name": base.names[d],
+                "emoji": base.emojis[d],
+                "mode": domain_modes[domain_id],
+                "dailyVolume": daily_volume,
+                "processedBefore": daily_volume,
+                "processedAfter": int(self.processed_after[s, d]),
+                "timeBefore": int(engine.time_before[d]),
+                "timeAfter": int(self.time_after[s, d]),
+                "costBefore": int(engine.cost_before[d]),
+                "costAfter": int(self.cost_after[s, d]),
+                "reductionRate": float(self.reduction_rate[s, d]),
+                "timeReductionRate": float(self.time_reduction_rate[s, d]),
+                "costReductionRate": float(self.cost_reduction_rate[s, d]),
+                "impactPenalty": float(self.penalty[s, d]),
+                "effectiveEfficiency": float(self.efficiency[s, d]),
+                "administrativeDependency": float(base.admin_dependency[d]),
+                "impactOnOtherDomains": base.impacts[d],
+            }
+
+        total_daily_volume = engine.total_daily_volume
+        total_reduction_rate = 0.0
+        if total_daily_volume:
+            total_reduction_rate = 1 - (float(self.total_processed_after[s]) / total_daily_volume)
+
+        admin_mode = domain_modes.get("administration", "plain")
+        return {
+            "domainModes": domain_modes,
+            "totalDailyVolume": total_daily_volume,
+            "totalReductionRate": total_reduction_rate,
+            "totalTimeBefore": int(engine.total_time_before),
+            "totalTimeAfter": int(self.total_time_after[s]),
+            "totalTimeSaving": int(self.total_time_saving[s]),
+            "totalCostBefore": int(engine.total_cost_before),
+            "totalCostAfter": int(self.total_cost_after[s]),
+            "totalCostSaving": int(self.total_cost_saving[s]),
+            "domainMetrics": domain_metrics,
+            "adminImpactMessage": build_admin_impact_message(admin_mode, domain_metrics),
+            "costPerHour": float(base.cost_per_hour),
+        }
+
+
+class ImpactPropagationEngine:
+    """依存グラフ（疎）とドメイン別のベース値を保持し、モード構成のバッチを評価する"""
+
+    def __init__(
+        self,
+        domains: list[dict],
+        meta: dict,
+        dependencies: list[tuple[str, str, float]] | None = None,
+        modes: tuple[str, ...] = MODES,
+    ):
+        self.base = DemoMetricsEngine(domains, meta, modes)
+        self.modes = self.base.modes
+        self.domain_ids = self.base.domain_ids
+        self.mode_efficiency = np.array([MODE_EFFICIENCY.get(mode, 0.0) for mode in self.modes])
+
+        # 辺 (依存される側 → 依存する側) の重み。impactOnOtherDomains と domain_dependencies
+        # の両方にある辺は二重に数えず大きい方を使う
+        index = {domain_id: d for d, domain_id in enumerate(self.domain_ids)}
+        weights: dict[tuple[int, int], float] = {}
+        for j, impacts in enumerate(self.base.impacts):
+            for target_id, rate in (impacts or {}).items():
+                if target_id in index and index[target_id] != j:
+                    edge = (j, index[target_id])
+                    weights[edge] = max(weights.get(edge, 0.0), float(rate))
+        # domain_dependencies は「source が target に依存」なので target → source の辺
+        for source_id, target_id, rate in dependencies or ():
+            if source_id in index and target_id in index and source_id != target_id:
+                edge = (index[target_id], index[source_id])
+                weights[edge] = max(weights.get(edge, 0.0), float(rate))
+
+        # ターゲット順に並べた辺リスト（転置CSR）
+        edges = sorted((i, j, w) for (j, i), w in weights.items() if w > 0)
+        self.edge_targets = np.array([i for i, _, _ in edges], dtype=np.intp)
+        self.edge_sources = np.array([j for _, j, _ in edges], dtype=np.intp)
+        self.edge_weights = np.array([w for _, _, w in edges], dtype=np.float64)
+        self.targets, self.target_starts = np.unique(self.edge_targets, return_index=True)
+
+        # モードに依存しない値（計算式はスカラー版と同じ）
+        base = self.base
+        self.time_before = np.round(base.average_time * base.daily_volume / 60)
+        self.cost_before = np.round(self.time_before * base.cost_per_hour * 21 / 1000) * 1000
+        self.total_daily_volume = float(sum(base.daily_volume.tolist()))
+        self.total_time_before = sum(self.time_before.tolist())
+        self.total_cost_before = sum(self.cost_before.tolist())
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.edge_weights)
+
+    def all_mode_combinations(self) -> np.ndarray:
+        """全ドメイン × 全モードの組み合わせ (M^D, D)。先頭ドメインが最上位の桁"""
+        count = len(self.domain_ids)
+        grid = np.indices((len(self.modes),) * count, dtype=np.int8)
+        return grid.reshape(count, -1).T
+
+    def mode_indices(self, domain_modes: dict[str, str]) -> np.ndarray:
+        """{domain_id: mode} を (1, D) のモード番号に変換（未指定は plain）"""
+        return np.array(
+            [[self.modes.index(domain_modes.get(domain_id, "plain")) for domain_id in self.domain_ids]],
+            dtype=np.int8,
+        )
+
+    def impact_penalty(self, efficiency: np.ndarray) -> np.ndarray:
+        """penalty_i = min(0.8, Σ_j weight(j → i) * (1 - efficiency_j)) を (S, D) で計算"""
+        penalty = np.zeros(efficiency.shape, dtype=np.float64)
+        if self.edge_count:
+            contributions = (1 - efficiency[:, self.edge_sources]) * self.edge_weights
+            penalty[:, self.targets] = np.add.reduceat(contributions, self.target_starts, axis=1)
+        return np.minimum(MAX_IMPACT_PENALTY, penalty)
+
+    def propagate(
+        self, mode_indices: np.ndarray, max_iterations: int = 100, tolerance: float = 1e-9
+    ) -> tuple[np.ndarray, np.ndarray, int]:
+        """実効効率の不動点を反復で求める。(efficiency, penalty, 反復回数) を返す
+
+        写像は efficiency について単調増加で、初期値（モード由来の効率）が上界なので
+        反復列は単調減少して収束する。収束したシナリオは以降の反復から外す。
+        """
+        intrinsic = self.mode_efficiency[mode_indices]
+        efficiency = intrinsic.copy()
+        penalty = self.impact_penalty(efficiency)
+        active = np.arange(len(efficiency))
+        iteration = 0
+        while len(active) and iteration < max_iterations:
+            iteration += 1
+            updated = intrinsic[active] * (1 - penalty[active])
+            delta = np.max(np.abs(updated - efficiency[active]), axis=1)
+            efficiency[active] = updated
+            penalty[active] = self.impact_penalty(updated)
+            active = active[delta > tolerance]
+        return efficiency, penalty, iteration
+
+    def evaluate(self, mode_indices: np.ndarray, **propagate_options) -> PropagationBatch:
+        """モード構成 (S, D)（各要素は modes のインデックス）を一括評価する"""
+        mode_indices = np.atleast_2d(np.asarray(mode_indices))
+        if mode_indices.shape[1:] != (len(self.domain_ids),):
+            raise ValueError(f"expected shape (S, {len(self.domain_ids)}), got {mode_indices.shape}")
+
+        efficiency, penalty, iterations = self.propagate(mode_indices, **propagate_options)
+
+        base = self.base
+        columns = np.arange(len(self.domain_ids))
+        factor = 1 - penalty
+        reduction = np.maximum(0.0, base.reduction_rates[mode_indices, columns] * factor)
+        time_reduction = np.maximum(0.0, base.time_reduction_rates[mode_indices, columns] * factor)
+        cost_reduction = np.maximum(0.0, base.cost_reduction_rates[mode_indices, columns] * factor)
+
+        volume = base.daily_volume
+        processed_after = np.round(volume * (1 - reduction))
+        time_after = np.round(base.average_time * volume * (1 - time_reduction) / 60)
+        cost_after = np.round(time_after * base.cost_per_hour * 21 / 1000) * 1000
+
+        return PropagationBatch(
+            engine=self,
+            mode_indices=mode_indices,
+            efficiency=efficiency,
+            penalty=penalty,
+            iterations=iterations,
+            reduction_rate=reduction,
+            time_reduction_rate=time_reduction,
+            cost_reduction_rate=cost_reduction,
+            processed_after=processed_after,
+            time_after=time_after,
+            cost_after=cost_after,
+            total_processed_after=DemoMetricsEngine._sequential_sum(processed_after),
+            total_time_after=DemoMetricsEngine._sequential_sum(time_after),
+            total_cost_after=DemoMetricsEngine._sequential_sum(cost_after),
+        )
@@ -0,0 +1,338 @@
+"""予算内で削減効果が最大になるドメイン別モード（plain / smart / ai）の組み合わせを探す。
+
+指標の計算は compute_domain_metrics（compute_metrics_for_mode と同じ式）を使う。
+ドメイン間の結合は「行政DXのモード」だけなので、行政のモードを固定すると残りのドメインは
+独立になり、問題は多肢選択ナップサック（各ドメインから1つのモードを選ぶ）になる。
+これを LP 緩和の上界による分枝限定法で解くので、全探索（3^D）できない数十ドメインでも扱える。
+
+支出 = Σ implementationCost[mode] + maintenance_years × Σ annualMaintenanceCost[mode]
+
+Usage:
+    python tools/mode_optimizer.py --budget 200000000
+    python tools/mode_optimizer.py --budget 300000000 --objective time --maintenance-years 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from dataclasses import dataclass
+from pathlib import Path
+
+from build_demo_analysis import (
+    build_admin_impact_message,
+    compute_domain_metrics,
+    safe_number,
+    summarize_domain_metrics,
+)
+
+MODES = ("plain", "smart", "ai")
+OBJECTIVES = ("cost", "time")
+ADMIN_DOMAIN_ID = "administration"
+
+# 予算判定の相対許容誤差（小数の支出を足し引きした丸め誤差で、予算ちょうどの組み合わせを落とさない）
+BUDGET_RELATIVE_TOLERANCE = 1e-9
+
+
+def domain_spend(domain: dict, mode: str, maintenance_years: float = 0) -> float:
+    metrics = domain.get("demoMetrics") or {}
+    implementation = safe_number(metrics.get("implementationCost", {}).get(mode), 0)
+    maintenance = safe_number(metrics.get("annualMaintenanceCost", {}).get(mode), 0)
+    return implementation + maintenance * maintenance_years
+
+
+def objective_value(domain_metrics: dict, objective: str) -> float:
+    if objective == "time":
+        return domain_metrics["timeBefore"] - domain_metrics["timeAfter"]
+    return domain_metrics["costBefore"] - domain_metrics["costAfter"]
+
+
+class ModePlan:
+    """ドメインごとのモード割り当てとその指標
+
+    set_mode() は変更したドメインの指標だけを再計算する（行政の変更時のみ全ドメイン）。
+    """
+
+    def __init__(self, domains: list[dict], meta: dict, domain_modes: dict[str, str] | None = None):
+        self.cost_per_hour = safe_number(meta.get("demoMetaInfo", {}).get("costPerHour"), 3000)
+        self.domains = {domain.get("id"): domain for domain in domains if domain.get("demoMetrics")}
+        self.modes = {domain_id: "plain" for domain_id in self.domains}
+        self.modes.update(domain_modes or {})
+        self.domain_metrics = {domain_id: self._compute(domain_id) for domain_id in self.domains}
+
+    @property
+    def admin_mode(self) -> str | None:
+        # 行政ドメインがない場合は各ドメイン自身のモードで判定（compute_metrics_for_mode と同じ）
+        return self.modes.get(ADMIN_DOMAIN_ID)
+
+    def _compute(self, domain_id: str) -> dict:
+        return compute_domain_metrics(
+            self.domains[domain_id], self.modes[domain_id], self.cost_per_hour, self.admin_mode
+        )
+
+    def set_mode(self, domain_id: str, mode: str) -> None:
+        if self.modes[domain_id] == mode:
+            return
+        self.modes[domain_id] = mode
+        if domain_id == ADMIN_DOMAIN_ID:
+            self.domain_metrics = {domain_id: self._compute(domain_id) for domain_id in self.domains}
+        else:
+            self.domain_metrics[domain_id] = self._compute(domain_id)
+
+    def spend(self, maintenance_years: float = 0) -> float:
+        return sum(
+            domain_spend(self.domains[domain_id], mode, maintenance_years)
+            for domain_id, mode in self.modes.items()
+        )
+
+    def to_result(self) -> dict:
+        """compute_metrics_for_mode に近い形の dict（currentMode の代わりに domainModes）"""
+        domain_metrics = {
+            domain_id: {**metrics, "mode": self.modes[domain_id]}
+            for domain_id, metrics in self.domain_metrics.items()
+        }
+        return {
+            "domainModes": dict(self.modes),
+            **summarize_domain_metrics(domain_metrics),
+            "domainMetrics": domain_metrics,
+            "adminImpactMessage": build_admin_impact_message(self.admin_mode or "plain", domain_metrics),
+            "costPerHour": self.cost_per_hour,
+            "implementationCost": self.spend(0),
+            "annualMaintenanceCost": self.spend(1) - self.spend(0),
+        }
+
+
+@dataclass
+class Option:
+    mode: str
+    spend: float
+    value: float
+
+
+class MultipleChoiceKnapsack:
+    """各グループ（ドメイン）から1つずつ選び、予算内で value の合計を最大化する分枝限定法"""
+
+    def __init__(self, groups: list[list[Option]]):
+        # 効果の幅が大きいグループから分岐する
+        self.groups = sorted(
+            (sorted(options, key=lambda o: (-o.value, o.spend)) for options in groups),
+            key=lambda options: -(max(o.value for o in options) - min(o.value for o in options)),
+        )
+        count = len(self.groups)
+
+        # 各グループの最安の選択肢と、LP緩和用の増分（上側凸包）
+        self.base: list[Option] = []
+        increments: list[list[tuple[float, float, int, Option]]] = []
+        for g, options in enumerate(self.groups):
+            base, steps = self._hull(options)
+            self.base.append(base)
+            increments.append([(spend, value, g, option) for spend, value, option in steps])
+
+        # 残りのグループ（k 以降）の最安支出・その価値・効率順の増分
+        self.rest_spend = [0.0] * (count + 1)
+        self.rest_value = [0.0] * (count + 1)
+        self.rest_increments: list[list[tuple[float, float, int, Option]]] = [[] for _ in range(count + 1)]
+        for k in range(count - 1, -1, -1):
+            self.rest_spend[k] = self.rest_spend[k + 1] + self.base[k].spend
+            self.rest_value[k] = self.rest_value[k + 1] + self.base[k].value
+            self.rest_increments[k] = sorted(
+                self.rest_increments[k + 1] + increments[k], key=lambda inc: -inc[1] / inc[0]
+            )
+
+        self.nodes = 0
+        self.tolerance = 0.0
+
+    @staticmethod
+    def _hull(options: list[Option]) -> tuple[Option, list[tuple[float, float, Option]]]:
+        """最安の選択肢と、そこから効率の高い順に並んだ (支出の増分, 価値の増分, 移る先の選択肢)"""
+        by_spend = sorted(options, key=lambda o: (o.spend, -o.value))
+        base = by_spend[0]
+        hull = [base]
+        for option in by_spend[1:]:
+            if option.value <= hull[-1].value:
+                continue  # 支出が多いのに価値が増えない
+            while len(hull) >= 2:
+                a, b = hull[-2], hull[-1]
+                # b が a と option を結ぶ線分より下なら LP 的に不要
+                if (b.value - a.value) * (option.spend - a.spend) <= (option.value - a.value) * (b.spend - a.spend):
+                    hull.pop()
+                else:
+                    break
+            hull.append(option)
+        steps = [(b.spend - a.spend, b.value - a.value, b) for a, b in zip(hull, hull[1:])]
+        return base, steps
+
+    def upper_bound(self, k: int, budget_left: float) -> float:
+        """グループ k 以降で得られる価値の上界（LP緩和）。実行不能なら -inf"""
+        left = budget_left - self.rest_spend[k]
+        if left < -self.tolerance:
+            return float("-inf")
+        left = max(left, 0.0)
+        bound = self.rest_value[k]
+        for spend, value, _, _ in self.rest_increments[k]:
+            if spend <= left + self.tolerance:
+                bound += value
+                left -= spend
+            else:
+                bound += value * left / spend
+                break
+        return bound
+
+    def greedy(self, budget: float) -> tuple[float, list[Option]] | None:
+        """効率順に増分を整数で取る初期解"""
+        if budget + self.tolerance < self.rest_spend[0]:
+            return None
+        chosen = list(self.base)
+        left = budget - self.rest_spend[0]
+        value = self.rest_value[0]
+        stopped: set[int] = set()
+        for spend, gain, g, option in self.rest_increments[0]:
+            if g in stopped:
+                continue
+            if spend > left + self.tolerance:
+                stopped.add(g)  # 同じグループの次の増分はこれを前提にしている
+                continue
+            left -= spend
+            value += gain
+            chosen[g] = option
+        return value, chosen
+
+    def solve(self, budget: float) -> tuple[float, list[Option]] | None:
+        """最適解 (価値, グループ順の選択肢) を返す。予算内の解がなければ None"""
+        self.tolerance = BUDGET_RELATIVE_TOLERANCE * max(1.0, abs(budget))
+        incumbent = self.greedy(budget)
+        if incumbent is None:
+            return None
+        best_value, best = incumbent
+        chosen: list[Option] = []
+
+        def search(k: int, budget_left: float, value: float) -> None:
+            nonlocal best_value, best
+            self.nodes += 1
+            if k == len(self.groups):
+                if value > best_value:
+                    best_value, best = value, list(chosen)
+                return
+            if value + self.upper_bound(k, budget_left) <= best_value:
+                return
+            reserve = self.rest_spend[k + 1]
+            for option in self.groups[k]:
+                if option.spend + reserve <= budget_left + self.tolerance:
+                    chosen.append(option)
+                    search(k + 1, budget_left - option.spend, value + option.value)
+                    chosen.pop()
+
+        search(0, budget, 0.0)
+        return best_value, best
+
+
+def optimize_modes(
+    domains: list[dict],
+    meta: dict,
+    budget: float,
+    objective: str = "cost",
+    maintenance_years: float = 0,
+    modes: tuple[str, ...] = MODES,
+) -> dict | None:
+    """予算内で objective（cost: 月間コスト削減額 / time: 月間削減時間）が最大のモード割り当てを探す
+
+    見つかれば ModePlan.to_result() に optimization（探索の情報）を加えた dict、
+    最安の割り当てでも予算を超える場合は None を返す。
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"objective must be one of {', '.join(OBJECTIVES)}")
+
+    cost_per_hour = safe_number(meta.get("demoMetaInfo", {}).get("costPerHour"), 3000)
+    targets = [domain for domain in domains if domain.get("demoMetrics")]
+    admin = next((domain for domain in targets if domain.get("id") == ADMIN_DOMAIN_ID), None)
+    others = [domain for domain in targets if domain is not admin]
+
+    best_value = float("-inf")
+    best_modes: dict[str, str] | None = None
+    nodes = 0
+
+    # 行政のモードを固定すると残りは独立な多肢選択ナップサック
+    for admin_mode in (modes if admin else (None,)):
+        admin_spend = admin_value = 0.0
+        if admin:
+            admin_spend = domain_spend(admin, admin_mode, maintenance_years)
+            admin_value = objective_value(compute_domain_metrics(admin, admin_mode, cost_per_hour), objective)
+
+        groups = [
+            [
+                Option(
+                    mode,
+                    domain_spend(domain, mode, maintenance_years),
+                    objective_value(compute_domain_metrics(domain, mode, cost_per_hour, admin_mode), objective),
+                )
+                for mode in modes
+            ]
+            for domain in others
+        ]
+        knapsack = MultipleChoiceKnapsack(groups)
+        # グループは並べ替えられるので、選択肢オブジェクトからドメインを引けるようにする
+        owner = {id(option): domain.get("id") for domain, options in zip(others, groups) for option in options}
+
+        solution = knapsack.solve(budget - admin_spend)
+        nodes += knapsack.nodes
+        if solution is None:
+            continue
+        value, chosen = solution
+        if admin_value + value > best_value:
+            best_value = admin_value + value
+            best_modes = {owner[id(option)]: option.mode for option in chosen}
+            if admin:
+                best_modes[ADMIN_DOMAIN_ID] = admin_mode
+
+    if best_modes is None:
+        return None
+
+    plan = ModePlan(domains, meta, best_modes)
+    result = plan.to_result()
+    result["optimization"] = {
+        "budget": budget,
+        "objective": objective,
+        "maintenanceYears": maintenance_years,
+        "spend": plan.spend(maintenance_years),
+        "nodesExplored": nodes,
+    }
+    return result
+
+
+def main() -> None:
+    repo_root = Path(__file__).resolve().parents[1]
+
+    parser = argparse.ArgumentParser(description="予算内で削減効果が最大のモード組み合わせを探す")
+    parser.add_argument("--budget", type=float, required=True, help="予算（円）")
+    parser.add_argument("--objective", choices=OBJECTIVES, default="cost", help="最大化する指標")
+    parser.add_argument(
+        "--maintenance-years", type=float, default=0, help="予算に含める運用保守費の年数（既定 0: 実装コストのみ）"
+    )
+    parser.add_argument(
+        "--domains", type=Path, default=repo_root / "assets" / "data" / "domains.json", help="domains.json のパス"
+    )
+    parser.add_argument("--output", type=Path, help="結果を書き出すJSONファイル")
+    args = parser.parse_args()
+
+    with args.domains.open("r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    result = optimize_modes(
+        data.get("domains", []), data.get("meta", {}), args.budget, args.objective, args.maintenance_years
+    )
+    if result is None:
+        parser.exit(1, "予算内で選べるモードの組み合わせがありません\n")
+
+    if args.output:
+        args.output.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    optimization = result["optimization"]
+    print(f"支出: {optimization['spend']:,.0f} 円 / 予算 {optimization['budget']:,.0f} 円")
+    print(f"月間コスト削減: {result['totalCostSaving']:,} 円 / 月間削減時間: {result['totalTimeSaving']:,} 時間")
+    print(f"探索ノード数: {optimization['nodesExplored']:,}")
+    for domain_id, mode in result["domainModes"].items():
+        print(f"  {domain_id}: {mode}")
+
+
+if __name__ == "__main__":
+    main()
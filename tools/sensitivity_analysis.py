@@ -0,0 +1,299 @@
+"""domains.json の点推定値（削減率・1件あたり処理時間）に対する感度分析。
+
+各ドメインの reductionRates / timeReductionRates / averageTimePerCase を点推定値の周りの
+三角分布（base × (1 ± spread)、削減率は 0〜1 に制限）からサンプリングし、
+DemoMetricsEngine（compute_metrics_for_mode のベクトル版）で一括評価する。
+
+- サンプルは chunk_size ごとのチャンクに分け、プロセスプールで並列に評価する
+- 乱数は SeedSequence(seed).spawn() でチャンクごとに固定するので、ワーカー数に関わらず
+  同じ seed なら同じ結果になる
+- 全サンプルは保持せず、チャンクごとの要約（件数・平均・偏差平方和と、一様乱数の優先度が
+  小さい順に reservoir_size 件の標本）を順にマージする。メモリはサンプル数によらず一定で、
+  パーセンタイルは標本から求める（サンプル数が reservoir_size 以下なら厳密値）
+- チャンクが終わるたびに途中経過（パーセンタイル）を progress コールバックへ渡す
+- トルネードチャート用に、入力を1つずつ下限・上限に振ったときの出力の変化幅も計算する
+
+Usage:
+    python tools/sensitivity_analysis.py --samples 1000000 --workers 4 --output sensitivity.json
+    python tools/sensitivity_analysis.py --samples 200000 --stream   # 途中経過をJSON Linesで出力
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+from demo_metrics_engine import MODES, DemoMetricsEngine
+
+# サンプリングする入力
+PARAMETERS = ("reductionRates", "timeReductionRates", "averageTimePerCase")
+
+# 集計する出力（MetricsBatch の属性名と JSON のキー）
+OUTPUTS = {
+    "total_cost_saving": "totalCostSaving",
+    "total_time_saving": "totalTimeSaving",
+    "total_reduction_rate": "totalReductionRate",
+}
+
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+
+# パーセンタイルを求める標本の最大件数（出力3 × モード3 × 8バイトで約7MB）
+DEFAULT_RESERVOIR_SIZE = 100_000
+
+
+def triangular_factors(rng: np.random.Generator, shape: tuple[int, ...], spread: float) -> np.ndarray:
+    """1 を最頻値とする三角分布 [1 - spread, 1 + spread] の倍率"""
+    if spread == 0:
+        return np.ones(shape)
+    return rng.triangular(1 - spread, 1, 1 + spread, shape)
+
+
+def scaled_inputs(engine: DemoMetricsEngine, factors: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+    """入力ごとの倍率 (S, D) を evaluate() の引数に変換（削減率は全モード共通の倍率）"""
+    kwargs = {}
+    if "reductionRates" in factors:
+        kwargs["reduction_rates"] = np.clip(engine.reduction_rates * factors["reductionRates"][:, None, :], 0, 1)
+    if "timeReductionRates" in factors:
+        kwargs["time_reduction_rates"] = np.clip(
+            engine.time_reduction_rates * factors["timeReductionRates"][:, None, :], 0, 1
+        )
+    if "averageTimePerCase" in factors:
+        kwargs["average_time_per_case"] = engine.average_time * factors["averageTimePerCase"]
+    return kwargs
+
+
+def evaluate_samples(
+    engine: DemoMetricsEngine, rng: np.random.Generator, size: int, spread: float
+) -> dict[str, np.ndarray]:
+    """size 件のサンプルを評価し、出力ごとの (size, M) 配列を返す"""
+    count = len(engine.domain_ids)
+    factors = {name: triangular_factors(rng, (size, count), spread) for name in PARAMETERS}
+    batch = engine.evaluate(**scaled_inputs(engine, factors))
+    return {name: getattr(batch, name) for name in OUTPUTS}
+
+
+# ----- マージ可能な要約 -----
+
+
+@dataclass
+class SampleSummary:
+    """サンプルの要約（出力ごとの値は (M,) / 標本は (K, M)）
+
+    平均・偏差平方和は Chan らの方法でマージし、標本は優先度の小さい順に reservoir_size 件を残す
+    （一様乱数の優先度による bottom-k 抽出なので、マージ後も全サンプルからの一様な非復元抽出になる）
+    """
+
+    count: int
+    mean: dict[str, np.ndarray]
+    m2: dict[str, np.ndarray]
+    priorities: np.ndarray
+    reservoir: dict[str, np.ndarray]
+
+    @classmethod
+    def from_values(
+        cls, values: dict[str, np.ndarray], priorities: np.ndarray, reservoir_size: int
+    ) -> SampleSummary:
+        """1チャンク分の値 (S, M) と優先度 (S,) から要約を作る"""
+        keep = bottom_k(priorities, reservoir_size)
+        return cls(
+            count=len(priorities),
+            mean={name: v.mean(axis=0) for name, v in values.items()},
+            m2={name: ((v - v.mean(axis=0)) ** 2).sum(axis=0) for name, v in values.items()},
+            priorities=priorities[keep],
+            reservoir={name: v[keep] for name, v in values.items()},
+        )
+
+    def merge(self, other: SampleSummary, reservoir_size: int) -> SampleSummary:
+        count = self.count + other.count
+        mean, m2 = {}, {}
+        for name in self.mean:
+            delta = other.mean[name] - self.mean[name]
+            mean[name] = self.mean[name] + delta * (other.count / count)
+            m2[name] = self.m2[name] + other.m2[name] + delta ** 2 * (self.count * other.count / count)
+        priorities = np.concatenate([self.priorities, other.priorities])
+        keep = bottom_k(priorities, reservoir_size)
+        return SampleSummary(
+            count=count,
+            mean=mean,
+            m2=m2,
+            priorities=priorities[keep],
+            reservoir={
+                name: np.concatenate([self.reservoir[name], other.reservoir[name]])[keep] for name in self.reservoir
+            },
+        )
+
+
+def bottom_k(priorities: np.ndarray, k: int) -> np.ndarray:
+    """優先度の小さい k 件のインデックス（全件が k 以下ならそのまま）"""
+    if len(priorities) <= k:
+        return np.arange(len(priorities))
+    return np.argpartition(priorities, k - 1)[:k]
+
+
+def summarize(summary: SampleSummary, percentiles=DEFAULT_PERCENTILES, modes=MODES) -> dict:
+    """{出力: {モード: {mean, std, p5, p25, ...}}}（平均・標準偏差は全サンプル、パーセンタイルは標本から）"""
+    result = {}
+    for name, key in OUTPUTS.items():
+        result[key] = {}
+        std = np.sqrt(summary.m2[name] / summary.count)
+        for m, mode in enumerate(modes):
+            stats = {"mean": float(summary.mean[name][m]), "std": float(std[m])}
+            for p, value in zip(percentiles, np.percentile(summary.reservoir[name][:, m], percentiles)):
+                stats[f"p{p:g}"] = float(value)
+            result[key][mode] = stats
+    return result
+
+
+# ----- プロセスプール -----
+
+_worker: dict = {}
+
+
+def _init_worker(domains: list[dict], meta: dict, spread: float, reservoir_size: int) -> None:
+    # エンジンはワーカーごとに1回だけ作る
+    _worker["engine"] = DemoMetricsEngine(domains, meta)
+    _worker["spread"] = spread
+    _worker["reservoir_size"] = reservoir_size
+
+
+def _run_chunk(task: tuple[np.random.SeedSequence, int]) -> SampleSummary:
+    # ワーカーからは (S, M) の値ではなく要約だけを返す
+    seed, size = task
+    rng = np.random.default_rng(seed)
+    values = evaluate_samples(_worker["engine"], rng, size, _worker["spread"])
+    return SampleSummary.from_values(values, rng.random(size), _worker["reservoir_size"])
+
+
+def run_monte_carlo(
+    domains: list[dict],
+    meta: dict,
+    samples: int,
+    seed: int = 0,
+    spread: float = 0.2,
+    chunk_size: int = 50_000,
+    workers: int | None = None,
+    percentiles=DEFAULT_PERCENTILES,
+    progress: Callable[[int, int, dict], None] | None = None,
+    reservoir_size: int = DEFAULT_RESERVOIR_SIZE,
+) -> dict:
+    """モンテカルロ法で出力の分布を求める
+
+    workers: プロセス数（None で CPU 数、0 または 1 でプロセスを使わずに実行）
+    progress: チャンクが終わるたびに (完了サンプル数, 総サンプル数, 途中経過の summary) で呼ばれる
+    reservoir_size: パーセンタイルを求める標本の最大件数（メモリはサンプル数ではなくこれに比例）
+    """
+    sizes = [chunk_size] * (samples // chunk_size)
+    if samples % chunk_size:
+        sizes.append(samples % chunk_size)
+    tasks = list(zip(np.random.SeedSequence(seed).spawn(len(sizes)), sizes))
+
+    # チャンクの要約は投入順にマージする
+    total: SampleSummary | None = None
+
+    def collect(chunk: SampleSummary) -> None:
+        nonlocal total
+        total = chunk if total is None else total.merge(chunk, reservoir_size)
+        if progress is not None:
+            progress(total.count, samples, summarize(total, percentiles))
+
+    workers = os.cpu_count() if workers is None else workers
+    initargs = (domains, meta, spread, reservoir_size)
+    if workers <= 1 or len(tasks) <= 1:
+        _init_worker(*initargs)
+        for task in tasks:
+            collect(_run_chunk(task))
+    else:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=initargs) as executor:
+            # map は投入順に結果を返すので、マージ順（=結果）はワーカー数に依存しない
+            for chunk in executor.map(_run_chunk, tasks):
+                collect(chunk)
+
+    outputs = summarize(total, percentiles) if total is not None else {}
+    return {"samples": samples, "seed": seed, "spread": spread, "outputs": outputs}
+
+
+def tornado(domains: list[dict], meta: dict, spread: float = 0.2, output: str = "total_cost_saving") -> dict:
+    """入力を1つずつ base × (1 ± spread) に振ったときの出力（トルネードチャート用）
+
+    {モード: {base, bars: [{domain, parameter, low, high, swing}, ...]}}（bars は swing の大きい順）
+    """
+    engine = DemoMetricsEngine(domains, meta)
+    count = len(engine.domain_ids)
+    inputs = [(name, d) for name in PARAMETERS for d in range(count)]
+
+    # 行 0 は基準値、行 2i+1 / 2i+2 は入力 i を下限 / 上限にしたシナリオ
+    factors = {name: np.ones((1 + 2 * len(inputs), count)) for name in PARAMETERS}
+    for i, (name, d) in enumerate(inputs):
+        factors[name][2 * i + 1, d] = 1 - spread
+        factors[name][2 * i + 2, d] = 1 + spread
+    values = getattr(engine.evaluate(**scaled_inputs(engine, factors)), output)
+
+    chart = {}
+    for m, mode in enumerate(engine.modes):
+        bars = []
+        for i, (name, d) in enumerate(inputs):
+            low, high = float(values[2 * i + 1, m]), float(values[2 * i + 2, m])
+            bars.append({
+                "domain": engine.domain_ids[d],
+                "parameter": name,
+                "low": low,
+                "high": high,
+                "swing": abs(high - low),
+            })
+        bars.sort(key=lambda bar: -bar["swing"])
+        chart[mode] = {"base": float(values[0, m]), "bars": bars}
+    return chart
+
+
+def main() -> None:
+    repo_root = Path(__file__).resolve().parents[1]
+
+    parser = argparse.ArgumentParser(description="削減率・処理時間の不確実性に対する感度分析")
+    parser.add_argument("--samples", type=int, default=1_000_000, help="サンプル数")
+    parser.add_argument("--seed", type=int, default=0, help="乱数シード")
+    parser.add_argument("--spread", type=float, default=0.2, help="点推定値に対する相対的な幅（三角分布）")
+    parser.add_argument("--chunk-size", type=int, default=50_000, help="1チャンクのサンプル数")
+    parser.add_argument("--workers", type=int, help="プロセス数（既定: CPU数、1 でプロセスを使わない）")
+    parser.add_argument(
+        "--reservoir-size", type=int, default=DEFAULT_RESERVOIR_SIZE, help="パーセンタイルを求める標本の最大件数"
+    )
+    parser.add_argument(
+        "--domains", type=Path, default=repo_root / "assets" / "data" / "domains.json", help="domains.json のパス"
+    )
+    parser.add_argument("--output", type=Path, help="結果を書き出すJSONファイル")
+    parser.add_argument("--stream", action="store_true", help="途中経過を標準出力にJSON Linesで出力")
+    args = parser.parse_args()
+
+    with args.domains.open("r", encoding="utf-8") as f:
+        data = json.load(f)
+    domains, meta = data.get("domains", []), data.get("meta", {})
+
+    def report(done: int, total: int, summary: dict) -> None:
+        if args.stream:
+            print(json.dumps({"done": done, "total": total, "outputs": summary}, ensure_ascii=False), flush=True)
+        print(f"\r{done:,} / {total:,} サンプル ({done / total:.0%})", end="", file=sys.stderr, flush=True)
+
+    result = run_monte_carlo(
+        domains, meta, args.samples, args.seed, args.spread, args.chunk_size, args.workers,
+        progress=report, reservoir_size=args.reservoir_size,
+    )
+    print(file=sys.stderr)
+    result["tornado"] = tornado(domains, meta, args.spread)
+
+    if args.output:
+        args.output.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+    if not args.stream:
+        for mode, stats in result["outputs"].get("totalCostSaving", {}).items():
+            print(f"{mode}: 月間コスト削減 p5={stats['p5']:,.0f} p50={stats['p50']:,.0f} p95={stats['p95']:,.0f}")
+
+
+if __name__ == "__main__":
+    main()
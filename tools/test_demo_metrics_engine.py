@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import copy
+import json
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from build_demo_analysis import compute_metrics_for_mode
+from demo_metrics_engine import MODES, DemoMetricsEngine
+
+DOMAINS_PATH = Path(__file__).resolve().parents[1] / "assets" / "data" / "domains.json"
+
+
+@pytest.fixture(scope="module")
+def data() -> dict:
+    with DOMAINS_PATH.open("r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_default_evaluation_matches_scalar(data):
+    engine = DemoMetricsEngine(data["domains"], data["meta"])
+    batch = engine.evaluate()
+
+    assert batch.scenario_count == 1
+    for mode in MODES:
+        assert batch.to_result(0, mode) == compute_metrics_for_mode(mode, data["domains"], data["meta"])
+
+
+def test_scenario_batch_matches_scalar(data):
+    engine = DemoMetricsEngine(data["domains"], data["meta"])
+    rng = np.random.default_rng(0)
+    scenarios = 50
+    count = len(engine.domain_ids)
+
+    cost_per_hour = rng.uniform(1000, 8000, scenarios).round(1)
+    volume_scale = rng.uniform(0.5, 3.0, (scenarios, count))
+    reduction_rates = np.clip(engine.reduction_rates + rng.normal(0, 0.1, (scenarios, len(MODES), count)), -0.1, 1)
+
+    batch = engine.evaluate(
+        cost_per_hour=cost_per_hour,
+        volume_scale=volume_scale,
+        reduction_rates=reduction_rates,
+    )
+    assert batch.total_cost_saving.shape == (scenarios, len(MODES))
+
+    for s in range(scenarios):
+        domains = copy.deepcopy(data["domains"])
+        meta = copy.deepcopy(data["meta"])
+        meta["demoMetaInfo"]["costPerHour"] = float(cost_per_hour[s])
+        for d, domain_id in enumerate(engine.domain_ids):
+            metrics = domains[[x["id"] for x in domains].index(domain_id)]["demoMetrics"]
+            metrics["dailyVolume"] = float(engine.daily_volume[d] * volume_scale[s, d])
+            for m, mode in enumerate(MODES):
+                metrics["reductionRates"][mode] = float(reduction_rates[s, m, d])
+
+        for mode in MODES:
+            assert batch.to_result(s, mode) == compute_metrics_for_mode(mode, domains, meta)
+
+
+def test_rejects_mismatched_shapes(data):
+    engine = DemoMetricsEngine(data["domains"], data["meta"])
+    with pytest.raises(ValueError):
+        engine.evaluate(reduction_rates=np.zeros((2, 3)))
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from impact_propagation import MAX_IMPACT_PENALTY, MODE_EFFICIENCY, ImpactPropagationEngine, load_dependencies
+
+DOMAINS_PATH = Path(__file__).resolve().parents[1] / "assets" / "data" / "domains.json"
+SCHEMA_PATH = Path(__file__).resolve().parents[1] / "backend" / "schema.sql"
+
+
+@pytest.fixture(scope="module")
+def data() -> dict:
+    with DOMAINS_PATH.open("r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def scalar_fixed_point(domains: list[dict], domain_modes: dict[str, str]) -> dict[str, float]:
+    """辺ごとにループする素朴な不動点計算（ベクトル版の検証用）"""
+    efficiency = {d["id"]: MODE_EFFICIENCY[domain_modes[d["id"]]] for d in domains}
+    for _ in range(1000):
+        penalty = {}
+        for target in domains:
+            total = 0.0
+            for source in domains:
+                if source["id"] != target["id"]:
+                    weight = source["demoMetrics"].get("impactOnOtherDomains", {}).get(target["id"], 0)
+                    total += weight * (1 - efficiency[source["id"]])
+            penalty[target["id"]] = min(MAX_IMPACT_PENALTY, total)
+        efficiency = {
+            d["id"]: MODE_EFFICIENCY[domain_modes[d["id"]]] * (1 - penalty[d["id"]]) for d in domains
+        }
+    return penalty
+
+
+def test_fixed_point_matches_scalar_iteration(data):
+    engine = ImpactPropagationEngine(data["domains"], data["meta"])
+    rng = np.random.default_rng(0)
+    combinations = rng.integers(0, len(engine.modes), (20, len(engine.domain_ids)))
+
+    batch = engine.evaluate(combinations)
+
+    for s in range(len(combinations)):
+        expected = scalar_fixed_point(data["domains"], batch.domain_modes(s))
+        assert batch.penalty[s] == pytest.approx([expected[d] for d in engine.domain_ids], abs=1e-8)
+
+
+def test_first_step_matches_frontend_penalty(data):
+    """1回目のペナルティは home.js の相互依存ペナルティ（依存先のモードのみで計算）と同じ"""
+    engine = ImpactPropagationEngine(data["domains"], data["meta"])
+    modes = {domain_id: "smart" for domain_id in engine.domain_ids}
+    modes["administration"] = "plain"
+
+    penalty = engine.impact_penalty(engine.mode_efficiency[engine.mode_indices(modes)])
+
+    medical = engine.domain_ids.index("medical")
+    expected = sum(
+        (1 - MODE_EFFICIENCY[modes[d["id"]]]) * d["demoMetrics"]["impactOnOtherDomains"].get("medical", 0)
+        for d in data["domains"]
+        if d["id"] != "medical"
+    )
+    assert penalty[0, medical] == pytest.approx(min(MAX_IMPACT_PENALTY, expected))
+
+
+def test_all_ai_has_no_penalty(data):
+    engine = ImpactPropagationEngine(data["domains"], data["meta"])
+    batch = engine.evaluate(engine.mode_indices({domain_id: "ai" for domain_id in engine.domain_ids}))
+
+    assert np.all(batch.penalty == 0)
+    ai = engine.modes.index("ai")
+    assert np.array_equal(batch.reduction_rate[0], engine.base.reduction_rates[ai])
+
+
+def test_all_combinations_in_one_batch(data):
+    engine = ImpactPropagationEngine(data["domains"], data["meta"])
+    combinations = engine.all_mode_combinations()
+
+    batch = engine.evaluate(combinations)
+
+    assert batch.scenario_count == len(engine.modes) ** len(engine.domain_ids)
+    assert np.all((batch.penalty >= 0) & (batch.penalty <= MAX_IMPACT_PENALTY))
+    best = int(batch.total_cost_saving.argmax())
+    assert set(batch.domain_modes(best).values()) == {"ai"}
+
+    # 個別に評価した結果と一致する
+    for s in (0, 1234, len(combinations) - 1):
+        single = engine.evaluate(combinations[s])
+        assert single.to_result(0) == batch.to_result(s)
+
+
+def test_domain_dependencies_table_adds_edges(tmp_path):
+    db_path = tmp_path / "deps.db"
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA_PATH.read_text(encoding="utf-8"))
+    conn.execute("INSERT INTO domains (id, name) VALUES ('a', 'A'), ('b', 'B')")
+    conn.execute(
+        "INSERT INTO domain_dependencies (source_domain_id, target_domain_id, dependency_rate) VALUES ('b', 'a', 0.5)"
+    )
+    conn.commit()
+    conn.close()
+
+    metrics = {"dailyVolume": 100, "averageTimePerCase": 10, "reductionRates": {"plain": 0.1, "smart": 0.5, "ai": 0.9}}
+    domains = [{"id": "a", "demoMetrics": metrics}, {"id": "b", "demoMetrics": metrics}]
+    engine = ImpactPropagationEngine(domains, {}, load_dependencies(db_path))
+
+    # b は a に依存するので、a が plain だと b の削減率が半分になる
+    batch = engine.evaluate(engine.mode_indices({"a": "plain", "b": "ai"}))
+    assert engine.edge_count == 1
+    assert batch.penalty[0].tolist() == [0.0, 0.5]
+    assert batch.reduction_rate[0].tolist() == [0.1, 0.45]
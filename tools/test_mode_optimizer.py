@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import itertools
+import json
+import random
+from pathlib import Path
+
+import pytest
+
+from build_demo_analysis import compute_metrics_for_mode
+from mode_optimizer import MODES, ModePlan, MultipleChoiceKnapsack, Option, domain_spend, optimize_modes
+
+DOMAINS_PATH = Path(__file__).resolve().parents[1] / "assets" / "data" / "domains.json"
+
+
+@pytest.fixture(scope="module")
+def data() -> dict:
+    with DOMAINS_PATH.open("r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def brute_force(domains: list[dict], meta: dict, budget: float, objective: str, maintenance_years: float = 0):
+    plan = ModePlan(domains, meta)
+    key = "totalCostSaving" if objective == "cost" else "totalTimeSaving"
+    best = None
+    for combination in itertools.product(MODES, repeat=len(plan.domains)):
+        for domain_id, mode in zip(plan.domains, combination):
+            plan.set_mode(domain_id, mode)
+        if plan.spend(maintenance_years) <= budget:
+            value = plan.to_result()[key]
+            best = value if best is None else max(best, value)
+    return best
+
+
+def synthetic_domains(count: int, seed: int) -> list[dict]:
+    rng = random.Random(seed)
+    domains = [{"id": "administration", "name": "行政"}] + [{"id": f"d{i}", "name": f"分野{i}"} for i in range(count - 1)]
+    for domain in domains:
+        smart, ai = rng.uniform(0.2, 0.5), rng.uniform(0.5, 0.9)
+        base_cost = rng.randint(1, 20)
+        domain["demoMetrics"] = {
+            "dailyVolume": rng.randint(100, 5000),
+            "averageTimePerCase": rng.randint(5, 60),
+            "administrativeDependency": rng.uniform(0, 1),
+            "reductionRates": {"plain": 0.1, "smart": smart, "ai": ai},
+            "timeReductionRates": {"plain": 0.1, "smart": smart, "ai": ai},
+            "implementationCost": {
+                "plain": base_cost * 1_000_000,
+                "smart": base_cost * rng.randint(2, 4) * 1_000_000,
+                "ai": base_cost * rng.randint(5, 12) * 1_000_000,
+            },
+        }
+    return domains
+
+
+def test_uniform_plan_matches_compute_metrics_for_mode(data):
+    for mode in MODES:
+        plan = ModePlan(data["domains"], data["meta"], {d["id"]: mode for d in data["domains"]})
+        expected = compute_metrics_for_mode(mode, data["domains"], data["meta"])
+        result = plan.to_result()
+        for key in ("totalTimeSaving", "totalCostSaving", "totalReductionRate"):
+            assert result[key] == expected[key]
+
+
+def test_set_mode_matches_fresh_plan(data):
+    plan = ModePlan(data["domains"], data["meta"])
+    for domain_id, mode in [("medical", "ai"), ("administration", "smart"), ("tax", "smart"), ("administration", "ai")]:
+        plan.set_mode(domain_id, mode)
+        assert plan.to_result() == ModePlan(data["domains"], data["meta"], plan.modes).to_result()
+
+
+@pytest.mark.parametrize("objective", ["cost", "time"])
+@pytest.mark.parametrize("budget", [45_000_000, 200_000_000, 400_000_000])
+def test_matches_brute_force(data, objective, budget):
+    result = optimize_modes(data["domains"], data["meta"], budget, objective)
+
+    key = "totalCostSaving" if objective == "cost" else "totalTimeSaving"
+    assert result["optimization"]["spend"] <= budget
+    assert result[key] == brute_force(data["domains"], data["meta"], budget, objective)
+
+
+def test_maintenance_years_count_towards_budget(data):
+    budget = 200_000_000
+    result = optimize_modes(data["domains"], data["meta"], budget, maintenance_years=5)
+
+    spend = sum(domain_spend(d, result["domainModes"][d["id"]], 5) for d in data["domains"])
+    assert result["optimization"]["spend"] == spend <= budget
+    assert result["totalCostSaving"] == brute_force(data["domains"], data["meta"], budget, "cost", 5)
+
+
+def test_infeasible_budget_returns_none(data):
+    assert optimize_modes(data["domains"], data["meta"], 1_000) is None
+
+
+@pytest.mark.parametrize("costs, budget", [
+    ((0.1, 0.2), 0.3),
+    ((5_383_909.7, 303_121.9, 712_968.4), 6_400_000),
+])
+def test_plan_spending_exactly_the_budget_with_fractional_costs(costs, budget):
+    """小数の支出の合計が予算ちょうどになる組み合わせを丸め誤差で落とさない"""
+    groups = [[Option("plain", 0, 0), Option("ai", cost, 1)] for cost in costs]
+
+    value, chosen = MultipleChoiceKnapsack(groups).solve(budget)
+
+    assert value == len(costs)
+    assert [option.mode for option in chosen] == ["ai"] * len(costs)
+
+
+def test_scales_to_dozens_of_domains():
+    """3^40 通りの全探索は不可能だが、分枝限定法なら少ないノード数で解ける"""
+    domains = synthetic_domains(40, seed=1)
+    meta: dict = {}
+    budget = sum(domain_spend(d, "smart") for d in domains)
+
+    result = optimize_modes(domains, meta, budget)
+
+    assert result["optimization"]["spend"] <= budget
+    assert result["optimization"]["nodesExplored"] < 1_000_000
+    # 全ドメイン smart（予算ちょうど）以上の効果がある
+    uniform = ModePlan(domains, meta, {d["id"]: "smart" for d in domains}).to_result()
+    assert result["totalCostSaving"] >= uniform["totalCostSaving"]
+
+    # 行政のモードを固定した多肢選択ナップサックを支出（100万円単位）の動的計画法で解いた値と一致する
+    best = None
+    for admin_mode in MODES:
+        plan = ModePlan(domains, meta, {"administration": admin_mode})
+        units = int(budget // 1_000_000) - int(domain_spend(domains[0], admin_mode) // 1_000_000)
+        if units < 0:
+            continue
+        admin = plan.domain_metrics["administration"]
+        reachable = {0: admin["costBefore"] - admin["costAfter"]}
+        for domain in domains[1:]:
+            next_reachable: dict[int, int] = {}
+            for mode in MODES:
+                plan.set_mode(domain["id"], mode)
+                metrics = plan.domain_metrics[domain["id"]]
+                value = metrics["costBefore"] - metrics["costAfter"]
+                cost = int(domain_spend(domain, mode) // 1_000_000)
+                for spent, total in reachable.items():
+                    if spent + cost <= units and next_reachable.get(spent + cost, -1) < total + value:
+                        next_reachable[spent + cost] = total + value
+            reachable = next_reachable
+        if reachable:
+            candidate = max(reachable.values())
+            best = candidate if best is None else max(best, candidate)
+
+    assert result["totalCostSaving"] == best
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from build_demo_analysis import compute_metrics_for_mode
+from demo_metrics_engine import MODES
+from sensitivity_analysis import SampleSummary, run_monte_carlo, tornado
+
+DOMAINS_PATH = Path(__file__).resolve().parents[1] / "assets" / "data" / "domains.json"
+
+
+@pytest.fixture(scope="module")
+def data() -> dict:
+    with DOMAINS_PATH.open("r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_zero_spread_matches_point_estimate(data):
+    result = run_monte_carlo(data["domains"], data["meta"], samples=10, spread=0, workers=1)
+
+    for mode in MODES:
+        expected = compute_metrics_for_mode(mode, data["domains"], data["meta"])
+        stats = result["outputs"]["totalCostSaving"][mode]
+        assert stats["p5"] == stats["p95"] == expected["totalCostSaving"]
+
+
+def test_seeded_results_do_not_depend_on_workers(data):
+    options = dict(samples=2_500, seed=42, chunk_size=1_000)
+    serial = run_monte_carlo(data["domains"], data["meta"], workers=1, **options)
+    parallel = run_monte_carlo(data["domains"], data["meta"], workers=2, **options)
+
+    assert serial == parallel
+    assert serial != run_monte_carlo(data["domains"], data["meta"], workers=1, **dict(options, seed=43))
+
+
+def test_progress_reports_each_chunk(data):
+    reports = []
+    run_monte_carlo(
+        data["domains"], data["meta"], samples=2_500, chunk_size=1_000, workers=1,
+        progress=lambda done, total, summary: reports.append((done, total, summary)),
+    )
+
+    assert [(done, total) for done, total, _ in reports] == [(1_000, 2_500), (2_000, 2_500), (2_500, 2_500)]
+    stats = reports[-1][2]["totalCostSaving"]["ai"]
+    assert stats["p5"] <= stats["p50"] <= stats["p95"]
+
+
+def test_summaries_merge_like_concatenated_values():
+    rng = np.random.default_rng(0)
+    chunks = [{"x": rng.normal(size=(size, 3))} for size in (700, 1_000, 300)]
+    priorities = [rng.random(len(chunk["x"])) for chunk in chunks]
+
+    total = None
+    for chunk, chunk_priorities in zip(chunks, priorities):
+        summary = SampleSummary.from_values(chunk, chunk_priorities, 500)
+        total = summary if total is None else total.merge(summary, 500)
+
+    values = np.concatenate([chunk["x"] for chunk in chunks])
+    assert total.count == 2_000
+    np.testing.assert_allclose(total.mean["x"], values.mean(axis=0))
+    np.testing.assert_allclose(total.m2["x"] / total.count, values.var(axis=0))
+    # 標本は全サンプルのうち優先度の小さい500件
+    order = np.argsort(np.concatenate(priorities))[:500]
+    assert sorted(map(tuple, total.reservoir["x"])) == sorted(map(tuple, values[order]))
+
+
+def test_percentiles_from_bounded_reservoir(data):
+    options = dict(samples=20_000, seed=1, chunk_size=4_000, workers=1)
+    exact = run_monte_carlo(data["domains"], data["meta"], reservoir_size=20_000, **options)
+    sampled = run_monte_carlo(data["domains"], data["meta"], reservoir_size=2_000, **options)
+
+    for mode in MODES:
+        expected, stats = exact["outputs"]["totalCostSaving"][mode], sampled["outputs"]["totalCostSaving"][mode]
+        # 平均・標準偏差は標本の大きさによらず全サンプルから求める
+        assert stats["mean"] == pytest.approx(expected["mean"])
+        assert stats["std"] == pytest.approx(expected["std"])
+        for key in ("p5", "p50", "p95"):
+            assert stats[key] == pytest.approx(expected[key], abs=0.1 * expected["std"])
+
+
+def test_tornado_bars(data):
+    chart = tornado(data["domains"], data["meta"], spread=0.2)
+
+    smart = chart["smart"]
+    assert smart["base"] == compute_metrics_for_mode("smart", data["domains"], data["meta"])["totalCostSaving"]
+    swings = [bar["swing"] for bar in smart["bars"]]
+    assert swings == sorted(swings, reverse=True)
+    assert len(smart["bars"]) == 3 * len(data["domains"])
+    # 削減率を上げるとコスト削減額は増える
+    bar = next(b for b in smart["bars"] if b["parameter"] == "timeReductionRates" and b["domain"] == "medical")
+    assert bar["low"] < smart["base"] < bar["high"]